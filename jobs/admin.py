@@ -0,0 +1,27 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from jobs.models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "task",
+        "queue",
+        "priority",
+        "status",
+        "attempts",
+        "run_at",
+        "finished_at",
+    )
+    list_filter = ("queue", "status")
+    search_fields = ("task",)
+    actions = ("retry",)
+
+    @admin.action(description="Retry selected jobs")
+    def retry(self, request, queryset):
+        queryset.exclude(status=Job.RUNNING).update(
+            status=Job.QUEUED, attempts=0, run_at=timezone.now()
+        )
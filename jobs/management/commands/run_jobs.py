@@ -0,0 +1,214 @@
+import json
+import logging
+import multiprocessing
+import signal
+import time
+import traceback
+from collections import Counter
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    BrokenExecutor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs.models import Job
+from jobs.queue import (
+    claim,
+    execute,
+    fail,
+    queue_stats,
+    release_stale,
+    worker_id,
+)
+
+RELEASE_STALE_INTERVAL = 60
+
+logger = logging.getLogger(__name__)
+
+
+def _run_in_pool(job_id: int) -> tuple[int, str, float]:
+    # pool threads and processes keep their own connections between jobs
+    close_old_connections()
+    try:
+        return job_id, *execute(job_id)
+    finally:
+        close_old_connections()
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background jobs from the database queue. Stop with SIGTERM or "
+        "Ctrl+C, running jobs are finished first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--queue",
+            action="append",
+            help="Queue to take jobs from, may be repeated (default: default)",
+        )
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument(
+            "--pool",
+            choices=("thread", "process"),
+            default="thread",
+            help="Use processes for CPU bound jobs",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when no job is due",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no job is due instead of waiting for new ones",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Print job counts per queue and status and exit",
+        )
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self.stdout.write(json.dumps(queue_stats(), indent=2))
+            return
+
+        self.queues = options["queue"] or ["default"]
+        self.worker = worker_id()
+        self.metrics = Counter()
+        self.busy_time = 0.0
+        self.verbosity = options["verbosity"]
+        self.stopping = False
+        handlers = {
+            signum: signal.signal(signum, self.stop)
+            for signum in (signal.SIGINT, signal.SIGTERM)
+        }
+
+        self.stdout.write(
+            f"Worker {self.worker} processing {', '.join(self.queues)} "
+            f"with {options['concurrency']} {options['pool']}(s)"
+        )
+        started = time.perf_counter()
+        try:
+            if options["concurrency"] == 1:
+                self.work_inline(options["poll_interval"], options["burst"])
+            else:
+                self.work_in_pool(
+                    options["pool"],
+                    options["concurrency"],
+                    options["poll_interval"],
+                    options["burst"],
+                )
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+        self.report(time.perf_counter() - started)
+
+    def stop(self, signum, frame):
+        self.stopping = True
+
+    def record(self, job_id: int, outcome: str, duration: float) -> None:
+        self.metrics[outcome] += 1
+        self.busy_time += duration
+        if self.verbosity > 1:
+            self.stdout.write(f"Job {job_id}: {outcome} in {duration:.3f}s")
+
+    def record_crash(self, job_id: int, error: str) -> None:
+        """Record a job whose pool future raised instead of returning"""
+        logger.error("Job %s crashed in the worker pool:\n%s", job_id, error)
+        try:
+            outcome = fail(Job.objects.get(id=job_id), error)
+        except Exception:
+            # left RUNNING, release_stale() queues it again
+            logger.exception("Could not record the crash of job %s", job_id)
+            outcome = "crashed"
+        self.record(job_id, outcome, 0.0)
+
+    def release_stale(self) -> None:
+        released = release_stale()
+        if released:
+            self.stdout.write(f"Released {released} stale job(s)")
+
+    def work_inline(self, poll_interval: float, burst: bool) -> None:
+        released_at = 0.0
+        while not self.stopping:
+            if time.monotonic() - released_at > RELEASE_STALE_INTERVAL:
+                self.release_stale()
+                released_at = time.monotonic()
+
+            job_ids = claim(self.queues, 1, self.worker)
+            if not job_ids:
+                if burst:
+                    return
+                time.sleep(poll_interval)
+                continue
+            self.record(job_ids[0], *execute(job_ids[0]))
+
+    def work_in_pool(
+        self, pool: str, concurrency: int, poll_interval: float, burst: bool
+    ) -> None:
+        if pool == "process":
+            # spawned processes don't inherit the parent's DB connections
+            executor = ProcessPoolExecutor(
+                concurrency,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            )
+        else:
+            executor = ThreadPoolExecutor(concurrency)
+
+        running = {}
+        released_at = 0.0
+        with executor:
+            while not self.stopping or running:
+                if time.monotonic() - released_at > RELEASE_STALE_INTERVAL:
+                    self.release_stale()
+                    released_at = time.monotonic()
+
+                job_ids = []
+                if not self.stopping and len(running) < concurrency:
+                    job_ids = claim(
+                        self.queues, concurrency - len(running), self.worker
+                    )
+                for job_id in job_ids:
+                    running[executor.submit(_run_in_pool, job_id)] = job_id
+
+                if not running:
+                    if burst:
+                        return
+                    time.sleep(poll_interval)
+                    continue
+
+                done, _ = wait(
+                    running, timeout=poll_interval, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    job_id = running.pop(future)
+                    try:
+                        self.record(*future.result())
+                    except BrokenExecutor:
+                        # a process died, the pool can't take new jobs
+                        self.stopping = True
+                        self.record_crash(job_id, traceback.format_exc())
+                    except Exception:
+                        self.record_crash(job_id, traceback.format_exc())
+
+    def report(self, elapsed: float) -> None:
+        processed = sum(self.metrics.values())
+        self.stdout.write(
+            f"Processed {processed} job(s) in {elapsed:.1f}s: "
+            f"{self.metrics['succeeded']} succeeded, "
+            f"{self.metrics['retry']} to retry, "
+            f"{self.metrics['failed']} failed, "
+            f"{processed / elapsed if elapsed else 0:.1f} jobs/s, "
+            f"avg {self.busy_time / processed if processed else 0:.3f}s/job"
+        )
@@ -0,0 +1,57 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Job(models.Model):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (SUCCEEDED, "Succeeded"),
+        (FAILED, "Failed"),
+    )
+
+    queue = models.CharField(max_length=100, default="default")
+    task = models.CharField(
+        max_length=255,
+        help_text="Dotted path of the function to call",
+    )
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    priority = models.SmallIntegerField(
+        default=0,
+        help_text="Jobs with higher priority run first",
+    )
+    status = models.CharField(
+        max_length=20, choices=STATUS_CHOICES, default=QUEUED
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=255, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-priority", "run_at", "id"]
+        indexes = [
+            # Only queued jobs are claimed, keep the index small
+            models.Index(
+                fields=["queue", "-priority", "run_at"],
+                condition=Q(status="queued"),
+                name="jobs_job_claim_idx",
+            ),
+            models.Index(
+                fields=["status", "locked_at"],
+                name="jobs_job_status_locked_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.status})"
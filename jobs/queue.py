@@ -0,0 +1,185 @@
+"""Database backed job queue.
+
+Jobs are rows of the Job table. Workers claim them with
+SELECT ... FOR UPDATE SKIP LOCKED, so any number of workers can poll the
+same queue without handing a job out twice and without an external broker.
+Because enqueue() is a plain INSERT, a job enqueued inside a transaction
+only becomes visible to workers once that transaction commits.
+"""
+import os
+import socket
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import Callable, Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from jobs.models import Job
+
+
+def get_config() -> dict:
+    return {
+        "MAX_ATTEMPTS": 5,
+        "BACKOFF_BASE": 10,
+        "BACKOFF_MAX": 3600,
+        "LOCK_TIMEOUT": 600,
+        **getattr(settings, "JOBS", {}),
+    }
+
+
+def task_path(task: Callable | str) -> str:
+    if isinstance(task, str):
+        return task
+    return f"{task.__module__}.{task.__qualname__}"
+
+
+def enqueue(
+    task: Callable | str,
+    args: Iterable = (),
+    kwargs: dict | None = None,
+    *,
+    queue: str = "default",
+    priority: int = 0,
+    run_at: datetime | None = None,
+    delay: timedelta | None = None,
+    max_attempts: int | None = None,
+) -> Job:
+    """Schedule `task(*args, **kwargs)` to run in a worker.
+
+    Arguments must be JSON serializable. `run_at` or `delay` postpone the
+    job, otherwise it runs as soon as a worker is free.
+    """
+    if run_at is None:
+        run_at = timezone.now() + (delay or timedelta())
+
+    return Job.objects.create(
+        queue=queue,
+        task=task_path(task),
+        args=list(args),
+        kwargs=kwargs or {},
+        priority=priority,
+        run_at=run_at,
+        max_attempts=max_attempts or get_config()["MAX_ATTEMPTS"],
+    )
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim(
+    queues: Iterable[str], limit: int = 1, locked_by: str | None = None
+) -> list[int]:
+    """Mark up to `limit` due jobs as running and return their ids"""
+    now = timezone.now()
+    with transaction.atomic():
+        job_ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(queue__in=list(queues), status=Job.QUEUED, run_at__lte=now)
+            .order_by("-priority", "run_at", "id")
+            .values_list("id", flat=True)[:limit]
+        )
+        if job_ids:
+            Job.objects.filter(id__in=job_ids).update(
+                status=Job.RUNNING,
+                attempts=F("attempts") + 1,
+                locked_at=now,
+                locked_by=locked_by or worker_id(),
+            )
+    return job_ids
+
+
+def backoff(attempts: int) -> timedelta:
+    """Exponential delay before the next attempt of a failed job"""
+    config = get_config()
+    seconds = min(
+        config["BACKOFF_BASE"] * 2 ** max(attempts - 1, 0),
+        config["BACKOFF_MAX"],
+    )
+    return timedelta(seconds=seconds)
+
+
+def fail(job: Job, error: str) -> str:
+    """Queue a failed job again with a backoff, or mark it failed once it
+    ran out of attempts. Returns "retry" or the final status.
+    """
+    job.last_error = error
+    job.locked_at = None
+    job.locked_by = ""
+    if job.attempts >= job.max_attempts:
+        job.status = Job.FAILED
+        job.finished_at = timezone.now()
+    else:
+        job.status = Job.QUEUED
+        job.run_at = timezone.now() + backoff(job.attempts)
+    job.save(
+        update_fields=[
+            "status",
+            "last_error",
+            "locked_at",
+            "locked_by",
+            "run_at",
+            "finished_at",
+        ]
+    )
+    return "retry" if job.status == Job.QUEUED else job.status
+
+
+def execute(job_id: int) -> tuple[str, float]:
+    """Run a claimed job and record the outcome.
+
+    Failed jobs are queued again with a backoff until they run out of
+    attempts. Returns the new status of the job and the run duration.
+    """
+    job = Job.objects.get(id=job_id)
+    started = time.perf_counter()
+    try:
+        import_string(job.task)(*job.args, **job.kwargs)
+    except Exception:
+        duration = time.perf_counter() - started
+        return fail(job, traceback.format_exc()), duration
+
+    duration = time.perf_counter() - started
+    Job.objects.filter(id=job.id).update(
+        status=Job.SUCCEEDED,
+        locked_at=None,
+        locked_by="",
+        finished_at=timezone.now(),
+    )
+    return Job.SUCCEEDED, duration
+
+
+def release_stale(timeout: int | None = None) -> int:
+    """Queue again jobs whose worker died while running them"""
+    timeout = timeout or get_config()["LOCK_TIMEOUT"]
+    return Job.objects.filter(
+        status=Job.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(seconds=timeout),
+    ).update(status=Job.QUEUED, locked_at=None, locked_by="")
+
+
+def queue_stats() -> dict[str, dict]:
+    """Job counts per queue and status, and the age of the oldest due job"""
+    now = timezone.now()
+    stats = {}
+    for row in Job.objects.values("queue", "status").annotate(
+        count=Count("id")
+    ).order_by():
+        stats.setdefault(row["queue"], {})[row["status"]] = row["count"]
+
+    for row in (
+        Job.objects.filter(status=Job.QUEUED, run_at__lte=now)
+        .values("queue")
+        .annotate(oldest=Min("run_at"))
+        .order_by()
+    ):
+        stats[row["queue"]]["lag_s"] = round(
+            (now - row["oldest"]).total_seconds(), 1
+        )
+
+    return stats
@@ -0,0 +1,151 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from jobs.management.commands import run_jobs
+from jobs.models import Job
+from jobs.queue import claim, enqueue, execute, queue_stats, release_stale
+
+CALLS = []
+
+
+def record_call(*args, **kwargs):
+    CALLS.append((args, kwargs))
+
+
+def fail():
+    raise RuntimeError("boom")
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_enqueue(self):
+        job = enqueue(record_call, [1, 2], {"key": "value"}, priority=5)
+
+        self.assertEqual(job.task, "jobs.tests.record_call")
+        self.assertEqual(job.args, [1, 2])
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.max_attempts, 5)
+
+    def test_claim_orders_by_priority_and_skips_future_jobs(self):
+        low = enqueue(record_call)
+        high = enqueue(record_call, priority=10)
+        enqueue(record_call, priority=20, delay=timedelta(hours=1))
+        enqueue(record_call, priority=30, queue="other")
+
+        self.assertEqual(claim(["default"], 2, "test"), [high.id, low.id])
+        high.refresh_from_db()
+        self.assertEqual(high.status, Job.RUNNING)
+        self.assertEqual(high.attempts, 1)
+        self.assertEqual(high.locked_by, "test")
+        self.assertEqual(claim(["default"], 2, "test"), [])
+
+    def test_execute_success(self):
+        job = enqueue(record_call, [1], {"key": "value"})
+        claim(["default"])
+
+        self.assertEqual(execute(job.id)[0], Job.SUCCEEDED)
+        self.assertEqual(CALLS, [((1,), {"key": "value"})])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_execute_failure_retries_with_backoff(self):
+        job = enqueue(fail, max_attempts=2)
+
+        claim(["default"])
+        self.assertEqual(execute(job.id)[0], "retry")
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertIn("RuntimeError: boom", job.last_error)
+        self.assertGreater(
+            job.run_at, timezone.now() + timedelta(seconds=5)
+        )
+
+        Job.objects.filter(id=job.id).update(run_at=timezone.now())
+        claim(["default"])
+        self.assertEqual(execute(job.id)[0], Job.FAILED)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_release_stale(self):
+        job = enqueue(record_call)
+        claim(["default"])
+        Job.objects.filter(id=job.id).update(
+            locked_at=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertEqual(release_stale(timeout=60), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+
+    def test_queue_stats(self):
+        enqueue(record_call)
+        enqueue(record_call, queue="images")
+        claim(["images"])
+
+        stats = queue_stats()
+
+        self.assertEqual(stats["default"][Job.QUEUED], 1)
+        self.assertIn("lag_s", stats["default"])
+        self.assertEqual(stats["images"], {Job.RUNNING: 1})
+
+    def test_run_jobs_burst(self):
+        for i in range(3):
+            enqueue(record_call, [i])
+        enqueue(fail, max_attempts=1)
+        out = StringIO()
+
+        call_command("run_jobs", "--burst", "--concurrency=1", stdout=out)
+
+        self.assertEqual(len(CALLS), 3)
+        self.assertIn("3 succeeded, 0 to retry, 1 failed", out.getvalue())
+
+
+class ThreadPoolWorkerTests(TransactionTestCase):
+    def test_run_jobs_thread_pool(self):
+        CALLS.clear()
+        for i in range(10):
+            enqueue(record_call, [i])
+
+        call_command(
+            "run_jobs", "--burst", "--concurrency=4", stdout=StringIO()
+        )
+
+        self.assertEqual(sorted(args[0] for args, _ in CALLS), list(range(10)))
+        self.assertEqual(
+            Job.objects.filter(status=Job.SUCCEEDED).count(), 10
+        )
+
+    def test_crashed_future_does_not_stop_the_worker(self):
+        CALLS.clear()
+        crashing = enqueue(record_call, ["crash"])
+        for i in range(3):
+            enqueue(record_call, [i])
+
+        def execute_or_crash(job_id):
+            if job_id == crashing.id:
+                raise RuntimeError("connection lost")
+            return execute(job_id)
+
+        out = StringIO()
+        with mock.patch.object(
+            run_jobs, "execute", side_effect=execute_or_crash
+        ), self.assertLogs(run_jobs.logger, "ERROR") as logs:
+            call_command(
+                "run_jobs", "--burst", "--concurrency=2", stdout=out
+            )
+
+        self.assertEqual(sorted(args[0] for args, _ in CALLS), [0, 1, 2])
+        self.assertIn("3 succeeded, 1 to retry, 0 failed", out.getvalue())
+        self.assertIn(f"Job {crashing.id} crashed", logs.output[0])
+        crashing.refresh_from_db()
+        self.assertEqual(crashing.status, Job.QUEUED)
+        self.assertIn("connection lost", crashing.last_error)
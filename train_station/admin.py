@@ -8,7 +8,8 @@ from train_station.models import (
     Ticket,
     Station,
     Route,
-    Order
+    Order,
+    Schedule
 )
 
 
@@ -20,3 +21,4 @@ admin.site.register(Ticket)
 admin.site.register(Station)
 admin.site.register(Route)
 admin.site.register(Order)
+admin.site.register(Schedule)
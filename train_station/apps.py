@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class TrainStationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'train_station'
+
+    def ready(self):
+        from train_station import signals  # noqa: F401
+        from train_station_service import instrumentation  # noqa: F401
+        from train_station_service import metrics  # noqa: F401
+        from train_station_service import slow_queries  # noqa: F401
+        from train_station_service import tracing  # noqa: F401
@@ -0,0 +1,154 @@
+"""Moving finished journeys and their orders out of the live tables.
+
+Orders whose journeys all arrived before the cut-off are stored as
+compressed JSON (as the order list endpoint rendered them) in
+ArchivedOrder, so order history stays readable, and their tickets are
+deleted. Journeys that arrived before the cut-off and have no tickets left
+follow into ArchivedJourney. Journey search and the `Count("tickets")`
+aggregate then only scan rows that can still be booked.
+
+Each batch is moved in its own transaction. Rows are deleted with plain
+DELETE statements: loading them to send post_delete signals would make
+archiving slower than the history is growing. None of the receivers of
+train_station.signals run for them, so archiving does their work itself:
+invalidate_journey_lists, invalidate_journey_lists_on_crew_change and
+invalidate_timetable_on_delete are replaced by invalidating the journey
+lists and timetables after every batch, and archive() refreshes the route
+graph and station index of every process once the run is over.
+publish_seat_released is skipped on purpose, nobody listens for seat
+releases of journeys that have already arrived.
+"""
+from datetime import datetime
+
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Q
+
+from train_station import (
+    itineraries,
+    response_cache,
+    route_graph,
+    station_index,
+)
+from train_station.models import (
+    ArchivedJourney,
+    ArchivedOrder,
+    Journey,
+    Order,
+    Ticket,
+)
+from train_station.serializers import (
+    JourneyListSerializer,
+    OrderListSerializer,
+)
+
+BATCH_SIZE = 1000
+
+
+def archivable_orders(before: datetime):
+    """Orders whose journeys all arrived, and empty orders placed before
+    the cut-off (a new order has no tickets yet)"""
+    return Order.objects.filter(
+        Exists(Ticket.objects.filter(order=OuterRef("pk")))
+        | Q(created_at__lt=before)
+    ).exclude(tickets__journey__arrival_time__gte=before)
+
+
+def archivable_journeys(before: datetime):
+    return Journey.objects.filter(
+        arrival_time__lt=before, tickets__isnull=True
+    )
+
+
+def _delete_rows(model, column: str, values: list) -> None:
+    """DELETE without loading the rows or sending signals.
+
+    No post_delete or m2m_changed receiver runs, the caller invalidates
+    whatever they would have (see the module docstring).
+    """
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(column)
+    placeholders = ", ".join(["%s"] * len(values))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {table} WHERE {column} IN ({placeholders})", values
+        )
+
+
+def _batches(queryset, batch_size: int):
+    """Consecutive batches by id, rows of a moved batch are gone"""
+    last_id = 0
+    while batch := list(
+        queryset.filter(id__gt=last_id).order_by("id")[:batch_size]
+    ):
+        last_id = batch[-1].id
+        yield batch
+
+
+def archive_orders(before: datetime, batch_size: int = BATCH_SIZE) -> int:
+    queryset = archivable_orders(before).prefetch_related(
+        "tickets__journey__route__source",
+        "tickets__journey__route__destination",
+        "tickets__journey__train",
+        "tickets__journey__crew",
+    )
+    archived = 0
+    for orders in _batches(queryset, batch_size):
+        ids = [order.id for order in orders]
+        with transaction.atomic():
+            ArchivedOrder.objects.bulk_create(
+                [
+                    ArchivedOrder(
+                        id=order.id,
+                        user_id=order.user_id,
+                        created_at=order.created_at,
+                        payload=ArchivedOrder.compress(
+                            OrderListSerializer(order).data
+                        ),
+                    )
+                    for order in orders
+                ]
+            )
+            _delete_rows(Ticket, "order_id", ids)
+            _delete_rows(Order, "id", ids)
+        response_cache.invalidate()
+        archived += len(orders)
+    return archived
+
+
+def archive_journeys(before: datetime, batch_size: int = BATCH_SIZE) -> int:
+    queryset = archivable_journeys(before).select_related(
+        "route__source", "route__destination", "train"
+    ).prefetch_related("crew")
+    archived = 0
+    for journeys in _batches(queryset, batch_size):
+        ids = [journey.id for journey in journeys]
+        with transaction.atomic():
+            ArchivedJourney.objects.bulk_create(
+                [
+                    ArchivedJourney(
+                        id=journey.id,
+                        departure_time=journey.departure_time,
+                        payload=ArchivedJourney.compress(
+                            JourneyListSerializer(journey).data
+                        ),
+                    )
+                    for journey in journeys
+                ]
+            )
+            _delete_rows(Journey.crew.through, "journey_id", ids)
+            _delete_rows(Journey, "id", ids)
+        response_cache.invalidate()
+        itineraries.invalidate_all()
+        archived += len(journeys)
+    return archived
+
+
+def archive(before: datetime, batch_size: int = BATCH_SIZE) -> dict[str, int]:
+    """Archive orders, then the journeys they leave without tickets"""
+    archived = {
+        "orders": archive_orders(before, batch_size),
+        "journeys": archive_journeys(before, batch_size),
+    }
+    route_graph.invalidate()
+    station_index.invalidate()
+    return archived
@@ -0,0 +1,287 @@
+"""Async implementations of the hottest read endpoints.
+
+These views run natively on the event loop when the project is served
+through ASGI (train_station_service/asgi.py), using Django's async ORM, so
+a slow query doesn't occupy a worker thread. They mirror the responses of
+the corresponding DRF viewsets.
+"""
+import asyncio
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from train_station import events
+from train_station.models import Journey, Station, Ticket
+from train_station.pagination import TrainStationPagination
+from train_station.serializers import (
+    JourneyDetailSerializer,
+    JourneyListSerializer,
+    StationSerializer,
+)
+from train_station.views import JourneyViewSet
+
+
+async def authenticate(request):
+    """Async counterpart of JWTAuthentication, returns user or None"""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+
+    try:
+        raw_token = authentication.get_raw_token(header)
+        if raw_token is None:
+            return None
+        token = authentication.get_validated_token(raw_token)
+        user_id = token[jwt_settings.USER_ID_CLAIM]
+    except (AuthenticationFailed, KeyError):
+        return None
+
+    user_model = get_user_model()
+    try:
+        user = await user_model.objects.aget(
+            **{jwt_settings.USER_ID_FIELD: user_id}
+        )
+    except user_model.DoesNotExist:
+        return None
+
+    return user if user.is_active else None
+
+
+def async_api_view(view):
+    """Allows only authenticated GET requests, like the DRF read endpoints"""
+
+    @require_GET
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await authenticate(request)
+        if user is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=401,
+            )
+        request.user = user
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def not_found() -> JsonResponse:
+    return JsonResponse(
+        {"detail": "No Journey matches the given query."}, status=404
+    )
+
+
+async def paginate(request, queryset, serializer_class) -> JsonResponse:
+    """Async version of TrainStationPagination (page and per_page params)"""
+    pagination = TrainStationPagination
+    try:
+        page = int(request.GET.get("page", 1))
+        per_page = min(
+            int(request.GET.get(
+                pagination.page_size_query_param, pagination.page_size
+            )),
+            pagination.max_page_size,
+        )
+    except ValueError:
+        return JsonResponse({"detail": "Invalid page."}, status=404)
+    if page < 1 or per_page < 1:
+        return JsonResponse({"detail": "Invalid page."}, status=404)
+
+    if not queryset.ordered:
+        queryset = queryset.order_by("pk")
+
+    count = await queryset.acount()
+    offset = (page - 1) * per_page
+    if page > 1 and offset >= count:
+        return JsonResponse({"detail": "Invalid page."}, status=404)
+    objects = [obj async for obj in queryset[offset:offset + per_page]]
+
+    url = request.build_absolute_uri()
+    next_url = previous_url = None
+    if offset + per_page < count:
+        next_url = replace_query_param(url, "page", page + 1)
+    if page == 2:
+        previous_url = remove_query_param(url, "page")
+    elif page > 2:
+        previous_url = replace_query_param(url, "page", page - 1)
+
+    serializer = serializer_class(
+        objects, many=True, context={"request": request}
+    )
+    return JsonResponse({
+        "count": count,
+        "next": next_url,
+        "previous": previous_url,
+        "results": serializer.data,
+    })
+
+
+@async_api_view
+async def journey_list(request):
+    try:
+        queryset = JourneyViewSet.filter_by_params(
+            JourneyViewSet.queryset, request.GET
+        )
+    except ValueError:
+        return JsonResponse({"detail": "Invalid filter value."}, status=400)
+
+    return await paginate(request, queryset, JourneyListSerializer)
+
+
+@async_api_view
+async def journey_detail(request, pk):
+    journey = await (
+        Journey.objects.select_related(
+            "route__source", "route__destination", "train__train_type"
+        )
+        .prefetch_related("crew", "tickets")
+        .filter(pk=pk)
+        .afirst()
+    )
+    if journey is None:
+        return not_found()
+
+    serializer = JourneyDetailSerializer(journey, context={"request": request})
+    return JsonResponse(serializer.data)
+
+
+async def seat_availability(journey: Journey) -> dict:
+    taken_places = [
+        {"cargo": cargo, "seat": seat}
+        async for cargo, seat in Ticket.objects.filter(
+            journey_id=journey.id
+        ).order_by("cargo", "seat").values_list("cargo", "seat")
+    ]
+    capacity = journey.train.cargo_num * journey.train.places_in_cargo
+
+    return {
+        "journey": journey.id,
+        "cargo_num": journey.train.cargo_num,
+        "places_in_cargo": journey.train.places_in_cargo,
+        "capacity": capacity,
+        "tickets_available": capacity - len(taken_places),
+        "taken_places": taken_places,
+    }
+
+
+@async_api_view
+async def journey_seats(request, pk):
+    """Seat availability of a journey without the rest of journey detail"""
+    journey = await (
+        Journey.objects.select_related("train").filter(pk=pk).afirst()
+    )
+    if journey is None:
+        return not_found()
+
+    return JsonResponse(await seat_availability(journey))
+
+
+def format_sse(event_id: int, event: str, data: dict) -> str:
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def seat_event_stream(journey: Journey, last_id: int | None):
+    """Yield seat events of journey as Server-Sent Events.
+
+    Starts with a `snapshot` event unless the client resumes with a
+    Last-Event-ID the backend still has history for, then sends
+    seat_taken/seat_released deltas as the process' feed of the journey
+    (see events.JourneyFeed) receives them.
+    """
+    config = getattr(settings, "SEAT_EVENTS", {})
+    heartbeat_interval = config.get("HEARTBEAT_INTERVAL", 15)
+    backend = events.get_backend()
+
+    # subscribed first, events published during the catch-up are queued
+    with events.subscribe(journey.id) as queue:
+        complete = False
+        pending = []
+        if last_id is not None:
+            pending, complete = await backend.aevents_since(
+                journey.id, last_id
+            )
+        while True:
+            if not complete:
+                # events published while the snapshot is read are replayed
+                # after it
+                last_id = await backend.alast_event_id(journey.id)
+                yield format_sse(
+                    last_id, "snapshot", await seat_availability(journey)
+                )
+                pending = []
+            for event in pending:
+                # the feed can repeat events the catch-up already sent
+                if event.id > last_id:
+                    data = {"cargo": event.cargo, "seat": event.seat}
+                    yield format_sse(event.id, event.type, data)
+                    last_id = event.id
+
+            try:
+                pending = await asyncio.wait_for(
+                    queue.get(), heartbeat_interval
+                )
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                pending, complete = [], True
+                continue
+            if pending == events.RESYNC or pending[0].id > last_id + 1:
+                # missed events, e.g. the feed started after the snapshot
+                pending, complete = await backend.aevents_since(
+                    journey.id, last_id
+                )
+            else:
+                complete = True
+
+
+@async_api_view
+async def journey_seats_stream(request, pk):
+    """Server-Sent Events stream of seat changes, replaces polling.
+
+    The stream never ends, under WSGI it would hold a worker thread for as
+    long as the client stays connected, so it is only served over ASGI.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {
+                "detail": "Seat streams need the ASGI server "
+                "(manage.py serve --asgi), poll the seats endpoint instead."
+            },
+            status=501,
+        )
+
+    journey = await (
+        Journey.objects.select_related("train").filter(pk=pk).afirst()
+    )
+    if journey is None:
+        return not_found()
+
+    last_id = request.headers.get(
+        "Last-Event-ID", request.GET.get("last_event_id")
+    )
+    try:
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        last_id = None
+
+    response = StreamingHttpResponse(
+        seat_event_stream(journey, last_id),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@async_api_view
+async def station_list(request):
+    return await paginate(request, Station.objects.all(), StationSerializer)
@@ -0,0 +1,461 @@
+"""Endpoint benchmarks run by `manage.py benchmark_endpoints`.
+
+Every endpoint is requested through the Django test client against a
+seeded database, recording latency percentiles, SQL queries and response
+size. Results are compared with baselines committed to benchmarks/baselines/.
+"""
+import json
+import statistics
+import time
+import uuid
+from datetime import date
+from itertools import product
+from typing import Callable, NamedTuple
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from rest_framework.throttling import SimpleRateThrottle
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from train_station.models import Journey, Order, Route, Station, Train
+from train_station.synthetic import PASSWORD
+
+SEED = 42
+START_DATE = date(2030, 1, 7)
+SCALES = {
+    "10k": {
+        "stations": 50,
+        "trains": 20,
+        "crews": 40,
+        "days": 7,
+        "users": 1_000,
+        "tickets": 10_000,
+    },
+    "100k": {
+        "stations": 100,
+        "trains": 50,
+        "crews": 100,
+        "days": 14,
+        "users": 10_000,
+        "tickets": 100_000,
+    },
+    "1m": {
+        "stations": 200,
+        "trains": 100,
+        "crews": 200,
+        "days": 30,
+        "users": 100_000,
+        "tickets": 1_000_000,
+    },
+}
+ADMIN_EMAIL = "benchmark-admin@example.com"
+ORDER_SIZES = (1, 2, 5, 10)
+# p95 differences below this are noise, not regressions
+LATENCY_NOISE_MS = 2.0
+
+
+def percentile(values: list[float], percent: int) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(int(len(values) * percent / 100), len(values) - 1)
+    return values[index]
+
+
+class SeatAllocator:
+    """Hands out free seats, journeys with the fewest tickets first"""
+
+    def __init__(self):
+        self.journeys = iter(
+            Journey.objects.select_related("train")
+            .annotate(sold=Count("tickets"))
+            .order_by("sold", "id")
+        )
+        self.seats = iter(())
+        self.journey = None
+
+    def _next_journey(self):
+        self.journey = next(self.journeys)
+        train = self.journey.train
+        taken = set(self.journey.tickets.values_list("cargo", "seat"))
+        self.seats = (
+            seat
+            for seat in product(
+                range(1, train.cargo_num + 1),
+                range(1, train.places_in_cargo + 1),
+            )
+            if seat not in taken
+        )
+
+    def take(self, count: int) -> list[dict]:
+        """`count` free seats of one journey"""
+        while True:
+            if self.journey is None:
+                self._next_journey()
+            seats = []
+            for cargo, seat in self.seats:
+                seats.append(
+                    {"journey": self.journey.id, "cargo": cargo, "seat": seat}
+                )
+                if len(seats) == count:
+                    return seats
+            self.journey = None
+
+
+class BenchmarkContext:
+    """Objects and credentials the endpoint requests refer to"""
+
+    def __init__(self):
+        user_model = get_user_model()
+        order = Order.objects.select_related("user").order_by("id").first()
+        self.user = (
+            order.user if order else user_model.objects.order_by("id").first()
+        )
+        self.admin = user_model.objects.filter(email=ADMIN_EMAIL).first()
+        if self.admin is None:
+            self.admin = user_model.objects.create_superuser(
+                ADMIN_EMAIL, PASSWORD
+            )
+        self.station = Station.objects.order_by("id").first()
+        self.train = Train.objects.order_by("id").first()
+        self.route = Route.objects.order_by("id").first()
+        self.journey = Journey.objects.order_by("id").first()
+        self.ids = ",".join(
+            str(pk)
+            for pk in Journey.objects.order_by("id").values_list(
+                "id", flat=True
+            )[:20]
+        )
+        self.tokens = {
+            "user": str(AccessToken.for_user(self.user)),
+            "admin": str(AccessToken.for_user(self.admin)),
+        }
+        self.refresh = str(RefreshToken.for_user(self.user))
+        self.seats = SeatAllocator()
+        self.run_id = uuid.uuid4().hex[:8]
+
+    def unique(self, prefix: str, i: int) -> str:
+        return f"{prefix} {self.run_id}-{i}"
+
+
+class Endpoint(NamedTuple):
+    name: str
+    method: str
+    # context -> URL
+    url: Callable[[BenchmarkContext], str]
+    # context, iteration -> JSON body
+    data: Callable[[BenchmarkContext, int], dict] | None = None
+    auth: str | None = "user"
+
+
+def _url(name: str, *args, query: str = ""):
+    def build(ctx):
+        values = [getattr(ctx, arg).id for arg in args]
+        url = reverse(name, args=values)
+        return f"{url}?{query.format(ctx=ctx)}" if query else url
+
+    return build
+
+
+def _order(size: int):
+    return lambda ctx, i: {"tickets": ctx.seats.take(size)}
+
+
+ENDPOINTS = [
+    Endpoint("train_types.list", "GET", _url("train_station:traintype-list")),
+    Endpoint(
+        "train_types.create",
+        "POST",
+        _url("train_station:traintype-list"),
+        lambda ctx, i: {"name": ctx.unique("Type", i)},
+        auth="admin",
+    ),
+    Endpoint("crews.list", "GET", _url("train_station:crew-list")),
+    Endpoint(
+        "crews.create",
+        "POST",
+        _url("train_station:crew-list"),
+        lambda ctx, i: {"first_name": "Bench", "last_name": f"Crew {i}"},
+        auth="admin",
+    ),
+    Endpoint("stations.list", "GET", _url("train_station:station-list")),
+    Endpoint(
+        "stations.create",
+        "POST",
+        _url("train_station:station-list"),
+        lambda ctx, i: {"name": ctx.unique("Station", i)},
+        auth="admin",
+    ),
+    Endpoint("trains.list", "GET", _url("train_station:train-list")),
+    Endpoint(
+        "trains.list_filtered",
+        "GET",
+        _url(
+            "train_station:train-list",
+            query="train_type={ctx.train.train_type_id}",
+        ),
+    ),
+    Endpoint(
+        "trains.retrieve", "GET", _url("train_station:train-detail", "train")
+    ),
+    Endpoint("routes.list", "GET", _url("train_station:route-list")),
+    Endpoint(
+        "routes.list_filtered",
+        "GET",
+        _url(
+            "train_station:route-list",
+            query="source={ctx.route.source_id}"
+            "&destination={ctx.route.destination_id}",
+        ),
+    ),
+    Endpoint(
+        "routes.retrieve", "GET", _url("train_station:route-detail", "route")
+    ),
+    Endpoint(
+        "routes.shortest",
+        "GET",
+        _url(
+            "train_station:route-shortest",
+            query="from={ctx.route.source_id}&to={ctx.route.destination_id}",
+        ),
+    ),
+    Endpoint(
+        "routes.distance",
+        "GET",
+        _url(
+            "train_station:route-distance",
+            query="from={ctx.route.source_id}&to={ctx.route.destination_id}",
+        ),
+    ),
+    Endpoint(
+        "stations.reachable",
+        "GET",
+        _url("train_station:station-reachable", "station"),
+    ),
+    Endpoint(
+        "stations.departures",
+        "GET",
+        _url("train_station:station-departures", "station"),
+    ),
+    Endpoint(
+        "stations.arrivals",
+        "GET",
+        _url("train_station:station-arrivals", "station"),
+    ),
+    Endpoint(
+        "stations.nearby",
+        "GET",
+        _url(
+            "train_station:station-nearby",
+            query="lat=50.45&lon=30.52&radius=200",
+        ),
+    ),
+    Endpoint("journeys.list", "GET", _url("train_station:journey-list")),
+    Endpoint(
+        "journeys.list_filtered",
+        "GET",
+        _url("train_station:journey-list", query="route={ctx.route.id}"),
+    ),
+    Endpoint(
+        "journeys.batch",
+        "GET",
+        _url("train_station:journey-list", query="ids={ctx.ids}"),
+    ),
+    Endpoint(
+        "journeys.retrieve",
+        "GET",
+        _url("train_station:journey-detail", "journey"),
+    ),
+    Endpoint(
+        "itineraries.search",
+        "GET",
+        _url(
+            "train_station:itineraries",
+            query="from={ctx.route.source_id}&to={ctx.route.destination_id}"
+            "&date={ctx.journey.departure_time:%Y-%m-%d}",
+        ),
+    ),
+    Endpoint(
+        "async.journeys.list", "GET", _url("train_station:async-journey-list")
+    ),
+    Endpoint(
+        "async.journeys.retrieve",
+        "GET",
+        _url("train_station:async-journey-detail", "journey"),
+    ),
+    Endpoint(
+        "async.journeys.seats",
+        "GET",
+        _url("train_station:async-journey-seats", "journey"),
+    ),
+    Endpoint(
+        "async.stations.list", "GET", _url("train_station:async-station-list")
+    ),
+    Endpoint("orders.list", "GET", _url("train_station:order-list")),
+    *(
+        Endpoint(
+            f"orders.create_{size}",
+            "POST",
+            _url("train_station:order-list"),
+            _order(size),
+        )
+        for size in ORDER_SIZES
+    ),
+    Endpoint(
+        "user.register",
+        "POST",
+        _url("user:create"),
+        lambda ctx, i: {
+            "email": f"bench-{ctx.run_id}-{i}@example.com",
+            "password": PASSWORD,
+        },
+        auth=None,
+    ),
+    Endpoint("user.me", "GET", _url("user:manage")),
+    Endpoint(
+        "user.token",
+        "POST",
+        _url("user:token_obtain_pair"),
+        lambda ctx, i: {"email": ctx.user.email, "password": PASSWORD},
+        auth=None,
+    ),
+    Endpoint(
+        "user.token_refresh",
+        "POST",
+        _url("user:token_refresh"),
+        lambda ctx, i: {"refresh": ctx.refresh},
+        auth=None,
+    ),
+    Endpoint(
+        "user.token_verify",
+        "POST",
+        _url("user:token_verify"),
+        lambda ctx, i: {"token": ctx.tokens["user"]},
+        auth=None,
+    ),
+]
+
+
+def measure(client: Client, ctx: BenchmarkContext, endpoint: Endpoint, i):
+    """Send one request, return latency, queries, bytes and status"""
+    headers = {}
+    if endpoint.auth:
+        headers["Authorization"] = f"Bearer {ctx.tokens[endpoint.auth]}"
+    url = endpoint.url(ctx)
+    data = endpoint.data(ctx, i) if endpoint.data else None
+
+    queries = []
+    with connection.execute_wrapper(
+        lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)
+    ):
+        started = time.perf_counter()
+        if endpoint.method == "GET":
+            response = client.get(url, headers=headers)
+        else:
+            response = client.generic(
+                endpoint.method,
+                url,
+                data=json.dumps(data),
+                content_type="application/json",
+                headers=headers,
+            )
+        elapsed = time.perf_counter() - started
+
+    return elapsed, len(queries), len(response.content), response.status_code
+
+
+def run_benchmarks(
+    iterations: int = 50,
+    warmup: int = 5,
+    endpoints: list[Endpoint] | None = None,
+    log: Callable[[str], None] = lambda message: None,
+) -> dict[str, dict]:
+    client = Client()
+    ctx = BenchmarkContext()
+    results = {}
+    # keep throttling in the measured work, but never reject a request
+    rates = dict.fromkeys(SimpleRateThrottle.THROTTLE_RATES, "1000000/s")
+    with mock.patch.dict(SimpleRateThrottle.THROTTLE_RATES, rates):
+        for endpoint in endpoints or ENDPOINTS:
+            results[endpoint.name] = _run_endpoint(
+                client, ctx, endpoint, iterations, warmup
+            )
+            log(
+                "{name}: p50 {p50_ms} ms, p95 {p95_ms} ms, {queries} "
+                "queries, {bytes} bytes".format(
+                    name=endpoint.name, **results[endpoint.name]
+                )
+            )
+    return results
+
+
+def _run_endpoint(client, ctx, endpoint, iterations, warmup) -> dict:
+    for i in range(warmup):
+        measure(client, ctx, endpoint, -i - 1)
+
+    latencies, queries, sizes, statuses = [], [], [], set()
+    for i in range(iterations):
+        elapsed, count, size, status = measure(client, ctx, endpoint, i)
+        latencies.append(elapsed * 1000)
+        queries.append(count)
+        sizes.append(size)
+        statuses.add(status)
+
+    return {
+        "method": endpoint.method,
+        "status": sorted(statuses),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "queries": max(queries),
+        "bytes": round(statistics.fmean(sizes)),
+    }
+
+
+def compare(
+    report: dict,
+    baseline: dict,
+    latency_tolerance: float = 1.0,
+    bytes_tolerance: float = 0.1,
+) -> list[str]:
+    """Regressions of report against baseline, as readable messages.
+
+    Query counts and statuses must not change for the worse at all. Latency
+    is only compared when both runs used the same database backend. An
+    endpoint missing from the baseline is reported too, it would never be
+    checked otherwise.
+    """
+    compare_latency = report.get("database") == baseline.get("database")
+    regressions = []
+    for name, current in report["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            regressions.append(
+                f"{name}: not in the baseline, run with --update-baseline"
+            )
+            continue
+        if current["status"] != previous["status"]:
+            regressions.append(
+                f"{name}: status {previous['status']} -> {current['status']}"
+            )
+        if current["queries"] > previous["queries"]:
+            regressions.append(
+                f"{name}: {previous['queries']} -> "
+                f"{current['queries']} queries"
+            )
+        if current["bytes"] > previous["bytes"] * (1 + bytes_tolerance):
+            regressions.append(
+                f"{name}: {previous['bytes']} -> {current['bytes']} bytes"
+            )
+        if compare_latency and (
+            current["p95_ms"] > previous["p95_ms"] * (1 + latency_tolerance)
+            and current["p95_ms"] - previous["p95_ms"] > LATENCY_NOISE_MS
+        ):
+            regressions.append(
+                f"{name}: p95 {previous['p95_ms']} -> "
+                f"{current['p95_ms']} ms"
+            )
+    return regressions
@@ -0,0 +1,84 @@
+import json
+from typing import IO, Iterator
+
+from django.core.management.color import no_style
+from django.db import connections, DEFAULT_DB_ALIAS
+
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_json_array(fp: IO[str], chunk_size: int = CHUNK_SIZE) -> Iterator:
+    """Yield items of a top-level JSON array without loading the whole file"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n":
+            position += 1
+
+        if position == len(buffer):
+            chunk = fp.read(chunk_size)
+            if not chunk:
+                raise ValueError("Unexpected end of JSON array")
+            buffer, position = chunk, 0
+            continue
+
+        char = buffer[position]
+        if not started:
+            if char != "[":
+                raise ValueError("Fixture must contain a JSON array")
+            started = True
+            position += 1
+            continue
+        if char == "]":
+            return
+        if char == ",":
+            position += 1
+            continue
+
+        try:
+            item, position = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            chunk = fp.read(chunk_size)
+            if not chunk:
+                raise
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+
+        yield item
+
+
+def sort_models_by_dependencies(models: list) -> list:
+    """Order models so that every model comes after models it references"""
+    pending = {model: set() for model in models}
+    for model in models:
+        for field in model._meta.concrete_fields:
+            related = field.related_model
+            if related and related is not model and related in pending:
+                pending[model].add(related)
+
+    ordered = []
+    while pending:
+        ready = [model for model, deps in pending.items() if not deps]
+        if not ready:
+            # Circular references: constraint checks are deferred anyway
+            ready = list(pending)
+        for model in ready:
+            ordered.append(model)
+            del pending[model]
+        for deps in pending.values():
+            deps.difference_update(ready)
+
+    return ordered
+
+
+def reset_sequences(models: list, using: str = DEFAULT_DB_ALIAS) -> None:
+    """Move primary key sequences past the ids inserted explicitly"""
+    connection = connections[using]
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
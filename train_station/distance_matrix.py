@@ -0,0 +1,244 @@
+"""Shortest route distance between every pair of stations.
+
+The matrix is stored in a file: a header, the sorted ids of the `n`
+stations that have routes (int64) and `n * n` distances (int32, row by
+row, UNREACHABLE where there is no path), in native byte order. Web
+processes map the file read-only and read a single value per lookup, the
+matrix is never loaded in memory. A new matrix is written next to the old
+one and renamed over it, so readers always see a complete file and switch
+to the new one on their next lookup.
+
+The matrix is computed by the `update_distance_matrix` job, enqueued
+whenever a route changes. A new route is relaxed into the current matrix
+in O(n^2); anything else, such as a route that was changed or deleted,
+runs Dijkstra from every station again.
+"""
+import fcntl
+import mmap
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.models import Min
+
+from jobs.models import Job
+from jobs.queue import enqueue, task_path
+from train_station.models import Route
+from train_station.route_graph import RouteGraph
+
+MAGIC = b"DMX1"
+# magic, padding, station count
+HEADER = struct.Struct("=4s4xq")
+UNREACHABLE = -1
+
+
+def get_config() -> dict:
+    return {
+        "PATH": os.path.join(settings.BASE_DIR, "distance-matrix.bin"),
+        **getattr(settings, "DISTANCE_MATRIX", {}),
+    }
+
+
+class DistanceMatrix:
+    def __init__(self, buffer):
+        """`buffer` holds a matrix file, usually a read-only mmap"""
+        magic, count = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError("Not a distance matrix file")
+        view = memoryview(buffer)
+        start = HEADER.size
+        end = start + 8 * count
+        self.station_ids = view[start:end].cast("q")
+        self.distances = view[end:end + 4 * count * count].cast("i")
+
+    def __len__(self):
+        return len(self.station_ids)
+
+    def position(self, station_id: int) -> int:
+        """Position of a station, KeyError if it is not in the matrix"""
+        position = bisect_left(self.station_ids, station_id)
+        if (
+            position == len(self.station_ids)
+            or self.station_ids[position] != station_id
+        ):
+            raise KeyError(station_id)
+        return position
+
+    def __contains__(self, station_id: int) -> bool:
+        try:
+            self.position(station_id)
+        except KeyError:
+            return False
+        return True
+
+    def row(self, position: int) -> memoryview:
+        count = len(self)
+        return self.distances[position * count:(position + 1) * count]
+
+    def distance(self, source_id: int, target_id: int) -> int | None:
+        """Shortest distance between two stations, None if there is no path"""
+        distance = self.row(self.position(source_id))[
+            self.position(target_id)
+        ]
+        return None if distance == UNREACHABLE else distance
+
+
+def open_matrix(path: str) -> DistanceMatrix | None:
+    try:
+        with open(path, "rb") as fp:
+            buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return None
+    return DistanceMatrix(buffer)
+
+
+def write_matrix(path: str, station_ids, rows) -> None:
+    """Write `rows` (int32 arrays) over the file at `path` atomically"""
+    station_ids = array("q", station_ids)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as fp:
+            fp.write(HEADER.pack(MAGIC, len(station_ids)))
+            station_ids.tofile(fp)
+            for row in rows:
+                row.tofile(fp)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def route_network() -> RouteGraph:
+    """Graph of the stations that have routes, the others have no path"""
+    routes = list(
+        Route.objects.values_list("source_id", "destination_id", "distance")
+    )
+    stations = {station for route in routes for station in route[:2]}
+    return RouteGraph(stations, routes)
+
+
+def shortest_distances(graph: RouteGraph):
+    """Rows of distances from each station of `graph`, in position order"""
+    for source in range(len(graph)):
+        distances, _ = graph.dijkstra(source)
+        row = array("i", [UNREACHABLE]) * len(graph)
+        for position, distance in distances.items():
+            row[position] = distance
+        yield row
+
+
+def relaxed_distances(
+    matrix: DistanceMatrix, source: int, target: int, distance: int
+):
+    """Rows of `matrix` with a route from position `source` to `target`.
+
+    Only valid if the route is new or shorter than before: every pair
+    either keeps its distance or now goes through the route.
+    """
+    from_target = [
+        (position, length)
+        for position, length in enumerate(matrix.row(target))
+        if length != UNREACHABLE
+    ]
+    for position in range(len(matrix)):
+        row = array("i", matrix.row(position))
+        to_source = row[source]
+        if to_source != UNREACHABLE:
+            through = to_source + distance
+            for other, length in from_target:
+                current = row[other]
+                if current == UNREACHABLE or through + length < current:
+                    row[other] = through + length
+        yield row
+
+
+@contextmanager
+def _locked(path: str):
+    """One job updates the matrix at a time"""
+    with open(f"{path}.lock", "w") as fp:
+        fcntl.flock(fp, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fp, fcntl.LOCK_UN)
+
+
+def update_distance_matrix(
+    source_id: int | None = None, destination_id: int | None = None
+) -> None:
+    """Relax the matrix after a route between two stations was added,
+    rebuild it after any other change"""
+    path = get_config()["PATH"]
+    with _locked(path):
+        matrix = open_matrix(path)
+        if (
+            matrix is not None
+            and source_id is not None
+            and source_id in matrix
+            and destination_id in matrix
+        ):
+            direct = Route.objects.filter(
+                source_id=source_id, destination_id=destination_id
+            ).aggregate(distance=Min("distance"))["distance"]
+            if direct is not None:
+                current = matrix.distance(source_id, destination_id)
+                if current is None or direct < current:
+                    write_matrix(
+                        path,
+                        matrix.station_ids,
+                        relaxed_distances(
+                            matrix,
+                            matrix.position(source_id),
+                            matrix.position(destination_id),
+                            direct,
+                        ),
+                    )
+                return
+
+        graph = route_network()
+        write_matrix(path, graph.station_ids, shortest_distances(graph))
+
+
+def invalidate(
+    source_id: int | None = None, destination_id: int | None = None
+) -> None:
+    """Update the matrix in the background, see update_distance_matrix()"""
+    if source_id is not None:
+        enqueue(update_distance_matrix, [source_id, destination_id])
+    # a rebuild that has not started yet will see this change too
+    elif not Job.objects.filter(
+        task=task_path(update_distance_matrix), args=[], status=Job.QUEUED
+    ).exists():
+        enqueue(update_distance_matrix)
+
+
+_opened = None
+_opened_lock = threading.Lock()
+
+
+def get_matrix() -> DistanceMatrix | None:
+    """The current matrix, None until the job has computed one"""
+    global _opened
+    path = get_config()["PATH"]
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = (path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    opened = _opened
+    if opened is not None and opened[0] == key:
+        return opened[1]
+
+    with _opened_lock:
+        if _opened is None or _opened[0] != key:
+            matrix = open_matrix(path)
+            if matrix is None:
+                return None
+            _opened = (key, matrix)
+        return _opened[1]
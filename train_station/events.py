@@ -0,0 +1,290 @@
+import asyncio
+import threading
+import weakref
+from collections import defaultdict, deque
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+from train_station_service.metrics import record_cache_lookup
+
+SEAT_TAKEN = "seat_taken"
+SEAT_RELEASED = "seat_released"
+
+
+class SeatEvent(NamedTuple):
+    id: int
+    type: str
+    cargo: int
+    seat: int
+
+
+class BaseSeatEventBackend:
+    """Stores seat events per journey so subscribers can catch up.
+
+    Event ids grow by one per journey. `events_since` returns the events
+    after `last_id` and whether that history is complete; when it is not
+    (buffer overflow, restarted process) subscribers have to resync from
+    a snapshot.
+    """
+
+    def __init__(self, buffer_size: int = 1000, **options):
+        self.buffer_size = buffer_size
+
+    def publish(
+        self, journey_id: int, event_type: str, cargo: int, seat: int
+    ) -> int:
+        raise NotImplementedError
+
+    def last_event_id(self, journey_id: int) -> int:
+        raise NotImplementedError
+
+    def events_since(
+        self, journey_id: int, last_id: int
+    ) -> tuple[list[SeatEvent], bool]:
+        raise NotImplementedError
+
+    async def alast_event_id(self, journey_id: int) -> int:
+        return await sync_to_async(
+            self.last_event_id, thread_sensitive=False
+        )(journey_id)
+
+    async def aevents_since(
+        self, journey_id: int, last_id: int
+    ) -> tuple[list[SeatEvent], bool]:
+        return await sync_to_async(
+            self.events_since, thread_sensitive=False
+        )(journey_id, last_id)
+
+
+class InMemorySeatEventBackend(BaseSeatEventBackend):
+    """Per-process ring buffers, for a single process deployment"""
+
+    def __init__(self, buffer_size: int = 1000, **options):
+        super().__init__(buffer_size, **options)
+        self._lock = threading.Lock()
+        self._events = defaultdict(lambda: deque(maxlen=self.buffer_size))
+        self._last_ids = defaultdict(int)
+
+    def publish(self, journey_id, event_type, cargo, seat):
+        with self._lock:
+            self._last_ids[journey_id] += 1
+            event = SeatEvent(
+                self._last_ids[journey_id], event_type, cargo, seat
+            )
+            self._events[journey_id].append(event)
+        return event.id
+
+    def last_event_id(self, journey_id):
+        return self._last_ids.get(journey_id, 0)
+
+    def events_since(self, journey_id, last_id):
+        with self._lock:
+            current = self._last_ids.get(journey_id, 0)
+            if last_id == current:
+                return [], True
+            events = list(self._events.get(journey_id, ()))
+
+        complete = last_id <= current and (
+            not events or events[0].id <= last_id + 1
+        )
+        return [event for event in events if event.id > last_id], complete
+
+    # Reads never block, skip the thread hop
+    async def alast_event_id(self, journey_id):
+        return self.last_event_id(journey_id)
+
+    async def aevents_since(self, journey_id, last_id):
+        return self.events_since(journey_id, last_id)
+
+
+class CacheSeatEventBackend(BaseSeatEventBackend):
+    """Keeps events in a Django cache shared by all worker processes"""
+
+    def __init__(
+        self,
+        buffer_size: int = 1000,
+        cache_alias: str = "default",
+        timeout: int = 3600,
+        **options,
+    ):
+        super().__init__(buffer_size, **options)
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    @staticmethod
+    def _last_id_key(journey_id):
+        return f"seat-events:{journey_id}:last"
+
+    @staticmethod
+    def _event_key(journey_id, event_id):
+        return f"seat-events:{journey_id}:{event_id}"
+
+    def publish(self, journey_id, event_type, cargo, seat):
+        key = self._last_id_key(journey_id)
+        self.cache.add(key, 0, timeout=None)
+        event_id = self.cache.incr(key)
+        self.cache.set(
+            self._event_key(journey_id, event_id),
+            (event_type, cargo, seat),
+            timeout=self.timeout,
+        )
+        return event_id
+
+    def last_event_id(self, journey_id):
+        return self.cache.get(self._last_id_key(journey_id), 0)
+
+    def events_since(self, journey_id, last_id):
+        current = self.last_event_id(journey_id)
+        if last_id == current:
+            return [], True
+        if last_id > current or current - last_id > self.buffer_size:
+            last_id, complete = max(current - self.buffer_size, 0), False
+        else:
+            complete = True
+
+        keys = {
+            self._event_key(journey_id, event_id): event_id
+            for event_id in range(last_id + 1, current + 1)
+        }
+        found = self.cache.get_many(keys)
+        record_cache_lookup(
+            "seat_events", hits=len(found), misses=len(keys) - len(found)
+        )
+        events = [
+            SeatEvent(keys[key], *found[key]) for key in keys if key in found
+        ]
+        return events, complete and len(events) == len(keys)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend() -> BaseSeatEventBackend:
+    """Return the backend configured in settings.SEAT_EVENTS"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                config = getattr(settings, "SEAT_EVENTS", {})
+                backend_class = import_string(
+                    config.get(
+                        "BACKEND",
+                        "train_station.events.InMemorySeatEventBackend",
+                    )
+                )
+                _backend = backend_class(**config.get("OPTIONS", {}))
+    return _backend
+
+
+def reset_backend() -> None:
+    global _backend
+    _backend = None
+
+
+def publish(journey_id: int, event_type: str, cargo: int, seat: int) -> int:
+    return get_backend().publish(journey_id, event_type, cargo, seat)
+
+
+# Put in subscriber queues instead of events the subscriber has to fetch
+# from the backend itself (lost history, or a queue that overflowed)
+RESYNC = "resync"
+
+
+class JourneyFeed:
+    """Fans the events of a journey out to this process' subscribers.
+
+    One task polls the backend every `poll_interval` and puts the new
+    events in the queue of every subscriber, so the backend is polled once
+    per journey and process however many clients are connected. The task
+    stops when the last subscriber leaves.
+    """
+
+    def __init__(self, journey_id: int, poll_interval: float, maxsize: int):
+        self.journey_id = journey_id
+        self.poll_interval = poll_interval
+        self.maxsize = maxsize
+        self.queues = set()
+        self.task = None
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.maxsize)
+        self.queues.add(queue)
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.queues.discard(queue)
+        if not self.queues and self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def broadcast(self, item) -> None:
+        for queue in self.queues:
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                # a client that does not keep up resyncs from the backend
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+
+    async def run(self) -> None:
+        backend = get_backend()
+        last_id = await backend.alast_event_id(self.journey_id)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            found, complete = await backend.aevents_since(
+                self.journey_id, last_id
+            )
+            if not complete:
+                last_id = await backend.alast_event_id(self.journey_id)
+                self.broadcast(RESYNC)
+            elif found:
+                last_id = found[-1].id
+                self.broadcast(found)
+
+
+# event loop -> {journey id: feed}, tasks belong to the loop they run on
+_feeds = weakref.WeakKeyDictionary()
+
+
+class Subscription:
+    """Queue of a journey's new events (lists of events, or RESYNC) while
+    the context is entered"""
+
+    def __init__(self, journey_id: int):
+        self.journey_id = journey_id
+
+    def __enter__(self) -> asyncio.Queue:
+        config = getattr(settings, "SEAT_EVENTS", {})
+        self.feeds = _feeds.setdefault(asyncio.get_running_loop(), {})
+        self.feed = self.feeds.get(self.journey_id)
+        if self.feed is None:
+            self.feed = self.feeds[self.journey_id] = JourneyFeed(
+                self.journey_id,
+                config.get("POLL_INTERVAL", 0.5),
+                config.get("QUEUE_SIZE", 100),
+            )
+        self.queue = self.feed.subscribe()
+        return self.queue
+
+    def __exit__(self, *exc_info) -> None:
+        self.feed.unsubscribe(self.queue)
+        if not self.feed.queues and (
+            self.feeds.get(self.journey_id) is self.feed
+        ):
+            del self.feeds[self.journey_id]
+
+
+def subscribe(journey_id: int) -> Subscription:
+    return Subscription(journey_id)
@@ -0,0 +1,179 @@
+"""Multi-hop itinerary search with the Connection Scan Algorithm.
+
+Every journey is a connection from its route's source to its destination.
+The timetable of a day (journeys departing on it) is a process-level
+snapshot of arrays sorted by departure time, rebuilt when a journey of
+that day changes. A search scans the connections of the travel date and
+the following day once, in departure order, keeping the earliest arrival
+at every station; k alternatives are found by searching again for
+departures after the first train of the previous result.
+"""
+from array import array
+from bisect import bisect_left
+from datetime import date, datetime, time, timedelta
+from itertools import chain
+
+from django.conf import settings
+from django.utils import timezone
+
+from train_station.models import Journey
+from train_station.snapshots import Snapshot
+
+INFINITY = 2**62
+
+
+def get_config() -> dict:
+    return {
+        "MIN_TRANSFER_MINUTES": 10,
+        "DEFAULT_RESULTS": 3,
+        "MAX_RESULTS": 10,
+        **getattr(settings, "ITINERARIES", {}),
+    }
+
+
+class Timetable:
+    """Connections departing on one day, sorted by departure"""
+
+    def __init__(self, rows):
+        self.departures = array("q")
+        self.arrivals = array("q")
+        self.sources = array("q")
+        self.destinations = array("q")
+        self.trains = array("q")
+        self.journeys = array("q")
+        for journey_id, source, destination, train, departure, arrival in (
+            rows
+        ):
+            self.journeys.append(journey_id)
+            self.sources.append(source)
+            self.destinations.append(destination)
+            self.trains.append(train)
+            self.departures.append(int(departure.timestamp()))
+            self.arrivals.append(int(arrival.timestamp()))
+
+    def __len__(self):
+        return len(self.journeys)
+
+    def connections(self, start: int):
+        """Indices of connections departing at or after `start`"""
+        return range(bisect_left(self.departures, start), len(self))
+
+
+def _day_bounds(day: date) -> tuple[datetime, datetime]:
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def build_timetable(day: date) -> Timetable:
+    start, end = _day_bounds(day)
+    return Timetable(
+        Journey.objects.filter(
+            departure_time__gte=start, departure_time__lt=end
+        )
+        .order_by("departure_time", "id")
+        .values_list(
+            "id",
+            "route__source_id",
+            "route__destination_id",
+            "train_id",
+            "departure_time",
+            "arrival_time",
+        )
+    )
+
+
+timetables = Snapshot("timetable", build_timetable)
+
+
+def invalidate_day(departure: datetime | str) -> None:
+    # instances created with a string keep it until they are reloaded
+    departure = Journey._meta.get_field("departure_time").to_python(departure)
+    if timezone.is_aware(departure):
+        departure = timezone.localtime(departure)
+    timetables.invalidate(departure.date())
+
+
+def invalidate_all() -> None:
+    timetables.invalidate()
+
+
+def _scan(days: list[Timetable], start: int):
+    """(timetable, index) of every connection from `start` on, in order"""
+    return chain.from_iterable(
+        ((timetable, index) for index in timetable.connections(start))
+        for timetable in days
+    )
+
+
+def earliest_arrival(
+    days: list[Timetable],
+    origin: int,
+    target: int,
+    start: int,
+    transfer: int,
+) -> list[tuple[Timetable, int]]:
+    """Connections of the earliest arriving itinerary, empty if none"""
+    arrival = {origin: start}
+    # connection each station was reached with
+    reached_by = {}
+    for timetable, index in _scan(days, start):
+        departure = timetable.departures[index]
+        if departure > arrival.get(target, INFINITY):
+            break
+        source = timetable.sources[index]
+        if source not in arrival:
+            continue
+        ready = arrival[source]
+        previous = reached_by.get(source)
+        # staying on the same train needs no transfer time
+        if previous is not None and (
+            previous[0].trains[previous[1]] != timetable.trains[index]
+        ):
+            ready += transfer
+        if departure < ready:
+            continue
+        destination = timetable.destinations[index]
+        if timetable.arrivals[index] < arrival.get(destination, INFINITY):
+            arrival[destination] = timetable.arrivals[index]
+            reached_by[destination] = (timetable, index)
+
+    legs = []
+    station = target
+    while station != origin and station in reached_by:
+        timetable, index = reached_by[station]
+        legs.append((timetable, index))
+        station = timetable.sources[index]
+    if station != origin:
+        return []
+    return legs[::-1]
+
+
+def search(
+    origin: int,
+    target: int,
+    day: date,
+    after: time | None = None,
+    results: int | None = None,
+) -> list[list[int]]:
+    """Journey ids of up to `results` itineraries, earliest first"""
+    config = get_config()
+    results = results or config["DEFAULT_RESULTS"]
+    transfer = config["MIN_TRANSFER_MINUTES"] * 60
+    start = int(
+        timezone.make_aware(
+            datetime.combine(day, after or time.min)
+        ).timestamp()
+    )
+    days = [timetables.get(day), timetables.get(day + timedelta(days=1))]
+
+    itineraries = []
+    while len(itineraries) < results:
+        legs = earliest_arrival(days, origin, target, start, transfer)
+        if not legs:
+            break
+        itineraries.append(
+            [timetable.journeys[index] for timetable, index in legs]
+        )
+        first, index = legs[0]
+        start = first.departures[index] + 1
+    return itineraries
@@ -0,0 +1,60 @@
+from datetime import date, datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from train_station.archive import (
+    archivable_journeys,
+    archivable_orders,
+    archive,
+    BATCH_SIZE,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move orders whose journeys all arrived before --before, and the "
+        "journeys left without tickets, to compressed archive tables. "
+        "Archived orders stay readable at /orders/archived/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--before",
+            type=date.fromisoformat,
+            required=True,
+            help="Archive journeys that arrived before this date (YYYY-MM-DD)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Rows moved per transaction",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count what would be archived",
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.make_aware(
+            datetime.combine(options["before"], time.min)
+        )
+        if before > timezone.now():
+            raise CommandError("--before must not be in the future")
+
+        if options["dry_run"]:
+            self.stdout.write(
+                f"Would archive {archivable_orders(before).count()} orders "
+                f"and at least {archivable_journeys(before).count()} journeys"
+            )
+            return
+
+        archived = archive(before, batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {archived['orders']} orders "
+                f"and {archived['journeys']} journeys"
+            )
+        )
@@ -0,0 +1,187 @@
+import asyncio
+import json
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from train_station.benchmarks import percentile
+
+
+async def _read_response(reader) -> tuple[int, bool]:
+    """Read one HTTP response, return status code and keep-alive flag"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed by server")
+    status = int(status_line.split()[1])
+    keep_alive = status_line.startswith(b"HTTP/1.1")
+
+    length = None
+    chunked = False
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name = name.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "transfer-encoding" and "chunked" in value.lower():
+            chunked = True
+        elif name == "connection":
+            keep_alive = value.strip().lower() == "keep-alive"
+
+    if chunked:
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif length is not None:
+        await reader.readexactly(length)
+    else:
+        await reader.read()
+        keep_alive = False
+
+    return status, keep_alive
+
+
+async def _client(url, headers: str, requests: int, latencies, errors):
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path += f"?{parts.query}"
+    request = (
+        f"GET {path} HTTP/1.1\r\n"
+        f"Host: {parts.netloc}\r\n"
+        f"{headers}"
+        "Connection: keep-alive\r\n\r\n"
+    ).encode()
+
+    reader = writer = None
+    for _ in range(requests):
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(
+                    parts.hostname, parts.port or 80
+                )
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await _read_response(reader)
+        except (OSError, ConnectionError, ValueError, IndexError,
+                asyncio.IncompleteReadError):
+            errors.append("connection")
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+        latencies.append(time.perf_counter() - started)
+        if status >= 400:
+            errors.append(str(status))
+        if not keep_alive:
+            writer.close()
+            reader = writer = None
+
+    if writer is not None:
+        writer.close()
+
+
+async def run_benchmark(
+    url: str, clients: int, requests: int, token: str | None
+) -> dict:
+    headers = f"Authorization: Bearer {token}\r\n" if token else ""
+    latencies = []
+    errors = []
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(
+            _client(url, headers, requests, latencies, errors)
+            for _ in range(clients)
+        )
+    )
+    elapsed = time.perf_counter() - started
+
+    return {
+        "url": url,
+        "clients": clients,
+        "requests": clients * requests,
+        "errors": len(errors),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(
+            statistics.fmean(latencies) * 1000 if latencies else 0, 2
+        ),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare running servers (e.g. WSGI with sync viewsets and ASGI "
+        "with async views) under many concurrent keep-alive clients."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--target",
+            action="append",
+            required=True,
+            metavar="NAME=URL",
+            help=(
+                "Endpoint to benchmark, may be repeated (ex. "
+                "--target wsgi=http://127.0.0.1:8000/api/train_station/"
+                "journeys/ --target asgi=http://127.0.0.1:8001/api/"
+                "train_station/async/journeys/)"
+            ),
+        )
+        parser.add_argument("--clients", type=int, default=500)
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=20,
+            help="Requests sent by each client",
+        )
+        parser.add_argument(
+            "--email",
+            help="Authenticate requests with an access token of this user",
+        )
+        parser.add_argument("--output", help="Write results to a JSON file")
+
+    def handle(self, *args, **options):
+        token = None
+        if options["email"]:
+            try:
+                user = get_user_model().objects.get(email=options["email"])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"User {options['email']} does not exist")
+            token = str(AccessToken.for_user(user))
+
+        results = {}
+        for target in options["target"]:
+            name, _, url = target.partition("=")
+            if not url:
+                raise CommandError(f"Target must be NAME=URL, got {target}")
+            self.stdout.write(
+                f"{name}: {options['clients']} clients x "
+                f"{options['requests']} requests -> {url}"
+            )
+            results[name] = asyncio.run(
+                run_benchmark(
+                    url, options["clients"], options["requests"], token
+                )
+            )
+            self.stdout.write(
+                "  {throughput_rps} req/s, p50 {p50_ms} ms, p95 {p95_ms} ms, "
+                "p99 {p99_ms} ms, {errors} errors".format(**results[name])
+            )
+
+        if options["output"]:
+            with open(options["output"], "w") as fp:
+                json.dump(results, fp, indent=2)
@@ -0,0 +1,160 @@
+import json
+import os
+import platform
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.utils import timezone
+
+from train_station.benchmarks import (
+    ENDPOINTS,
+    SCALES,
+    SEED,
+    START_DATE,
+    compare,
+    run_benchmarks,
+)
+from train_station.models import Ticket
+from train_station.synthetic import generate_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure p50/p95 latency, SQL queries and response size of every "
+        "API endpoint against a seeded database of the given scale and "
+        "compare them with the committed baseline."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", choices=SCALES, default="10k")
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            help="Only benchmark endpoints with this name, may be repeated",
+        )
+        parser.add_argument("--output", help="Write results to a JSON file")
+        parser.add_argument(
+            "--baseline-dir",
+            default=os.path.join(settings.BASE_DIR, "benchmarks", "baselines"),
+        )
+        parser.add_argument(
+            "--update-baseline",
+            action="store_true",
+            help="Store the results as the new baseline of this scale",
+        )
+        parser.add_argument(
+            "--latency-tolerance",
+            type=float,
+            default=1.0,
+            help="Allowed relative p95 increase (1.0 = twice as slow)",
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Keep the seeded benchmark database for the next run",
+        )
+
+    def handle(self, *args, **options):
+        if settings.DEBUG:
+            raise CommandError("Benchmarks must run with DEBUG=False")
+        endpoints = ENDPOINTS
+        if options["endpoint"]:
+            endpoints = [
+                e for e in ENDPOINTS if e.name in options["endpoint"]
+            ]
+            if not endpoints:
+                raise CommandError("No endpoint matches --endpoint")
+
+        scale = options["scale"]
+        connection.settings_dict.setdefault("TEST", {})
+        connection.settings_dict["TEST"]["NAME"] = self._database_name(scale)
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options["keepdb"]
+        )
+        try:
+            if not Ticket.objects.exists():
+                self.stdout.write(f"Seeding the {scale} dataset...")
+                generate_dataset(
+                    **SCALES[scale],
+                    seed=SEED,
+                    start_date=START_DATE,
+                    log=self.stdout.write,
+                )
+            # measure the views, not the response cache
+            with override_settings(
+                REQUEST_TIMING={"ENABLED": False},
+                RESPONSE_CACHE={"ENABLED": False},
+            ):
+                results = run_benchmarks(
+                    options["iterations"],
+                    options["warmup"],
+                    endpoints,
+                    log=self.stdout.write,
+                )
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options["keepdb"]
+            )
+            teardown_test_environment()
+
+        report = {
+            "scale": scale,
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "iterations": options["iterations"],
+            "created_at": timezone.now().isoformat(timespec="seconds"),
+            "results": results,
+        }
+        if options["output"]:
+            self._write(options["output"], report)
+
+        baseline_path = os.path.join(options["baseline_dir"], f"{scale}.json")
+        if options["update_baseline"]:
+            os.makedirs(options["baseline_dir"], exist_ok=True)
+            self._write(baseline_path, report)
+            self.stdout.write(
+                self.style.SUCCESS(f"Baseline written to {baseline_path}")
+            )
+            return
+        if not os.path.exists(baseline_path):
+            self.stdout.write(f"No baseline at {baseline_path}, skipping")
+            return
+
+        with open(baseline_path) as fp:
+            baseline = json.load(fp)
+        if baseline.get("database") != report["database"]:
+            self.stdout.write(
+                f"Baseline was measured on {baseline.get('database')}, "
+                "comparing queries and bytes only"
+            )
+        regressions = compare(
+            report, baseline, latency_tolerance=options["latency_tolerance"]
+        )
+        if regressions:
+            raise CommandError(
+                f"{len(regressions)} regression(s) against {baseline_path}:\n"
+                + "\n".join(f"  {line}" for line in regressions)
+            )
+        self.stdout.write(self.style.SUCCESS("No regressions"))
+
+    @staticmethod
+    def _database_name(scale: str) -> str:
+        if connection.vendor == "sqlite":
+            name = f"benchmark_{scale}.sqlite3"
+            return os.path.join(settings.BASE_DIR, name)
+        return f"benchmark_{scale}"
+
+    @staticmethod
+    def _write(path: str, report: dict) -> None:
+        with open(path, "w") as fp:
+            json.dump(report, fp, indent=2)
+            fp.write("\n")
@@ -0,0 +1,180 @@
+import gzip
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.core import serializers
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.base import DeserializationError
+from django.db import (
+    connections,
+    transaction,
+    DEFAULT_DB_ALIAS,
+    IntegrityError,
+)
+
+from train_station import signals
+from train_station.bulk import (
+    iter_json_array,
+    reset_sequences,
+    sort_models_by_dependencies,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a JSON fixture with bulk INSERTs instead of saving every "
+        "object. The file is streamed, objects are grouped by model and "
+        "inserted in dependency order, then primary key sequences are reset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("fixture", help="Path to .json or .json.gz file")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Rows per INSERT statement (default: 2000)",
+        )
+        parser.add_argument(
+            "--buffer-size",
+            type=int,
+            default=50000,
+            help=(
+                "How many objects to keep in memory before flushing them "
+                "to the database (default: 50000)"
+            ),
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database to load the fixture into",
+        )
+
+    def handle(self, *args, **options):
+        self.using = options["database"]
+        self.batch_size = options["batch_size"]
+        self.buffer_size = options["buffer_size"]
+        self.buffers = defaultdict(list)
+        self.buffered = 0
+        self.counts = defaultdict(int)
+        self.started_at = time.perf_counter()
+
+        fixture = options["fixture"]
+        opener = gzip.open if fixture.endswith(".gz") else open
+        connection = connections[self.using]
+
+        try:
+            with opener(fixture, "rt", encoding="utf-8") as fp:
+                with transaction.atomic(using=self.using):
+                    with connection.constraint_checks_disabled():
+                        self._load(fp)
+                    table_names = [
+                        model._meta.db_table for model in self.counts
+                    ]
+                    connection.check_constraints(table_names=table_names)
+                    reset_sequences(list(self.counts), using=self.using)
+        except (
+            OSError, ValueError, DeserializationError, IntegrityError
+        ) as e:
+            raise CommandError(f"Could not load {fixture}: {e}")
+
+        signals.invalidate_all()
+        self._report()
+
+    def _load(self, fp):
+        objects = serializers.deserialize(
+            "python",
+            iter_json_array(fp),
+            using=self.using,
+            ignorenonexistent=True,
+        )
+        for deserialized in objects:
+            obj = deserialized.object
+            self._buffer(obj)
+            for field_name, related_ids in deserialized.m2m_data.items():
+                through = obj._meta.get_field(field_name).remote_field.through
+                source, target = self._through_fields(through, type(obj))
+                for related_id in related_ids:
+                    self._buffer(
+                        through(
+                            **{source: obj.pk, target: related_id}
+                        )
+                    )
+            if self.buffered >= self.buffer_size:
+                self._flush()
+        self._flush()
+
+    @staticmethod
+    def _through_fields(through, model) -> tuple[str, str]:
+        source = target = None
+        for field in through._meta.concrete_fields:
+            if not field.related_model:
+                continue
+            if field.related_model is model and source is None:
+                source = field.attname
+            else:
+                target = field.attname
+        return source, target
+
+    def _buffer(self, obj) -> None:
+        self.buffers[type(obj)].append(obj)
+        self.buffered += 1
+
+    def _flush(self) -> None:
+        for model in sort_models_by_dependencies(list(self.buffers)):
+            objs = self.buffers.pop(model)
+            self._bulk_create(model, objs)
+            self.counts[model] += len(objs)
+        self.buffered = 0
+
+        total = sum(self.counts.values())
+        elapsed = time.perf_counter() - self.started_at
+        self.stdout.write(
+            f"Loaded {total} objects "
+            f"({total / elapsed if elapsed else 0:.0f} objects/s)"
+        )
+
+    def _bulk_create(self, model, objs: list) -> None:
+        # bulk_create() overwrites auto_now/auto_now_add fields with the
+        # current time. Insert the dumped values as they are, and stamp
+        # only the objects that have none, like a regular save would.
+        auto_fields = [
+            field for field in model._meta.concrete_fields
+            if getattr(field, "auto_now", False)
+            or getattr(field, "auto_now_add", False)
+        ]
+        for obj in objs:
+            for field in auto_fields:
+                if getattr(obj, field.attname) is None:
+                    field.pre_save(obj, add=True)
+
+        with self._auto_now_disabled(auto_fields):
+            model._default_manager.using(self.using).bulk_create(
+                objs, batch_size=self.batch_size
+            )
+
+    @staticmethod
+    @contextmanager
+    def _auto_now_disabled(fields: list):
+        flags = [(field.auto_now, field.auto_now_add) for field in fields]
+        for field in fields:
+            field.auto_now = field.auto_now_add = False
+        try:
+            yield
+        finally:
+            for field, (auto_now, auto_now_add) in zip(fields, flags):
+                field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+    def _report(self) -> None:
+        elapsed = time.perf_counter() - self.started_at
+        total = sum(self.counts.values())
+
+        for model, count in self.counts.items():
+            self.stdout.write(f"  {model._meta.label}: {count}")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Installed {total} objects in {elapsed:.2f}s "
+                f"({total / elapsed if elapsed else 0:.0f} objects/s)"
+            )
+        )
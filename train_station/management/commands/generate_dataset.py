@@ -0,0 +1,77 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from train_station import signals
+from train_station.synthetic import generate_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a reproducible synthetic dataset (stations, routes, "
+        "trains, journeys, users, orders and tickets) for scale testing. "
+        "Run it against an empty database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stations", type=int, default=100)
+        parser.add_argument(
+            "--routes-per-station",
+            type=int,
+            default=3,
+            help="Outgoing neighbours per station, routes go both ways",
+        )
+        parser.add_argument("--trains", type=int, default=50)
+        parser.add_argument("--crews", type=int, default=100)
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="Number of days journeys are generated for",
+        )
+        parser.add_argument("--departures-per-route", type=int, default=1)
+        parser.add_argument(
+            "--start-date",
+            type=date.fromisoformat,
+            default=None,
+            help="First journey day, YYYY-MM-DD (default: today)",
+        )
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--tickets", type=int, default=10000)
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Random seed, the same seed gives the same dataset",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        try:
+            counts = generate_dataset(
+                stations=options["stations"],
+                routes_per_station=options["routes_per_station"],
+                trains=options["trains"],
+                crews=options["crews"],
+                days=options["days"],
+                departures_per_route=options["departures_per_route"],
+                users=options["users"],
+                tickets=options["tickets"],
+                seed=options["seed"],
+                start_date=options["start_date"],
+                batch_size=options["batch_size"],
+                log=self.stdout.write,
+            )
+        except IntegrityError as e:
+            raise CommandError(
+                f"Database already contains conflicting data: {e}"
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        signals.invalidate_all()
+        summary = ", ".join(
+            f"{count} {name}" for name, count in counts.items()
+        )
+        self.stdout.write(self.style.SUCCESS(f"Generated {summary}"))
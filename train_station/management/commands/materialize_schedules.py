@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from train_station.scheduling import BATCH_SIZE, materialize_schedules
+
+
+class Command(BaseCommand):
+    help = (
+        "Create journeys from recurring schedules up to the given horizon. "
+        "Already materialized days are skipped, so a nightly run only "
+        "extends every schedule by one day."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=30,
+            help="How many days ahead journeys should exist (default: 30)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=BATCH_SIZE,
+            help="Rows per INSERT statement",
+        )
+
+    def handle(self, *args, **options):
+        created = materialize_schedules(
+            options["days"], batch_size=options["batch_size"]
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {sum(created.values())} journeys "
+                f"from {len(created)} schedules"
+            )
+        )
@@ -0,0 +1,234 @@
+import gc
+import hashlib
+import multiprocessing
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.finders import get_finders
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.migrations.executor import MigrationExecutor
+from gunicorn.app.base import BaseApplication
+
+STATIC_FINGERPRINT_FILE = ".collectstatic-fingerprint"
+
+
+def has_pending_migrations(using: str = DEFAULT_DB_ALIAS) -> bool:
+    executor = MigrationExecutor(connections[using])
+    targets = executor.loader.graph.leaf_nodes()
+    return bool(executor.migration_plan(targets))
+
+
+def static_fingerprint() -> str:
+    """Hash of paths, sizes and mtimes of every file collectstatic copies"""
+    digest = hashlib.sha256()
+    entries = []
+    for finder in get_finders():
+        for path, storage in finder.list([]):
+            stat = os.stat(storage.path(path))
+            entries.append(f"{path}:{stat.st_size}:{stat.st_mtime_ns}")
+    for entry in sorted(entries):
+        digest.update(entry.encode())
+    return digest.hexdigest()
+
+
+def static_is_stale(fingerprint: str) -> bool:
+    path = os.path.join(settings.STATIC_ROOT, STATIC_FINGERPRINT_FILE)
+    try:
+        with open(path) as fp:
+            return fp.read().strip() != fingerprint
+    except OSError:
+        return True
+
+
+def store_static_fingerprint(fingerprint: str) -> None:
+    path = os.path.join(settings.STATIC_ROOT, STATIC_FINGERPRINT_FILE)
+    with open(path, "w") as fp:
+        fp.write(fingerprint)
+
+
+def reset_metrics_dir() -> None:
+    """Start with an empty Prometheus multiprocess directory"""
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if not path:
+        return
+    os.makedirs(path, exist_ok=True)
+    for name in os.listdir(path):
+        if name.endswith(".db"):
+            os.remove(os.path.join(path, name))
+
+
+def child_exit(server, worker) -> None:
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
+class ServeApplication(BaseApplication):
+    """Gunicorn application that loads Django once in the master process"""
+
+    def __init__(self, options: dict, asgi: bool = False):
+        self.options = options
+        self.asgi = asgi
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if value is not None:
+                self.cfg.set(key, value)
+
+    def load(self):
+        if self.asgi:
+            from django.core.asgi import get_asgi_application
+
+            application = get_asgi_application()
+        else:
+            from django.core.wsgi import get_wsgi_application
+
+            application = get_wsgi_application()
+
+        # Workers must not share the master's database sockets
+        connections.close_all()
+        # Keep preloaded objects out of GC bookkeeping, so collections in
+        # workers don't write to (and copy) pages shared with the master
+        gc.freeze()
+
+        return application
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the API with a preforking multi-worker server. The Django app "
+        "is loaded before forking so workers share its memory; migrations "
+        "and collectstatic only run when something changed. HUP to the "
+        "master gracefully replaces the workers, but they fork from the "
+        "already loaded app: code changes need a full restart."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--bind",
+            default=os.getenv("SERVE_BIND", "0.0.0.0:8000"),
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=int(
+                os.getenv(
+                    "WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1
+                )
+            ),
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=1,
+            help="Threads per WSGI worker, more than 1 uses gthread workers",
+        )
+        interface = parser.add_mutually_exclusive_group()
+        interface.add_argument(
+            "--asgi",
+            action="store_const",
+            const="asgi",
+            dest="interface",
+            help="Serve the ASGI application with uvicorn workers (default)",
+        )
+        interface.add_argument(
+            "--wsgi",
+            action="store_const",
+            const="wsgi",
+            dest="interface",
+            help=(
+                "Serve the WSGI application with sync or gthread workers, "
+                "the async endpoints and seat streams are not available"
+            ),
+        )
+        parser.set_defaults(interface="asgi")
+        parser.add_argument(
+            "--max-requests",
+            type=int,
+            default=1000,
+            help="Recycle a worker after this many requests (0 disables)",
+        )
+        parser.add_argument(
+            "--max-requests-jitter",
+            type=int,
+            default=100,
+            help="Random extra requests so workers don't recycle together",
+        )
+        parser.add_argument("--timeout", type=int, default=30)
+        parser.add_argument("--graceful-timeout", type=int, default=30)
+        parser.add_argument("--keep-alive", type=int, default=5)
+        parser.add_argument(
+            "--no-migrate",
+            action="store_true",
+            help="Don't apply pending migrations before starting",
+        )
+        parser.add_argument(
+            "--no-collectstatic",
+            action="store_true",
+            help="Don't collect changed static files before starting",
+        )
+        parser.add_argument(
+            "--warmup",
+            action="store_true",
+            help=(
+                "Replay popular searches before forking, workers inherit "
+                "the warm per-process caches"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        reset_metrics_dir()
+        if not options["no_migrate"]:
+            self.migrate()
+        if not options["no_collectstatic"]:
+            self.collectstatic()
+        if options["warmup"]:
+            call_command("warmup", stdout=self.stdout, stderr=self.stderr)
+
+        asgi = options["interface"] == "asgi"
+        if asgi:
+            worker_class = "uvicorn.workers.UvicornWorker"
+        elif options["threads"] > 1:
+            worker_class = "gthread"
+        else:
+            worker_class = "sync"
+
+        ServeApplication(
+            {
+                "bind": options["bind"],
+                "workers": options["workers"],
+                "threads": options["threads"],
+                "worker_class": worker_class,
+                "preload_app": True,
+                "max_requests": options["max_requests"],
+                "max_requests_jitter": options["max_requests_jitter"],
+                "timeout": options["timeout"],
+                "graceful_timeout": options["graceful_timeout"],
+                "keepalive": options["keep_alive"],
+                "accesslog": "-",
+                "errorlog": "-",
+                "child_exit": child_exit,
+            },
+            asgi=asgi,
+        ).run()
+
+    def migrate(self):
+        if has_pending_migrations():
+            call_command("migrate", interactive=False)
+        else:
+            self.stdout.write("No migrations to apply, skipping migrate")
+        # tables of database cache backends, existing ones are kept
+        call_command("createcachetable")
+
+    def collectstatic(self):
+        fingerprint = static_fingerprint()
+        if static_is_stale(fingerprint):
+            call_command("collectstatic", interactive=False, verbosity=0)
+            store_static_fingerprint(fingerprint)
+            self.stdout.write("Static files collected")
+        else:
+            self.stdout.write("Static files unchanged, skipping collectstatic")
@@ -0,0 +1,61 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from train_station_service.slow_queries import load_records, top_offenders
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the slowest SQL statements recorded in the slow query log "
+        "(SLOW_QUERIES['LOG_FILE']), grouped by normalized fingerprint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--file",
+            help="Slow query log to read, defaults to the configured one",
+        )
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument(
+            "--sort",
+            choices=("total_ms", "count", "max_ms"),
+            default="total_ms",
+        )
+        parser.add_argument(
+            "--explain",
+            action="store_true",
+            help="Show the plan of the slowest run of each statement",
+        )
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **options):
+        try:
+            records = load_records(options["file"])
+        except (OSError, ValueError) as error:
+            raise CommandError(f"Cannot read slow query log: {error}")
+
+        offenders = top_offenders(records, options["limit"], options["sort"])
+        if options["json"]:
+            self.stdout.write(json.dumps(offenders, indent=2))
+            return
+        if not offenders:
+            self.stdout.write("No slow queries recorded")
+            return
+
+        for rank, group in enumerate(offenders, 1):
+            self.stdout.write(
+                f"{rank}. {group['total_ms']} ms total, "
+                f"{group['count']} calls, mean {group['mean_ms']} ms, "
+                f"max {group['max_ms']} ms [{group['fingerprint']}]"
+            )
+            self.stdout.write(f"   {group['sql']}")
+            if group["views"]:
+                self.stdout.write(f"   views: {', '.join(group['views'])}")
+            if group["sources"]:
+                self.stdout.write(
+                    f"   sources: {', '.join(group['sources'])}"
+                )
+            if options["explain"] and group["explain"]:
+                for line in group["explain"].splitlines():
+                    self.stdout.write(f"   | {line}")
@@ -0,0 +1,170 @@
+import json
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter started with -X importtime
+STARTUP_SCRIPT = """
+import json
+import sys
+import time
+
+started = time.perf_counter()
+import django
+from django.apps.config import AppConfig
+
+ready = {}
+create = AppConfig.create.__func__
+
+
+def timed_create(cls, entry):
+    config = create(cls, entry)
+    original = config.ready
+
+    def timed_ready():
+        ready_started = time.perf_counter()
+        original()
+        ready[config.label] = time.perf_counter() - ready_started
+
+    config.ready = timed_ready
+    return config
+
+
+AppConfig.create = classmethod(timed_create)
+django.setup()
+setup_done = time.perf_counter()
+
+if "--asgi" in sys.argv:
+    from django.core.handlers.asgi import ASGIHandler as Handler
+else:
+    from django.core.handlers.wsgi import WSGIHandler as Handler
+Handler()
+handler_done = time.perf_counter()
+
+from django.urls import get_resolver
+get_resolver().url_patterns
+urls_done = time.perf_counter()
+
+print(json.dumps({
+    "setup": setup_done - started,
+    "apps_ready": ready,
+    "middleware": handler_done - setup_done,
+    "urls": urls_done - handler_done,
+    "total": urls_done - started,
+}))
+"""
+
+
+def parse_importtime(output: str) -> list[dict]:
+    """Modules from -X importtime output, in import order"""
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue
+        modules.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+        })
+    return modules
+
+
+def summarize(modules: list[dict], limit: int) -> dict:
+    packages = defaultdict(float)
+    for module in modules:
+        packages[module["module"].split(".")[0]] += module["self_ms"]
+    return {
+        "modules": len(modules),
+        "imports_ms": round(
+            sum(m["cumulative_ms"] for m in modules if m["depth"] == 0), 2
+        ),
+        "slowest": sorted(
+            modules, key=lambda m: m["cumulative_ms"], reverse=True
+        )[:limit],
+        "packages": dict(
+            sorted(packages.items(), key=lambda p: p[1], reverse=True)[:limit]
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the project in a fresh interpreter and report where startup "
+        "time goes: import time per module and package (-X importtime), "
+        "each app's ready(), the middleware chain and the URLconf."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument(
+            "--asgi",
+            action="store_true",
+            help="Build the ASGI handler instead of the WSGI one",
+        )
+        parser.add_argument("--json", action="store_true")
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-X",
+                "importtime",
+                "-c",
+                STARTUP_SCRIPT,
+                *(["--asgi"] if options["asgi"] else []),
+            ],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"Startup failed:\n{result.stderr[-2000:]}")
+
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        report = {
+            "handler": "asgi" if options["asgi"] else "wsgi",
+            "total_ms": round(timings["total"] * 1000, 2),
+            "setup_ms": round(timings["setup"] * 1000, 2),
+            "apps_ready_ms": {
+                label: round(seconds * 1000, 2)
+                for label, seconds in timings["apps_ready"].items()
+            },
+            "middleware_ms": round(timings["middleware"] * 1000, 2),
+            "urls_ms": round(timings["urls"] * 1000, 2),
+            **summarize(parse_importtime(result.stderr), options["limit"]),
+        }
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f"Startup ({report['handler']}): {report['total_ms']} ms"
+        )
+        self.stdout.write(f"  django.setup(): {report['setup_ms']} ms")
+        for label, ms in sorted(
+            report["apps_ready_ms"].items(), key=lambda a: a[1], reverse=True
+        ):
+            if ms >= 0.1:
+                self.stdout.write(f"    {label}.ready(): {ms} ms")
+        self.stdout.write(f"  middleware chain: {report['middleware_ms']} ms")
+        self.stdout.write(f"  URLconf and views: {report['urls_ms']} ms")
+        self.stdout.write(
+            f"Imports: {report['imports_ms']} ms in "
+            f"{report['modules']} modules"
+        )
+        self.stdout.write("Slowest modules (cumulative):")
+        for module in report["slowest"]:
+            self.stdout.write(
+                f"  {module['cumulative_ms']:8.2f} ms  {module['module']} "
+                f"(self {module['self_ms']:.2f} ms)"
+            )
+        self.stdout.write("Packages (self time):")
+        for package, ms in report["packages"].items():
+            self.stdout.write(f"  {ms:8.2f} ms  {package}")
@@ -0,0 +1,109 @@
+import json
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def spans_of(document: dict) -> list[dict]:
+    return [
+        span
+        for resource in document.get("resourceSpans", [])
+        for scope in resource.get("scopeSpans", [])
+        for span in scope.get("spans", [])
+    ]
+
+
+def format_traces(spans: list[dict]) -> list[str]:
+    """Indented span trees, one per trace, children in start order"""
+    children = defaultdict(list)
+    ids = {span["spanId"] for span in spans}
+    for span in sorted(spans, key=lambda s: int(s["startTimeUnixNano"])):
+        parent = span.get("parentSpanId")
+        children[parent if parent in ids else None].append(span)
+
+    lines = []
+
+    def walk(span, depth):
+        duration = (
+            int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])
+        ) / 1e6
+        lines.append(f"{'  ' * depth}{span['name']} {duration:.2f} ms")
+        for child in children[span["spanId"]]:
+            walk(child, depth + 1)
+
+    for root in children[None]:
+        lines.append(f"trace {root['traceId']}")
+        walk(root, 1)
+    return lines
+
+
+class Command(BaseCommand):
+    help = (
+        "Local stand-in for an OpenTelemetry collector: accepts OTLP/JSON "
+        "traces on /v1/traces (TRACING['EXPORTER'] = 'otlp_http'), appends "
+        "them to a JSON lines file and prints the span trees. With --read "
+        "it prints the trees of an exported file instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--bind", default="127.0.0.1:4318")
+        parser.add_argument("--output", default="traces.jsonl")
+        parser.add_argument(
+            "--read",
+            metavar="FILE",
+            help="Print the traces of an exported JSON lines file and exit",
+        )
+
+    def handle(self, *args, **options):
+        if options["read"]:
+            try:
+                with open(options["read"]) as fp:
+                    for line in fp:
+                        if line.strip():
+                            self._print(json.loads(line))
+            except (OSError, ValueError) as error:
+                raise CommandError(f"Cannot read traces: {error}")
+            return
+
+        host, _, port = options["bind"].rpartition(":")
+        command = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path != "/v1/traces":
+                    self.send_error(404)
+                    return
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                try:
+                    document = json.loads(body)
+                except ValueError:
+                    self.send_error(400)
+                    return
+                with open(options["output"], "a") as fp:
+                    fp.write(json.dumps(document) + "\n")
+                command._print(document)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"{}")
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host or "127.0.0.1", int(port)), Handler)
+        self.stdout.write(
+            f"Collecting traces on http://{options['bind']}/v1/traces "
+            f"into {options['output']}"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+    def _print(self, document: dict) -> None:
+        for line in format_traces(spans_of(document)):
+            self.stdout.write(line)
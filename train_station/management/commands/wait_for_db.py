@@ -1,21 +1,48 @@
 import time
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.db import connections
 from django.db.utils import OperationalError
 
 
 class Command(BaseCommand):
+    help = (
+        "Wait until the database accepts connections, retrying with "
+        "exponential backoff. Fails after --timeout seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=60,
+            help="Give up after this many seconds (0 waits forever)",
+        )
+        parser.add_argument("--initial-delay", type=float, default=0.1)
+        parser.add_argument("--max-delay", type=float, default=5)
+        parser.add_argument("--database", default="default")
 
     def handle(self, *args, **options):
         self.stdout.write("Waiting for database...")
-        db_conn = None
-        while not db_conn:
+        deadline = time.monotonic() + options["timeout"]
+        delay = options["initial_delay"]
+        while True:
             try:
-                connections["default"].ensure_connection()
-                db_conn = True
-            except OperationalError:
-                self.stdout.write("Database unavailable, waiting 1 second")
-                time.sleep(1)
+                connections[options["database"]].ensure_connection()
+                break
+            except OperationalError as error:
+                remaining = deadline - time.monotonic()
+                if options["timeout"] and remaining <= 0:
+                    raise CommandError(
+                        f"Database unavailable after {options['timeout']} "
+                        f"seconds: {error}"
+                    )
+                if options["timeout"]:
+                    delay = min(delay, remaining)
+                self.stdout.write(
+                    f"Database unavailable, waiting {delay:.1f} seconds"
+                )
+                time.sleep(delay)
+                delay = min(delay * 2, options["max_delay"])
 
         self.stdout.write(self.style.SUCCESS("Database available!"))
@@ -0,0 +1,229 @@
+import json
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, DatabaseError
+from django.db.models import Count
+from django.urls import resolve, Resolver404, reverse
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from train_station.models import Journey
+
+ACCESS_LOG_RE = re.compile(r'"GET (\S+) HTTP')
+
+
+def get_config() -> dict:
+    return {
+        "QUERIES_FILE": "",
+        "TOP": 100,
+        "CONCURRENCY": 4,
+        "BASE_URL": "http://localhost",
+        "MARKER_FILE": os.path.join(settings.BASE_DIR, ".warmup-done"),
+        **getattr(settings, "WARMUP", {}),
+    }
+
+
+def read_queries(path: str, top: int) -> list[str]:
+    """Most requested GET paths of a file of paths or access log lines"""
+    counts = Counter()
+    with open(path) as fp:
+        for line in fp:
+            line = line.strip()
+            if line.startswith("/"):
+                counts[line.split()[0]] += 1
+            elif match := ACCESS_LOG_RE.search(line):
+                counts[match.group(1)] += 1
+    return [query for query, _ in counts.most_common(top)]
+
+
+def popular_queries(top: int) -> list[str]:
+    """Journey searches for the upcoming departures that sell the most"""
+    url = reverse("train_station:journey-list")
+    queries = [url]
+    journeys = (
+        Journey.objects.filter(departure_time__gte=timezone.now())
+        .annotate(sold=Count("tickets"))
+        .order_by("-sold", "departure_time")
+        .values_list("route_id", "train_id", "departure_time")
+    )
+    for route_id, train_id, departure_time in journeys[:top]:
+        day = timezone.localtime(departure_time).date().isoformat()
+        queries.append(
+            f"{url}?{urlencode({'route': route_id, 'departure_time': day})}"
+        )
+        queries.append(
+            f"{url}?{urlencode({'train': train_id, 'departure_time': day})}"
+        )
+    return list(dict.fromkeys(queries))[:top]
+
+
+def replay(query: str, base_url: str, user) -> int:
+    """Run a GET request through its API view, returns the status code.
+
+    Throttling is turned off, the requests of a warmup must not use up the
+    rate limit of real users.
+    """
+    base = urlsplit(base_url)
+    match = resolve(urlsplit(query).path)
+    view_cls = getattr(match.func, "cls", None)
+    if view_cls is None:
+        raise ValueError("not an API view")
+    initkwargs = {**match.func.initkwargs, "throttle_classes": ()}
+    if hasattr(match.func, "actions"):
+        view = view_cls.as_view(match.func.actions, **initkwargs)
+    else:
+        view = view_cls.as_view(**initkwargs)
+
+    request = APIRequestFactory().get(
+        query, secure=base.scheme == "https", HTTP_HOST=base.netloc
+    )
+    force_authenticate(request, user=user)
+    response = view(request, *match.args, **match.kwargs)
+    response.render()
+    return response.status_code
+
+
+def prewarm_indexes() -> int | None:
+    """Load the app's indexes into Postgres buffers with pg_prewarm.
+
+    Returns the number of blocks read, None when not possible.
+    """
+    if connection.vendor != "postgresql":
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_extension WHERE extname = 'pg_prewarm'"
+            )
+            if cursor.fetchone() is None:
+                return None
+            cursor.execute(
+                "SELECT COALESCE(SUM(pg_prewarm(i.indexrelid)), 0) "
+                "FROM pg_index i JOIN pg_class c ON c.oid = i.indrelid "
+                "WHERE c.relname LIKE %s",
+                ["train\\_station\\_%"],
+            )
+            return cursor.fetchone()[0]
+    except DatabaseError:
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Warm the caches after a deploy: replay the most popular journey "
+        "searches (from a file of request paths or access log lines, or "
+        "derived from ticket sales) to fill the response cache and load "
+        "the pages they read into the database buffers. Writes a marker "
+        "file when done."
+    )
+
+    def add_arguments(self, parser):
+        config = get_config()
+        parser.add_argument(
+            "--queries",
+            default=config["QUERIES_FILE"],
+            help="File of request paths or access log lines",
+        )
+        parser.add_argument("--top", type=int, default=config["TOP"])
+        parser.add_argument(
+            "--concurrency", type=int, default=config["CONCURRENCY"]
+        )
+        parser.add_argument(
+            "--base-url",
+            default=config["BASE_URL"],
+            help="Scheme and host of the public API, part of cache keys",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=None,
+            help="Give up on the remaining queries after this many seconds",
+        )
+        parser.add_argument("--marker", default=config["MARKER_FILE"])
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        marker = options["marker"]
+        if marker and os.path.exists(marker):
+            os.remove(marker)
+
+        if options["queries"]:
+            try:
+                queries = read_queries(options["queries"], options["top"])
+            except OSError as error:
+                raise CommandError(f"Cannot read queries: {error}")
+        else:
+            queries = popular_queries(options["top"])
+
+        blocks = prewarm_indexes()
+        if blocks is not None:
+            self.stdout.write(f"Prewarmed {blocks} index blocks")
+
+        # never saved, only used to pass the permission checks
+        user = get_user_model()(email="warmup@localhost", is_active=True)
+        results = self.run_queries(queries, options, user)
+
+        failed = {q: r for q, r in results.items() if r != 200}
+        for query, result in failed.items():
+            self.stderr.write(f"{query}: {result}")
+        summary = {
+            "finished_at": timezone.now().isoformat(),
+            "queries": len(queries),
+            "warmed": len(results) - len(failed),
+            "failed": len(failed),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        if marker:
+            with open(marker, "w") as fp:
+                json.dump(summary, fp)
+        self.stdout.write(
+            f"Warmed {summary['warmed']} of {summary['queries']} queries "
+            f"in {summary['seconds']} s"
+        )
+
+    def run_queries(self, queries: list[str], options: dict, user) -> dict:
+        def run(query):
+            try:
+                return replay(query, options["base_url"], user)
+            except Resolver404:
+                return "skipped, no such URL"
+            except ValueError as error:
+                return f"skipped, {error}"
+            except Exception as error:
+                return f"failed, {error!r}"
+
+        if options["concurrency"] <= 1:
+            deadline = time.monotonic() + (options["timeout"] or float("inf"))
+            results = {}
+            for query in queries:
+                timed_out = time.monotonic() > deadline
+                results[query] = "timed out" if timed_out else run(query)
+            return results
+
+        def run_in_thread(query):
+            try:
+                return run(query)
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(options["concurrency"]) as executor:
+            futures = {
+                executor.submit(run_in_thread, query): query
+                for query in queries
+            }
+            done, pending = wait(futures, timeout=options["timeout"])
+            for future in pending:
+                future.cancel()
+        results = {futures[future]: future.result() for future in done}
+        results.update(
+            {futures[future]: "timed out" for future in pending}
+        )
+        return results
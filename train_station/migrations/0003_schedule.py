@@ -0,0 +1,80 @@
+# Generated by Django 5.2.6 on 2026-10-19 09:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("train_station", "0002_alter_train_train_type"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Schedule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("departure_time", models.TimeField()),
+                ("arrival_time", models.TimeField()),
+                (
+                    "weekdays",
+                    models.PositiveSmallIntegerField(
+                        default=127,
+                        help_text="Bit mask of weekdays, Monday = 1 ... Sunday = 64",
+                    ),
+                ),
+                ("valid_from", models.DateField()),
+                ("valid_until", models.DateField(blank=True, null=True)),
+                ("materialized_until", models.DateField(blank=True, null=True)),
+                (
+                    "crew",
+                    models.ManyToManyField(
+                        blank=True, related_name="schedules", to="train_station.crew"
+                    ),
+                ),
+                (
+                    "route",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="schedules",
+                        to="train_station.route",
+                    ),
+                ),
+                (
+                    "train",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="schedules",
+                        to="train_station.train",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name="journey",
+            name="schedule",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="journeys",
+                to="train_station.schedule",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="journey",
+            constraint=models.UniqueConstraint(
+                fields=("schedule", "departure_time"),
+                name="unique_schedule_departure_time",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("train_station", "0003_schedule"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="train",
+            name="image_variants",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("train_station", "0004_train_image_variants"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedJourney",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                ("payload", models.BinaryField()),
+                ("departure_time", models.DateTimeField(db_index=True)),
+            ],
+            options={
+                "ordering": ["-departure_time"],
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedOrder",
+            fields=[
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+                ("payload", models.BinaryField()),
+                ("created_at", models.DateTimeField()),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="archived_orders",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["user", "-created_at"],
+                        name="archived_order_user_created",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-19 02:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("train_station", "0005_archive"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(
+                fields=["route", "departure_time"],
+                include=("arrival_time", "train"),
+                name="journey_route_departure",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="journey",
+            index=models.Index(
+                fields=["route", "arrival_time"],
+                include=("departure_time", "train"),
+                name="journey_route_arrival",
+            ),
+        ),
+    ]
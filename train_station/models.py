@@ -1,5 +1,7 @@
+import json
 import os
 import uuid
+import zlib
 from typing import Type
 
 from django.contrib.auth import get_user_model
@@ -41,6 +43,8 @@ class Train(models.Model):
         null=True,
         upload_to=train_image_file_path
     )
+    # {format: {width: storage name}}, filled by a background job
+    image_variants = models.JSONField(default=dict, blank=True)
 
     class Meta:
         ordering = ["name",]
@@ -124,6 +128,34 @@ class Journey(models.Model):
     crew = models.ManyToManyField(Crew, blank=True, related_name="journeys")
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
+    schedule = models.ForeignKey(
+        "Schedule",
+        blank=True,
+        null=True,
+        related_name="journeys",
+        on_delete=models.SET_NULL
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["schedule", "departure_time"],
+                name="unique_schedule_departure_time"
+            )
+        ]
+        indexes = [
+            # station departure/arrival boards, see StationViewSet
+            models.Index(
+                fields=["route", "departure_time"],
+                include=["arrival_time", "train"],
+                name="journey_route_departure",
+            ),
+            models.Index(
+                fields=["route", "arrival_time"],
+                include=["departure_time", "train"],
+                name="journey_route_arrival",
+            ),
+        ]
 
     def clean(self):
         if self.departure_time >= self.arrival_time:
@@ -144,6 +176,68 @@ class Journey(models.Model):
                 f"Train: {self.train.name}")
 
 
+class Schedule(models.Model):
+    """Recurring departure rule that materializes Journey rows"""
+
+    MONDAY = 1
+    TUESDAY = 2
+    WEDNESDAY = 4
+    THURSDAY = 8
+    FRIDAY = 16
+    SATURDAY = 32
+    SUNDAY = 64
+    EVERY_DAY = 127
+
+    route = models.ForeignKey(
+        Route,
+        related_name="schedules",
+        on_delete=models.CASCADE
+    )
+    train = models.ForeignKey(
+        Train,
+        related_name="schedules",
+        on_delete=models.CASCADE
+    )
+    crew = models.ManyToManyField(Crew, blank=True, related_name="schedules")
+    departure_time = models.TimeField()
+    arrival_time = models.TimeField()
+    weekdays = models.PositiveSmallIntegerField(
+        default=EVERY_DAY,
+        help_text="Bit mask of weekdays, Monday = 1 ... Sunday = 64"
+    )
+    valid_from = models.DateField()
+    valid_until = models.DateField(blank=True, null=True)
+    materialized_until = models.DateField(blank=True, null=True)
+
+    def runs_on(self, day) -> bool:
+        if day < self.valid_from:
+            return False
+        if self.valid_until and day > self.valid_until:
+            return False
+        return bool(self.weekdays & (1 << day.weekday()))
+
+    def clean(self):
+        if not (0 < self.weekdays <= Schedule.EVERY_DAY):
+            raise ValidationError(
+                "Weekdays mask must select at least one day of the week"
+            )
+        if self.valid_until and self.valid_until < self.valid_from:
+            raise ValidationError(
+                "Valid until date can't be earlier than valid from date"
+            )
+
+    def save(
+        self,
+        *args,
+        **kwargs
+    ):
+        self.clean()
+        return super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.route}, {self.train.name} at {self.departure_time}"
+
+
 class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(
@@ -222,3 +316,56 @@ class Ticket(models.Model):
 
     def __str__(self):
         return f"{str(self.journey)} (cargo: {self.cargo}, seat: {self.seat})"
+
+
+class ArchivedData(models.Model):
+    """Row moved out of the live tables by `archive_journeys`.
+
+    `payload` is the zlib compressed JSON of the object as the API
+    rendered it when it was archived.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    payload = models.BinaryField()
+
+    class Meta:
+        abstract = True
+
+    @staticmethod
+    def compress(data: dict) -> bytes:
+        return zlib.compress(json.dumps(data).encode())
+
+    @property
+    def data(self) -> dict:
+        return json.loads(zlib.decompress(self.payload))
+
+
+class ArchivedJourney(ArchivedData):
+    departure_time = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ["-departure_time"]
+
+    def __str__(self):
+        return f"Archived journey {self.id} ({self.departure_time})"
+
+
+class ArchivedOrder(ArchivedData):
+    created_at = models.DateTimeField()
+    user = models.ForeignKey(
+        get_user_model(),
+        related_name="archived_orders",
+        on_delete=models.CASCADE
+    )
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at"],
+                name="archived_order_user_created",
+            )
+        ]
+
+    def __str__(self):
+        return f"Archived order {self.id} ({self.created_at})"
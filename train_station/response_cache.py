@@ -0,0 +1,77 @@
+"""Cache of journey list responses.
+
+Cache keys contain a version that is replaced when a transaction that
+changed journeys, the objects they show or their tickets commits, so a
+stale page is not served after the commit;
+RESPONSE_CACHE["TIMEOUT"] only bounds how long unused pages are kept. The
+version lives in the shared "versions" cache (see train_station.snapshots),
+pages may be kept per process.
+"""
+import hashlib
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from train_station import snapshots
+from train_station_service.metrics import record_cache_lookup
+
+VERSION_KEY = "journey_list:version"
+
+
+def get_config() -> dict:
+    return {
+        "ENABLED": True,
+        "ALIAS": "default",
+        "TIMEOUT": 300,
+        **getattr(settings, "RESPONSE_CACHE", {}),
+    }
+
+
+def get_cache():
+    return caches[get_config()["ALIAS"]]
+
+
+def version() -> str:
+    return snapshots.versions([VERSION_KEY])[VERSION_KEY]
+
+
+def invalidate() -> None:
+    """Make every cached journey list page stale once the current
+    transaction commits, however many rows it changed"""
+    snapshots.bump_on_commit(VERSION_KEY)
+
+
+def cache_key(request) -> str:
+    """Key of a list page, query parameters in any order share it"""
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    # pagination links are absolute, so the host is part of the key
+    url = f"{request.scheme}://{request.get_host()}{request.path}?{query}"
+    digest = hashlib.sha1(url.encode()).hexdigest()
+    return f"journey_list:{version()}:{digest}"
+
+
+class CachedListMixin:
+    """Serves list responses from the response cache (X-Cache: HIT/MISS)"""
+
+    def list(self, request, *args, **kwargs):
+        config = get_config()
+        if not config["ENABLED"]:
+            return super().list(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            record_cache_lookup("journey_list", hits=1)
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        record_cache_lookup("journey_list", misses=1)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, config["TIMEOUT"])
+        response["X-Cache"] = "MISS"
+        return response
@@ -0,0 +1,135 @@
+"""Station/route graph kept in memory by every process.
+
+Routes are stored as compressed sparse rows: the routes leaving the
+station at position `i` (stations sorted by id) are
+`targets[offsets[i]:offsets[i + 1]]` with their `distances`. The graph is
+loaded with one query per process and rebuilt when a route or station
+changes (see train_station.snapshots).
+"""
+import heapq
+from array import array
+from bisect import bisect_left
+
+from train_station.models import Route, Station
+from train_station.snapshots import Snapshot
+
+
+class RouteGraph:
+    def __init__(self, station_ids, routes):
+        """`routes` are (source id, destination id, distance) tuples"""
+        self.station_ids = array("q", sorted(station_ids))
+        count = len(self.station_ids)
+        edges = sorted(
+            (self.position(source), self.position(destination), distance)
+            for source, destination, distance in routes
+        )
+        self.offsets = array("q", [0] * (count + 1))
+        self.targets = array("q")
+        self.distances = array("q")
+        for source, target, distance in edges:
+            self.offsets[source + 1] += 1
+            self.targets.append(target)
+            self.distances.append(distance)
+        for position in range(count):
+            self.offsets[position + 1] += self.offsets[position]
+
+    def __len__(self):
+        return len(self.station_ids)
+
+    def position(self, station_id: int) -> int:
+        """Position of a station, KeyError if it is not in the graph"""
+        position = bisect_left(self.station_ids, station_id)
+        if (
+            position == len(self.station_ids)
+            or self.station_ids[position] != station_id
+        ):
+            raise KeyError(station_id)
+        return position
+
+    def __contains__(self, station_id: int) -> bool:
+        try:
+            self.position(station_id)
+        except KeyError:
+            return False
+        return True
+
+    def edges(self, position: int):
+        for edge in range(self.offsets[position], self.offsets[position + 1]):
+            yield self.targets[edge], self.distances[edge]
+
+    def dijkstra(
+        self,
+        source: int,
+        target: int | None = None,
+        max_distance: int | None = None,
+    ) -> tuple[dict[int, int], dict[int, int]]:
+        """Distances and predecessors by position, from position `source`.
+
+        Stops once `target` is settled or distances exceed `max_distance`.
+        """
+        distances = {source: 0}
+        previous = {}
+        queue = [(0, source)]
+        settled = set()
+        while queue:
+            distance, position = heapq.heappop(queue)
+            if position in settled:
+                continue
+            settled.add(position)
+            if position == target:
+                break
+            for neighbour, length in self.edges(position):
+                candidate = distance + length
+                if max_distance is not None and candidate > max_distance:
+                    continue
+                if candidate < distances.get(neighbour, candidate + 1):
+                    distances[neighbour] = candidate
+                    previous[neighbour] = position
+                    heapq.heappush(queue, (candidate, neighbour))
+        return distances, previous
+
+    def shortest_path(
+        self, source_id: int, target_id: int
+    ) -> tuple[int, list[int]] | None:
+        """Distance and station ids of the shortest path, None if none"""
+        source, target = self.position(source_id), self.position(target_id)
+        distances, previous = self.dijkstra(source, target=target)
+        if target not in distances:
+            return None
+        path = [target]
+        while path[-1] != source:
+            path.append(previous[path[-1]])
+        return distances[target], [self.station_ids[p] for p in path[::-1]]
+
+    def reachable(
+        self, source_id: int, max_distance: int | None = None
+    ) -> list[tuple[int, int]]:
+        """(station id, distance) of stations reachable from a station"""
+        source = self.position(source_id)
+        distances, _ = self.dijkstra(source, max_distance=max_distance)
+        return sorted(
+            (
+                (self.station_ids[position], distance)
+                for position, distance in distances.items()
+                if position != source
+            ),
+            key=lambda item: (item[1], item[0]),
+        )
+
+
+def build_graph(part=None) -> RouteGraph:
+    return RouteGraph(
+        Station.objects.values_list("id", flat=True),
+        Route.objects.values_list("source_id", "destination_id", "distance"),
+    )
+
+
+graph = Snapshot("route_graph", build_graph)
+
+
+def get_graph() -> RouteGraph:
+    return graph.get()
+
+
+def invalidate() -> None:
+    graph.invalidate()
@@ -0,0 +1,144 @@
+from datetime import date, datetime, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from train_station import itineraries, response_cache
+from train_station.models import Journey, Schedule
+
+BATCH_SIZE = 1000
+
+
+def _journey_times(
+    schedule: Schedule, day: date
+) -> tuple[datetime, datetime]:
+    """Return aware departure/arrival datetimes of schedule on given day.
+
+    Arrival time that is not later than departure time is treated as
+    arrival on the next day (overnight trains).
+    """
+    tz = timezone.get_current_timezone()
+    departure = timezone.make_aware(
+        datetime.combine(day, schedule.departure_time), tz
+    )
+    arrival = timezone.make_aware(
+        datetime.combine(day, schedule.arrival_time), tz
+    )
+    if arrival <= departure:
+        arrival += timedelta(days=1)
+
+    return departure, arrival
+
+
+def materialize_schedule(
+    schedule: Schedule,
+    until: date,
+    start: date | None = None,
+    batch_size: int = BATCH_SIZE,
+) -> int:
+    """Create missing journeys of schedule up to `until` (inclusive).
+
+    Generation starts right after `schedule.materialized_until`, so repeated
+    runs only extend the horizon. Journeys that already exist are skipped
+    thanks to the unique (schedule, departure_time) constraint.
+    Returns number of journeys created.
+    """
+    if start is None:
+        start = schedule.valid_from
+        if schedule.materialized_until:
+            start = max(
+                start, schedule.materialized_until + timedelta(days=1)
+            )
+    if schedule.valid_until:
+        until = min(until, schedule.valid_until)
+    if start > until:
+        return 0
+
+    departures = {}
+    day = start
+    while day <= until:
+        if schedule.runs_on(day):
+            departure, arrival = _journey_times(schedule, day)
+            departures[departure] = arrival
+        day += timedelta(days=1)
+
+    existing = set(
+        Journey.objects.filter(
+            schedule=schedule, departure_time__in=list(departures)
+        ).values_list("departure_time", flat=True)
+    )
+    journeys = [
+        Journey(
+            schedule=schedule,
+            route_id=schedule.route_id,
+            train_id=schedule.train_id,
+            departure_time=departure,
+            arrival_time=arrival,
+        )
+        for departure, arrival in departures.items()
+        if departure not in existing
+    ]
+
+    crew_ids = list(schedule.crew.values_list("id", flat=True))
+
+    with transaction.atomic():
+        Journey.objects.bulk_create(
+            journeys, batch_size=batch_size, ignore_conflicts=True
+        )
+        if crew_ids and journeys:
+            created_ids = Journey.objects.filter(
+                schedule=schedule,
+                departure_time__in=[
+                    journey.departure_time for journey in journeys
+                ],
+            ).values_list("id", flat=True)
+            through = Journey.crew.through
+            through.objects.bulk_create(
+                [
+                    through(journey_id=journey_id, crew_id=crew_id)
+                    for journey_id in created_ids
+                    for crew_id in crew_ids
+                ],
+                batch_size=batch_size,
+                ignore_conflicts=True,
+            )
+        schedule.materialized_until = max(
+            until, schedule.materialized_until or until
+        )
+        Schedule.objects.filter(id=schedule.id).update(
+            materialized_until=schedule.materialized_until
+        )
+
+    return len(journeys)
+
+
+def materialize_schedules(
+    horizon_days: int,
+    today: date | None = None,
+    batch_size: int = BATCH_SIZE,
+) -> dict[int, int]:
+    """Extend every active schedule so journeys exist `horizon_days` ahead"""
+    today = today or timezone.localdate()
+    until = today + timedelta(days=horizon_days)
+
+    schedules = Schedule.objects.exclude(valid_until__lt=today).exclude(
+        materialized_until__gte=until
+    )
+
+    created = {}
+    for schedule in schedules.iterator():
+        start = max(today, schedule.valid_from)
+        if schedule.materialized_until:
+            start = max(
+                start, schedule.materialized_until + timedelta(days=1)
+            )
+        created[schedule.id] = materialize_schedule(
+            schedule, until, start=start, batch_size=batch_size
+        )
+
+    # bulk_create sends no signals
+    if any(created.values()):
+        response_cache.invalidate()
+        itineraries.invalidate_all()
+
+    return created
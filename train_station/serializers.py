@@ -1,4 +1,6 @@
-from django.db import transaction
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
@@ -12,15 +14,17 @@ from train_station.models import (
     Train,
     Ticket
 )
+from train_station_service.instrumentation import TimedSerializerMixin
+from train_station_service.metrics import BOOKING_CONFLICTS
 
 
-class TrainTypeSerializer(serializers.ModelSerializer):
+class TrainTypeSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = TrainType
         fields = ("id", "name")
 
 
-class StationSerializer(serializers.ModelSerializer):
+class StationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Station
         fields = (
@@ -31,7 +35,7 @@ class StationSerializer(serializers.ModelSerializer):
         )
 
 
-class CrewSerializer(serializers.ModelSerializer):
+class CrewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Crew
         fields = (
@@ -42,7 +46,7 @@ class CrewSerializer(serializers.ModelSerializer):
         )
 
 
-class TrainSerializer(serializers.ModelSerializer):
+class TrainSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Train
         fields = (
@@ -54,7 +58,27 @@ class TrainSerializer(serializers.ModelSerializer):
         )
 
 
-class TrainListSerializer(TrainSerializer):
+class TrainImageSrcsetMixin(serializers.Serializer):
+    image_srcset = serializers.SerializerMethodField()
+
+    def get_image_srcset(self, train) -> dict[str, str]:
+        """Resized variants per format, usable as <img srcset> values"""
+        request = self.context.get("request")
+        srcset = {}
+        for extension, names in train.image_variants.items():
+            candidates = []
+            for width, name in sorted(
+                names.items(), key=lambda item: int(item[0])
+            ):
+                url = default_storage.url(name)
+                if request is not None:
+                    url = request.build_absolute_uri(url)
+                candidates.append(f"{url} {width}w")
+            srcset[extension] = ", ".join(candidates)
+        return srcset
+
+
+class TrainListSerializer(TrainImageSrcsetMixin, TrainSerializer):
     train_type = serializers.SlugRelatedField(
         many=False,
         read_only=True,
@@ -69,11 +93,12 @@ class TrainListSerializer(TrainSerializer):
             "cargo_num",
             "places_in_cargo",
             "train_type",
-            "image"
+            "image",
+            "image_srcset"
         )
 
 
-class TrainDetailSerializer(TrainSerializer):
+class TrainDetailSerializer(TrainImageSrcsetMixin, TrainSerializer):
     train_type = TrainTypeSerializer(many=False, read_only=True)
 
     class Meta:
@@ -84,17 +109,18 @@ class TrainDetailSerializer(TrainSerializer):
             "cargo_num",
             "places_in_cargo",
             "train_type",
-            "image"
+            "image",
+            "image_srcset"
         )
 
 
-class TrainImageSerializer(serializers.ModelSerializer):
+class TrainImageSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Train
         fields = ("id", "image")
 
 
-class RouteSerializer(serializers.ModelSerializer):
+class RouteSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Route
         fields = ("id", "distance", "source", "destination")
@@ -125,7 +151,7 @@ class RouteDetailSerializer(RouteSerializer):
     destination = StationSerializer(many=False, read_only=True)
 
 
-class JourneySerializer(serializers.ModelSerializer):
+class JourneySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Journey
         fields = (
@@ -172,7 +198,22 @@ class JourneyListSerializer(JourneySerializer):
         )
 
 
-class TicketSerializer(serializers.ModelSerializer):
+class JourneyBoardSerializer(JourneyListSerializer):
+    """Journeys on a station departure/arrival board, without the crew"""
+
+    class Meta(JourneyListSerializer.Meta):
+        fields = (
+            "id",
+            "source_name",
+            "destination_name",
+            "train_name",
+            "departure_time",
+            "arrival_time",
+            "tickets_available",
+        )
+
+
+class TicketSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs=attrs)
         Ticket.validate_ticket(
@@ -228,7 +269,7 @@ class JourneyDetailSerializer(JourneySerializer):
         )
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     tickets = TicketSerializer(
         many=True,
         read_only=False,
@@ -244,12 +285,22 @@ class OrderSerializer(serializers.ModelSerializer):
         )
 
     def create(self, validated_data):
-        with transaction.atomic():
-            tickets_data = validated_data.pop("tickets")
-            order = Order.objects.create(**validated_data)
-            for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
-            return order
+        try:
+            with transaction.atomic():
+                tickets_data = validated_data.pop("tickets")
+                order = Order.objects.create(**validated_data)
+                for ticket_data in tickets_data:
+                    Ticket.objects.create(order=order, **ticket_data)
+                return order
+        except (IntegrityError, DjangoValidationError) as error:
+            # the seat was booked after validation, or twice in this order
+            BOOKING_CONFLICTS.labels(
+                "integrity" if isinstance(error, IntegrityError)
+                else "validation"
+            ).inc()
+            raise ValidationError(
+                {"tickets": ["Some of the selected seats are already taken."]}
+            )
 
 
 class OrderListSerializer(OrderSerializer):
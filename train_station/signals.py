@@ -0,0 +1,125 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from train_station import (
+    distance_matrix,
+    events,
+    itineraries,
+    response_cache,
+    route_graph,
+    station_index,
+)
+from train_station.models import (
+    Crew,
+    Journey,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+
+# Models whose changes show up in journey list responses
+JOURNEY_LIST_MODELS = (Journey, Ticket, Route, Station, Train, TrainType, Crew)
+
+
+@receiver(post_save, sender=Ticket)
+def publish_seat_taken(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(
+            lambda: events.publish(
+                instance.journey_id,
+                events.SEAT_TAKEN,
+                instance.cargo,
+                instance.seat,
+            )
+        )
+
+
+@receiver(post_delete, sender=Ticket)
+def publish_seat_released(sender, instance, **kwargs):
+    transaction.on_commit(
+        lambda: events.publish(
+            instance.journey_id,
+            events.SEAT_RELEASED,
+            instance.cargo,
+            instance.seat,
+        )
+    )
+
+
+def invalidate_journey_lists(sender, **kwargs):
+    response_cache.invalidate()
+
+
+# Connected per model: a receiver for every sender would stop Django from
+# deleting rows of other models without loading them first
+for model in JOURNEY_LIST_MODELS:
+    post_save.connect(invalidate_journey_lists, sender=model)
+    post_delete.connect(invalidate_journey_lists, sender=model)
+
+
+@receiver(m2m_changed, sender=Journey.crew.through)
+def invalidate_journey_lists_on_crew_change(sender, action, **kwargs):
+    if action.startswith("post_"):
+        response_cache.invalidate()
+
+
+def invalidate_all() -> None:
+    """For bulk writes, they send no signals"""
+    response_cache.invalidate()
+    itineraries.invalidate_all()
+    route_graph.invalidate()
+    station_index.invalidate()
+    distance_matrix.invalidate()
+
+
+@receiver(post_save, sender=Journey)
+def invalidate_timetable_on_save(sender, instance, created, **kwargs):
+    if created:
+        itineraries.invalidate_day(instance.departure_time)
+    else:
+        # the previous departure day is not known any more
+        itineraries.invalidate_all()
+
+
+@receiver(post_delete, sender=Journey)
+def invalidate_timetable_on_delete(sender, instance, **kwargs):
+    itineraries.invalidate_day(instance.departure_time)
+
+
+@receiver(post_save, sender=Route)
+@receiver(post_delete, sender=Route)
+def invalidate_timetables_on_route_change(sender, **kwargs):
+    if not kwargs.get("created"):
+        itineraries.invalidate_all()
+
+
+@receiver(post_save, sender=Route)
+@receiver(post_delete, sender=Route)
+@receiver(post_save, sender=Station)
+@receiver(post_delete, sender=Station)
+def invalidate_route_graph(sender, **kwargs):
+    route_graph.invalidate()
+
+
+@receiver(post_save, sender=Station)
+@receiver(post_delete, sender=Station)
+def invalidate_station_index(sender, **kwargs):
+    station_index.invalidate()
+
+
+@receiver(post_save, sender=Route)
+@receiver(post_delete, sender=Route)
+def update_distance_matrix(sender, instance, created=False, **kwargs):
+    # only a new route can be relaxed into the matrix, the previous
+    # stations and distance of a changed route are not known
+    if created:
+        transaction.on_commit(
+            lambda: distance_matrix.invalidate(
+                instance.source_id, instance.destination_id
+            )
+        )
+    else:
+        transaction.on_commit(distance_matrix.invalidate)
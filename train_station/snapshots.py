@@ -0,0 +1,113 @@
+"""Process-level, read-only snapshots of data the search endpoints need.
+
+A snapshot is built from the database once per process and kept until its
+version changes. Versions live in the "versions" cache, which every worker
+process and management command shares and which is not part of database
+transactions (files by default, Redis or memcached across hosts). Signal
+receivers replace a version once the transaction that changed the
+underlying rows commits, so each process notices a change on its next
+request and rebuilds only the affected part.
+
+A new version is a random value rather than an incremented counter, so
+replacing it needs no read and never waits for other writers.
+"""
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.db import transaction
+
+VERSIONS_ALIAS = "versions"
+
+
+def versions(keys: list[str]) -> dict[str, str]:
+    """Current versions of `keys`, missing ones are created"""
+    cache = caches[VERSIONS_ALIAS]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            found[key] = cache.get(key)
+    return found
+
+
+def bump(key: str) -> None:
+    caches[VERSIONS_ALIAS].set(key, uuid.uuid4().hex, timeout=None)
+
+
+def bump_on_commit(key: str, using: str | None = None) -> None:
+    """Bump `key` when the current transaction commits, right away outside
+    of one. Calling it again in the same transaction adds nothing.
+
+    Readers take the version before reading rows, so a value built from
+    rows read before the commit is stored under the old version and never
+    served after the bump.
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        bump(key)
+        return
+
+    pending = connection.__dict__.setdefault("pending_version_bumps", {})
+    registered = pending.get(key)
+    if registered is not None:
+        index, callback = registered
+        # gone if the transaction or its savepoint was rolled back
+        callbacks = connection.run_on_commit
+        if index < len(callbacks) and callbacks[index][1] is callback:
+            return
+
+    def callback():
+        if pending.get(key, (None, None))[1] is callback:
+            del pending[key]
+        bump(key)
+
+    transaction.on_commit(callback, using=using)
+    pending[key] = (len(connection.run_on_commit) - 1, callback)
+
+
+class Snapshot:
+    """Lazily built value, optionally split in parts (e.g. one per day).
+
+    `build(part)` returns the value of a part. A part is rebuilt when its
+    own version or the version of the whole snapshot changes.
+    """
+
+    def __init__(self, name: str, build, max_parts: int = 64):
+        self.name = name
+        self.build = build
+        self.max_parts = max_parts
+        self._built = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _version_key(self, part=None) -> str:
+        if part is None:
+            return f"snapshot:{self.name}:version"
+        return f"snapshot:{self.name}:{part}:version"
+
+    def version(self, part=None) -> tuple:
+        keys = [self._version_key(), self._version_key(part)]
+        found = versions(keys)
+        return tuple(found[key] for key in keys)
+
+    def get(self, part=None):
+        version = self.version(part)
+        built = self._built.get(part)
+        if built is not None and built[0] == version:
+            return built[1]
+
+        with self._lock:
+            built = self._built.get(part)
+            if built is None or built[0] != version:
+                built = (version, self.build(part))
+                self._built[part] = built
+                self._built.move_to_end(part)
+                while len(self._built) > self.max_parts:
+                    self._built.popitem(last=False)
+            return built[1]
+
+    def invalidate(self, part=None) -> None:
+        """Rebuild a part, or with no part everything, in every process,
+        once the current transaction commits"""
+        bump_on_commit(self._version_key(part))
@@ -0,0 +1,137 @@
+"""Grid index of station coordinates kept in memory by every process.
+
+Stations with coordinates are bucketed in cells of CELL_DEGREES latitude
+by CELL_DEGREES longitude. A search only visits the cells of the bounding
+box of its radius, row by row from the closest latitude, and stops once no
+remaining row can hold a station closer than the ones found. Near a pole
+the box spans every longitude but few rows, so the number of cells stays
+bounded however many stations there are. The index is loaded with one
+query per process and rebuilt when a station changes (see
+train_station.snapshots).
+"""
+import heapq
+import math
+from array import array
+from collections import defaultdict
+
+from train_station.geo import EARTH_RADIUS_KM, haversine
+from train_station.models import Station
+from train_station.snapshots import Snapshot
+
+CELL_DEGREES = 0.25
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+class StationIndex:
+    def __init__(self, stations, cell_degrees: float = CELL_DEGREES):
+        """`stations` are (station id, latitude, longitude) tuples"""
+        self.cell_degrees = cell_degrees
+        self.rows = round(180 / cell_degrees)
+        self.columns = round(360 / cell_degrees)
+        self.station_ids = array("q")
+        self.latitudes = array("d")
+        self.longitudes = array("d")
+        cells = defaultdict(lambda: array("q"))
+        for position, (station_id, latitude, longitude) in enumerate(
+            stations
+        ):
+            self.station_ids.append(station_id)
+            self.latitudes.append(latitude)
+            self.longitudes.append(longitude)
+            cells[self.cell(latitude, longitude)].append(position)
+        self.cells = dict(cells)
+
+    def __len__(self):
+        return len(self.station_ids)
+
+    def cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        row = min(int((latitude + 90) // self.cell_degrees), self.rows - 1)
+        column = int((longitude + 180) // self.cell_degrees) % self.columns
+        return row, column
+
+    def rows_within(
+        self, latitude: float, radius: float
+    ) -> list[tuple[float, int]]:
+        """(km to the row at least, row) of rows `radius` reaches, closest
+        first"""
+        span = radius / KM_PER_DEGREE
+        first, _ = self.cell(max(-90.0, latitude - span), 0)
+        last, _ = self.cell(min(90.0, latitude + span), 0)
+        rows = []
+        for row in range(first, last + 1):
+            south = row * self.cell_degrees - 90
+            north = south + self.cell_degrees
+            gap = max(0.0, south - latitude, latitude - north)
+            rows.append((gap * KM_PER_DEGREE, row))
+        rows.sort()
+        return rows
+
+    def columns_within(
+        self, latitude: float, longitude: float, radius: float
+    ):
+        """Columns `radius` can reach, all of them once it covers a pole"""
+        span = radius / KM_PER_DEGREE
+        if latitude + span >= 90 or latitude - span <= -90:
+            return range(self.columns)
+        # a degree of longitude is narrowest at the highest latitude reached
+        highest = max(abs(latitude - span), abs(latitude + span))
+        span /= math.cos(math.radians(highest))
+        first = math.floor((longitude - span + 180) / self.cell_degrees)
+        last = math.floor((longitude + span + 180) / self.cell_degrees)
+        if last - first + 1 >= self.columns:
+            return range(self.columns)
+        # columns wrap around the antimeridian
+        return [column % self.columns for column in range(first, last + 1)]
+
+    def nearby(
+        self,
+        latitude: float,
+        longitude: float,
+        radius: float,
+        limit: int,
+    ) -> list[tuple[int, float]]:
+        """(station id, km) of the `limit` closest stations within `radius`"""
+        columns = self.columns_within(latitude, longitude, radius)
+        closest = []  # heap of (-distance, -station id), farthest first
+        for bound, row in self.rows_within(latitude, radius):
+            # any station in this row or the next ones is farther than this
+            if len(closest) == limit and -closest[0][0] < bound:
+                break
+            for column in columns:
+                for position in self.cells.get((row, column), ()):
+                    distance = haversine(
+                        latitude,
+                        longitude,
+                        self.latitudes[position],
+                        self.longitudes[position],
+                    )
+                    if distance > radius:
+                        continue
+                    item = (-distance, -self.station_ids[position])
+                    if len(closest) < limit:
+                        heapq.heappush(closest, item)
+                    elif item > closest[0]:
+                        heapq.heapreplace(closest, item)
+        return sorted(
+            ((-station_id, -distance) for distance, station_id in closest),
+            key=lambda item: (item[1], item[0]),
+        )
+
+
+def build_index(part=None) -> StationIndex:
+    return StationIndex(
+        Station.objects.filter(
+            latitude__isnull=False, longitude__isnull=False
+        ).values_list("id", "latitude", "longitude")
+    )
+
+
+index = Snapshot("station_index", build_index)
+
+
+def get_index() -> StationIndex:
+    return index.get()
+
+
+def invalidate() -> None:
+    index.invalidate()
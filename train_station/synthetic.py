@@ -0,0 +1,327 @@
+import random
+from datetime import date, datetime, time, timedelta
+from typing import Callable
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from train_station.geo import haversine
+from train_station.models import (
+    Crew,
+    Journey,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+
+TRAIN_TYPES = ("Express", "Intercity", "Regional", "Night")
+PLACES_IN_CARGO = (36, 54, 64, 80)
+# Order sizes and their weights (most orders contain a single ticket)
+ORDER_SIZES = (1, 2, 3, 4)
+ORDER_SIZE_WEIGHTS = (50, 25, 15, 10)
+# Bounding box stations are spread over (roughly Ukraine)
+LATITUDE_RANGE = (44.4, 52.3)
+LONGITUDE_RANGE = (22.1, 40.2)
+PASSWORD = "synthetic_12345"
+
+
+def _noop(message: str) -> None:
+    pass
+
+
+def generate_dataset(
+    stations: int = 100,
+    routes_per_station: int = 3,
+    trains: int = 50,
+    crews: int = 100,
+    days: int = 30,
+    departures_per_route: int = 1,
+    users: int = 1000,
+    tickets: int = 10000,
+    seed: int = 42,
+    start_date: date | None = None,
+    batch_size: int = 5000,
+    log: Callable[[str], None] = _noop,
+) -> dict[str, int]:
+    """Fill the database with a reproducible synthetic dataset.
+
+    Everything is inserted with bulk_create, so model save() validation is
+    skipped; generated values always satisfy it. The same arguments and seed
+    produce the same data on an empty database.
+    """
+    rng = random.Random(seed)
+    start_date = start_date or timezone.localdate()
+
+    with transaction.atomic():
+        station_objs = _create_stations(rng, stations, batch_size)
+        log(f"Created {len(station_objs)} stations")
+
+        route_objs = _create_routes(
+            rng, station_objs, routes_per_station, batch_size
+        )
+        log(f"Created {len(route_objs)} routes")
+
+        train_objs = _create_trains(rng, trains, batch_size)
+        crew_objs = Crew.objects.bulk_create(
+            [
+                Crew(first_name=f"Crew{i}", last_name=f"Member{i}")
+                for i in range(crews)
+            ],
+            batch_size=batch_size,
+        )
+        log(f"Created {len(train_objs)} trains and {len(crew_objs)} crews")
+
+        journey_objs = _create_journeys(
+            rng,
+            route_objs,
+            train_objs,
+            crew_objs,
+            start_date,
+            days,
+            departures_per_route,
+            batch_size,
+        )
+        log(f"Created {len(journey_objs)} journeys")
+
+        user_objs = _create_users(users, batch_size)
+        log(f"Created {len(user_objs)} users")
+
+        orders_count, tickets_count = _create_orders(
+            rng, journey_objs, user_objs, tickets, batch_size, log
+        )
+        log(f"Created {orders_count} orders with {tickets_count} tickets")
+
+    return {
+        "stations": len(station_objs),
+        "routes": len(route_objs),
+        "trains": len(train_objs),
+        "crews": len(crew_objs),
+        "journeys": len(journey_objs),
+        "users": len(user_objs),
+        "orders": orders_count,
+        "tickets": tickets_count,
+    }
+
+
+def _create_stations(rng, count: int, batch_size: int) -> list[Station]:
+    return Station.objects.bulk_create(
+        [
+            Station(
+                name=f"Station {i:06d}",
+                latitude=round(rng.uniform(*LATITUDE_RANGE), 6),
+                longitude=round(rng.uniform(*LONGITUDE_RANGE), 6),
+            )
+            for i in range(count)
+        ],
+        batch_size=batch_size,
+    )
+
+
+def _create_routes(
+    rng, stations: list[Station], routes_per_station: int, batch_size: int
+) -> list[Route]:
+    """Connect every station with a few neighbours in both directions.
+
+    Neighbours are picked among stations close in longitude, which gives a
+    connected, mostly local network without an O(n^2) nearest search.
+    """
+    ordered = sorted(stations, key=lambda station: station.longitude)
+    window = max(routes_per_station * 2, 2)
+    pairs = set()
+    for index, source in enumerate(ordered):
+        candidates = ordered[index + 1:index + 1 + window]
+        if index + 1 < len(ordered):
+            # keep the network connected
+            pairs.add((source, ordered[index + 1]))
+        for destination in rng.sample(
+            candidates, min(routes_per_station, len(candidates))
+        ):
+            pairs.add((source, destination))
+
+    routes = []
+    for source, destination in sorted(
+        pairs, key=lambda pair: (pair[0].id, pair[1].id)
+    ):
+        # rails are longer than the great-circle distance
+        distance = max(
+            int(
+                haversine(
+                    source.latitude,
+                    source.longitude,
+                    destination.latitude,
+                    destination.longitude,
+                ) * 1.2
+            ),
+            1,
+        )
+        routes.append(
+            Route(source=source, destination=destination, distance=distance)
+        )
+        routes.append(
+            Route(source=destination, destination=source, distance=distance)
+        )
+
+    return Route.objects.bulk_create(routes, batch_size=batch_size)
+
+
+def _create_trains(rng, count: int, batch_size: int) -> list[Train]:
+    train_types = [
+        TrainType.objects.get_or_create(name=name)[0] for name in TRAIN_TYPES
+    ]
+    return Train.objects.bulk_create(
+        [
+            Train(
+                name=f"Train {i:05d}",
+                cargo_num=rng.randint(3, 20),
+                places_in_cargo=rng.choice(PLACES_IN_CARGO),
+                train_type=rng.choice(train_types),
+            )
+            for i in range(count)
+        ],
+        batch_size=batch_size,
+    )
+
+
+def _create_journeys(
+    rng,
+    routes: list[Route],
+    trains: list[Train],
+    crews: list[Crew],
+    start_date: date,
+    days: int,
+    departures_per_route: int,
+    batch_size: int,
+) -> list[Journey]:
+    tz = timezone.get_current_timezone()
+    journeys = []
+    for day in range(days):
+        midnight = timezone.make_aware(
+            datetime.combine(start_date + timedelta(days=day), time.min), tz
+        )
+        for route in routes:
+            for _ in range(departures_per_route):
+                departure = midnight + timedelta(
+                    minutes=rng.randrange(5 * 60, 23 * 60, 5)
+                )
+                speed = rng.randint(60, 160)
+                duration = timedelta(
+                    minutes=max(int(route.distance / speed * 60), 15)
+                )
+                journeys.append(
+                    Journey(
+                        route=route,
+                        train=rng.choice(trains),
+                        departure_time=departure,
+                        arrival_time=departure + duration,
+                    )
+                )
+    journeys = Journey.objects.bulk_create(journeys, batch_size=batch_size)
+
+    if crews:
+        through = Journey.crew.through
+        through.objects.bulk_create(
+            [
+                through(journey_id=journey.id, crew_id=crew.id)
+                for journey in journeys
+                for crew in rng.sample(crews, min(2, len(crews)))
+            ],
+            batch_size=batch_size,
+        )
+
+    return journeys
+
+
+def _create_users(count: int, batch_size: int) -> list:
+    user_model = get_user_model()
+    # hashing once instead of per user keeps this fast
+    password = make_password(PASSWORD)
+    return user_model.objects.bulk_create(
+        [
+            user_model(email=f"user{i}@example.com", password=password)
+            for i in range(count)
+        ],
+        batch_size=batch_size,
+    )
+
+
+def _create_orders(
+    rng,
+    journeys: list[Journey],
+    users: list,
+    tickets: int,
+    batch_size: int,
+    log: Callable[[str], None],
+) -> tuple[int, int]:
+    """Sell `tickets` unique seats spread over journeys and users"""
+    if not tickets:
+        return 0, 0
+    if not journeys or not users:
+        raise ValueError("Journeys and users are required to create tickets")
+
+    trains = {journey.id: journey.train for journey in journeys}
+    capacity = sum(
+        trains[journey.id].cargo_num * trains[journey.id].places_in_cargo
+        for journey in journeys
+    )
+    if tickets > capacity:
+        raise ValueError(
+            f"Cannot sell {tickets} tickets, only {capacity} seats available"
+        )
+
+    sold = {}
+    open_journeys = list(journeys)
+    orders_count = tickets_count = 0
+
+    while tickets_count < tickets and open_journeys:
+        orders = []
+        planned = []
+        remaining = tickets - tickets_count
+        while remaining and len(orders) < batch_size:
+            size = min(
+                rng.choices(ORDER_SIZES, weights=ORDER_SIZE_WEIGHTS)[0],
+                remaining,
+            )
+            orders.append(Order(user=rng.choice(users)))
+            planned.append(size)
+            remaining -= size
+        orders = Order.objects.bulk_create(orders, batch_size=batch_size)
+
+        ticket_objs = []
+        for order, size in zip(orders, planned):
+            journey = rng.choice(open_journeys)
+            train = trains[journey.id]
+            seats = train.cargo_num * train.places_in_cargo
+            for _ in range(size):
+                taken = sold.get(journey.id, 0)
+                # the replacement can be full too
+                while taken >= seats:
+                    open_journeys.remove(journey)
+                    if not open_journeys:
+                        break
+                    journey = rng.choice(open_journeys)
+                    train = trains[journey.id]
+                    seats = train.cargo_num * train.places_in_cargo
+                    taken = sold.get(journey.id, 0)
+                if taken >= seats:
+                    break  # every seat is sold
+                sold[journey.id] = taken + 1
+                ticket_objs.append(
+                    Ticket(
+                        order=order,
+                        journey=journey,
+                        cargo=taken // train.places_in_cargo + 1,
+                        seat=taken % train.places_in_cargo + 1,
+                    )
+                )
+        Ticket.objects.bulk_create(ticket_objs, batch_size=batch_size)
+
+        orders_count += len(orders)
+        tickets_count += len(ticket_objs)
+        log(f"  {tickets_count}/{tickets} tickets")
+
+    return orders_count, tickets_count
@@ -0,0 +1,72 @@
+"""Background jobs of the train_station app, run by `manage.py run_jobs`"""
+import hashlib
+import io
+import os
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from train_station.models import Train
+
+IMAGE_VARIANT_WIDTHS = (320, 640, 1280)
+IMAGE_VARIANT_FORMATS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "jpeg": {
+        "format": "JPEG",
+        "quality": 82,
+        "optimize": True,
+        "progressive": True,
+    },
+}
+IMAGE_VARIANTS_DIR = "uploads/trains/variants/"
+
+
+def _variant_widths(width: int) -> list[int]:
+    """Widths to generate, images are never upscaled"""
+    return [w for w in IMAGE_VARIANT_WIDTHS if w < width] or [width]
+
+
+def _save_variant(content: bytes, width: int, extension: str) -> str:
+    """Store content under a name derived from its hash, return the name"""
+    digest = hashlib.sha256(content).hexdigest()[:20]
+    name = os.path.join(IMAGE_VARIANTS_DIR, f"{digest}-{width}w.{extension}")
+    # the same content always gets the same name, store it once
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(content))
+    return name
+
+
+def generate_train_image_variants(train_id: int) -> None:
+    """Resize the image of a train to WebP and JPEG variants"""
+    # Pillow is only needed by workers, keep it out of web process startup
+    from PIL import Image, ImageOps
+
+    train = Train.objects.filter(id=train_id).first()
+    if train is None or not train.image:
+        return
+    source_name = train.image.name
+
+    with train.image.open("rb") as fp:
+        image = ImageOps.exif_transpose(Image.open(fp))
+        image.load()
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    variants = {extension: {} for extension in IMAGE_VARIANT_FORMATS}
+    for width in _variant_widths(image.width):
+        height = max(round(image.height * width / image.width), 1)
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+        for extension, options in IMAGE_VARIANT_FORMATS.items():
+            variant = resized
+            if options["format"] == "JPEG" and variant.mode != "RGB":
+                variant = variant.convert("RGB")
+            buffer = io.BytesIO()
+            variant.save(buffer, **options)
+            variants[extension][str(width)] = _save_variant(
+                buffer.getvalue(), width, extension
+            )
+
+    # skip the result if another image was uploaded in the meantime
+    Train.objects.filter(id=train_id, image=source_name).update(
+        image_variants=variants
+    )
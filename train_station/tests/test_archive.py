@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from train_station.models import (
+    ArchivedJourney,
+    ArchivedOrder,
+    Crew,
+    Journey,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+
+ORDER_URL = reverse("train_station:order-list")
+ARCHIVED_ORDER_URL = reverse("train_station:order-archived")
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.route = Route.objects.create(
+            source=Station.objects.create(name="Kyiv"),
+            destination=Station.objects.create(name="Lviv"),
+            distance=540,
+        )
+        self.train = Train.objects.create(
+            name="Sample_train",
+            cargo_num=10,
+            places_in_cargo=50,
+            train_type=TrainType.objects.create(name="Express"),
+        )
+        self.past = self.journey(datetime(2020, 5, 1, 8, 0))
+        self.past.crew.add(
+            Crew.objects.create(first_name="Ivan", last_name="Franko")
+        )
+        self.past_shared = self.journey(datetime(2020, 5, 2, 8, 0))
+        self.future = self.journey(timezone.now() + timedelta(days=3))
+
+        self.old_order = self.order((self.past, 1), (self.past_shared, 1))
+        self.mixed_order = self.order((self.past_shared, 2), (self.future, 1))
+
+    def journey(self, departure):
+        if timezone.is_naive(departure):
+            departure = timezone.make_aware(departure)
+        return Journey.objects.create(
+            route=self.route,
+            train=self.train,
+            departure_time=departure,
+            arrival_time=departure + timedelta(hours=6),
+        )
+
+    def order(self, *tickets):
+        order = Order.objects.create(user=self.user)
+        for journey, seat in tickets:
+            Ticket.objects.create(
+                cargo=1, seat=seat, journey=journey, order=order
+            )
+        return order
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command(
+            "archive_journeys",
+            f"--before={timezone.localdate().isoformat()}",
+            *args,
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def test_moves_finished_orders_and_journeys(self):
+        live = self.client.get(ORDER_URL).data["results"]
+
+        output = self.archive("--batch-size=1")
+
+        self.assertIn("Archived 1 orders and 1 journeys", output)
+        self.assertFalse(Order.objects.filter(id=self.old_order.id).exists())
+        self.assertTrue(Order.objects.filter(id=self.mixed_order.id).exists())
+        self.assertEqual(
+            list(Journey.objects.order_by("id").values_list("id", flat=True)),
+            [self.past_shared.id, self.future.id],
+        )
+        self.assertEqual(self.past_shared.tickets.count(), 1)
+        archived_journey = ArchivedJourney.objects.get()
+        self.assertEqual(archived_journey.id, self.past.id)
+        self.assertEqual(archived_journey.data["crew"], ["Ivan Franko"])
+
+        res = self.client.get(ARCHIVED_ORDER_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 1)
+        expected = next(o for o in live if o["id"] == self.old_order.id)
+        self.assertEqual(res.data["results"][0], expected)
+
+    def test_empty_orders_are_archived_once_old(self):
+        new = Order.objects.create(user=self.user)
+        old = Order.objects.create(user=self.user)
+        Order.objects.filter(id=old.id).update(
+            created_at=timezone.make_aware(datetime(2020, 5, 1))
+        )
+
+        self.archive()
+
+        self.assertTrue(Order.objects.filter(id=new.id).exists())
+        self.assertFalse(Order.objects.filter(id=old.id).exists())
+
+    def test_snapshots_are_invalidated(self):
+        with mock.patch(
+            "train_station.archive.route_graph.invalidate"
+        ) as graph, mock.patch(
+            "train_station.archive.station_index.invalidate"
+        ) as index:
+            self.archive()
+
+        graph.assert_called_once()
+        index.assert_called_once()
+
+    def test_archived_orders_are_private(self):
+        self.archive()
+        other = get_user_model().objects.create_user(
+            "other@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.get(ARCHIVED_ORDER_URL)
+
+        self.assertEqual(res.data["count"], 0)
+
+    def test_dry_run(self):
+        output = self.archive("--dry-run")
+
+        self.assertIn("Would archive 1 orders", output)
+        self.assertFalse(ArchivedOrder.objects.exists())
+        self.assertEqual(Order.objects.count(), 2)
+
+    def test_future_cut_off_is_rejected(self):
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        with self.assertRaises(CommandError):
+            call_command(
+                "archive_journeys",
+                f"--before={tomorrow.isoformat()}",
+                stdout=StringIO(),
+            )
@@ -0,0 +1,175 @@
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, TestCase
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from train_station.models import (
+    Crew,
+    Journey,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+from train_station.serializers import (
+    JourneyDetailSerializer,
+    StationSerializer,
+)
+
+JOURNEY_URL = reverse("train_station:async-journey-list")
+STATION_URL = reverse("train_station:async-station-list")
+
+
+def detail_url(journey_id):
+    return reverse("train_station:async-journey-detail", args=[journey_id])
+
+
+def seats_url(journey_id):
+    return reverse("train_station:async-journey-seats", args=[journey_id])
+
+
+class AsyncApiTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client = AsyncClient()
+        self.headers = {
+            "authorization": f"Bearer {AccessToken.for_user(self.user)}"
+        }
+
+        self.crew = Crew.objects.create(
+            first_name="Test_name", last_name="Test_last_name"
+        )
+        self.station_1 = Station.objects.create(
+            name="Station_1", latitude=1.23, longitude=2.22
+        )
+        self.station_2 = Station.objects.create(
+            name="Station_2", latitude=2.23, longitude=3.22
+        )
+        self.route = Route.objects.create(
+            source=self.station_1, destination=self.station_2, distance=233
+        )
+        self.train = Train.objects.create(
+            name="Sample_train",
+            cargo_num=2,
+            places_in_cargo=3,
+            train_type=TrainType.objects.create(name="Test_train_type"),
+        )
+        self.journeys = [
+            Journey.objects.create(
+                route=self.route,
+                train=self.train,
+                departure_time=datetime(2025, 10, 23 + i, 8, 0),
+                arrival_time=datetime(2025, 10, 23 + i, 14, 0),
+            )
+            for i in range(5)
+        ]
+        self.journeys[0].crew.add(self.crew)
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(
+            journey=self.journeys[0], order=order, cargo=1, seat=2
+        )
+
+    async def test_auth_required(self):
+        res = await self.client.get(JOURNEY_URL)
+
+        self.assertEqual(res.status_code, 401)
+
+    async def test_invalid_token(self):
+        res = await self.client.get(
+            JOURNEY_URL, headers={"authorization": "Bearer invalid"}
+        )
+
+        self.assertEqual(res.status_code, 401)
+
+    async def test_only_get_allowed(self):
+        res = await self.client.post(JOURNEY_URL, headers=self.headers)
+
+        self.assertEqual(res.status_code, 405)
+
+    async def test_list_journeys_is_paginated(self):
+        res = await self.client.get(JOURNEY_URL, headers=self.headers)
+        data = res.json()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data["count"], 5)
+        self.assertEqual(len(data["results"]), 4)
+        self.assertIsNone(data["previous"])
+        self.assertIn("page=2", data["next"])
+        self.assertEqual(data["results"][0]["id"], self.journeys[0].id)
+        self.assertEqual(data["results"][0]["tickets_available"], 5)
+        self.assertEqual(data["results"][0]["source_name"], "Station_1")
+        self.assertEqual(data["results"][0]["crew"], [self.crew.full_name])
+
+        res = await self.client.get(
+            JOURNEY_URL, {"page": 2}, headers=self.headers
+        )
+
+        self.assertEqual(len(res.json()["results"]), 1)
+
+    async def test_filter_journeys(self):
+        res = await self.client.get(
+            JOURNEY_URL, {"departure_time": "2025-10-24"}, headers=self.headers
+        )
+
+        self.assertEqual(
+            [journey["id"] for journey in res.json()["results"]],
+            [self.journeys[1].id],
+        )
+
+    async def test_invalid_filter(self):
+        res = await self.client.get(
+            JOURNEY_URL, {"train": "abc"}, headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, 400)
+
+    async def test_journey_detail_matches_sync_serializer(self):
+        res = await self.client.get(
+            detail_url(self.journeys[0].id), headers=self.headers
+        )
+
+        expected = await sync_to_async(
+            lambda: JourneyDetailSerializer(
+                Journey.objects.get(id=self.journeys[0].id)
+            ).data
+        )()
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), expected)
+
+    async def test_journey_detail_not_found(self):
+        res = await self.client.get(detail_url(0), headers=self.headers)
+
+        self.assertEqual(res.status_code, 404)
+
+    async def test_journey_seats(self):
+        res = await self.client.get(
+            seats_url(self.journeys[0].id), headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json(), {
+            "journey": self.journeys[0].id,
+            "cargo_num": 2,
+            "places_in_cargo": 3,
+            "capacity": 6,
+            "tickets_available": 5,
+            "taken_places": [{"cargo": 1, "seat": 2}],
+        })
+
+    async def test_list_stations(self):
+        res = await self.client.get(STATION_URL, headers=self.headers)
+
+        expected = await sync_to_async(
+            lambda: StationSerializer(
+                Station.objects.order_by("id"), many=True
+            ).data
+        )()
+        self.assertEqual(res.json()["results"], expected)
@@ -0,0 +1,104 @@
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from train_station.models import Journey, Route, Station, Train, TrainType
+
+STATION_URL = reverse("train_station:station-list")
+TRAIN_URL = reverse("train_station:train-list")
+ROUTE_URL = reverse("train_station:route-list")
+JOURNEY_URL = reverse("train_station:journey-list")
+
+
+class BatchRetrieveApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+        self.stations = [
+            Station.objects.create(name=f"Station_{i}") for i in range(3)
+        ]
+        self.route = Route.objects.create(
+            source=self.stations[0],
+            destination=self.stations[1],
+            distance=233,
+        )
+        self.train = Train.objects.create(
+            name="Sample_train",
+            cargo_num=10,
+            places_in_cargo=50,
+            train_type=TrainType.objects.create(name="Test_train_type"),
+        )
+        self.journeys = [
+            Journey.objects.create(
+                route=self.route,
+                train=self.train,
+                departure_time=datetime(2025, 10, 23, 8 + i, 0),
+                arrival_time=datetime(2025, 10, 23, 14 + i, 0),
+            )
+            for i in range(3)
+        ]
+
+    def test_results_keep_requested_order(self):
+        ids = [self.stations[2].id, self.stations[0].id, self.stations[1].id]
+
+        res = self.client.get(STATION_URL, {"ids": ",".join(map(str, ids))})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["id"] for item in res.data["results"]], ids)
+        self.assertEqual(res.data["not_found"], [])
+
+    def test_missing_ids_are_reported(self):
+        missing_id = self.train.id + 100
+
+        res = self.client.get(TRAIN_URL, {"ids": f"{missing_id},{self.train.id}"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 1)
+        self.assertEqual(
+            res.data["results"][0], {"id": missing_id, "detail": "Not found."}
+        )
+        self.assertEqual(res.data["results"][1]["name"], self.train.name)
+        self.assertEqual(res.data["not_found"], [missing_id])
+
+    def test_route_batch(self):
+        res = self.client.get(ROUTE_URL, {"ids": str(self.route.id)})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"][0]["id"], self.route.id)
+
+    def test_journeys_resolved_in_constant_queries(self):
+        ids = ",".join(str(journey.id) for journey in self.journeys)
+
+        with CaptureQueriesContext(connection) as one:
+            self.client.get(JOURNEY_URL, {"ids": str(self.journeys[0].id)})
+        with CaptureQueriesContext(connection) as many:
+            res = self.client.get(JOURNEY_URL, {"ids": ids})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data["results"]), 3)
+        self.assertIn("tickets_available", res.data["results"][0])
+        self.assertEqual(len(one.captured_queries), len(many.captured_queries))
+
+    def test_invalid_ids(self):
+        res = self.client.get(STATION_URL, {"ids": "1,abc"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_too_many_ids(self):
+        res = self.client.get(
+            STATION_URL, {"ids": ",".join(str(i) for i in range(1, 52))}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
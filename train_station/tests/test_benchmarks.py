@@ -0,0 +1,100 @@
+from django.test import override_settings, TestCase
+
+from train_station.benchmarks import (
+    ENDPOINTS,
+    START_DATE,
+    compare,
+    run_benchmarks,
+)
+from train_station.synthetic import generate_dataset
+
+
+def sample_report(database="postgresql", **result):
+    return {
+        "database": database,
+        "results": {
+            "journeys.list": {
+                "status": [200],
+                "p50_ms": 4.0,
+                "p95_ms": 5.0,
+                "queries": 4,
+                "bytes": 1000,
+                **result,
+            }
+        },
+    }
+
+
+@override_settings(REQUEST_TIMING={"ENABLED": False})
+class RunBenchmarksTests(TestCase):
+    def test_every_endpoint_succeeds(self):
+        generate_dataset(
+            stations=5,
+            trains=2,
+            crews=2,
+            days=2,
+            users=5,
+            tickets=20,
+            start_date=START_DATE,
+        )
+
+        results = run_benchmarks(iterations=2, warmup=0)
+
+        self.assertEqual(
+            list(results), [endpoint.name for endpoint in ENDPOINTS]
+        )
+        for name, result in results.items():
+            for code in result["status"]:
+                self.assertLess(code, 300, name)
+            self.assertGreater(result["p95_ms"], 0, name)
+        self.assertGreater(
+            results["orders.create_10"]["queries"],
+            results["orders.create_1"]["queries"],
+        )
+
+
+class CompareTests(TestCase):
+    def test_no_regressions(self):
+        self.assertEqual(
+            compare(sample_report(p95_ms=6.0), sample_report()), []
+        )
+
+    def test_query_and_bytes_regressions(self):
+        regressions = compare(
+            sample_report(queries=5, bytes=1200), sample_report()
+        )
+
+        self.assertEqual(
+            regressions,
+            [
+                "journeys.list: 4 -> 5 queries",
+                "journeys.list: 1000 -> 1200 bytes",
+            ],
+        )
+
+    def test_latency_only_compared_on_same_database(self):
+        slow = sample_report(p95_ms=50.0)
+
+        self.assertEqual(
+            compare(slow, sample_report()),
+            ["journeys.list: p95 5.0 -> 50.0 ms"],
+        )
+        self.assertEqual(compare(slow, sample_report("sqlite")), [])
+
+    def test_status_change(self):
+        self.assertEqual(
+            compare(sample_report(status=[500]), sample_report()),
+            ["journeys.list: status [200] -> [500]"],
+        )
+
+    def test_endpoint_missing_from_baseline(self):
+        baseline = sample_report()
+        baseline["results"] = {}
+
+        self.assertEqual(
+            compare(sample_report(), baseline),
+            [
+                "journeys.list: not in the baseline, "
+                "run with --update-baseline"
+            ],
+        )
@@ -0,0 +1,127 @@
+import gzip
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from train_station.bulk import iter_json_array
+from train_station.models import Journey, Order, Station, Ticket
+
+FIXTURE = os.path.join(settings.BASE_DIR, "train_station_data.json")
+
+
+class IterJsonArrayTests(TestCase):
+    def test_items_split_across_chunks(self):
+        data = [{"pk": i, "fields": {"name": "x" * i}} for i in range(50)]
+
+        items = list(iter_json_array(StringIO(json.dumps(data)), chunk_size=7))
+
+        self.assertEqual(items, data)
+
+    def test_truncated_array(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array(StringIO('[{"pk": 1}, {"pk"'), chunk_size=4))
+
+
+class BulkLoadDataTests(TestCase):
+    def test_load_repository_fixture(self):
+        with open(FIXTURE) as fp:
+            fixture = json.load(fp)
+
+        out = StringIO()
+        call_command("bulk_loaddata", FIXTURE, batch_size=3, stdout=out)
+
+        def count(label):
+            return len([obj for obj in fixture if obj["model"] == label])
+
+        self.assertEqual(Station.objects.count(), count("train_station.station"))
+        self.assertEqual(Journey.objects.count(), count("train_station.journey"))
+        self.assertEqual(Ticket.objects.count(), count("train_station.ticket"))
+        self.assertIn("objects/s", out.getvalue())
+
+        dumped_order = next(
+            obj for obj in fixture if obj["model"] == "train_station.order"
+        )
+        order = Order.objects.get(pk=dumped_order["pk"])
+        self.assertEqual(
+            order.created_at.isoformat().replace("+00:00", "Z"),
+            dumped_order["fields"]["created_at"],
+        )
+
+        journey = next(
+            obj for obj in fixture
+            if obj["model"] == "train_station.journey"
+            and obj["fields"]["crew"]
+        )
+        self.assertEqual(
+            sorted(
+                Journey.objects.get(pk=journey["pk"]).crew.values_list(
+                    "id", flat=True
+                )
+            ),
+            sorted(journey["fields"]["crew"]),
+        )
+
+        # sequences continue after the loaded ids
+        station = Station.objects.create(name="New station")
+        self.assertGreater(station.pk, max(
+            obj["pk"] for obj in fixture
+            if obj["model"] == "train_station.station"
+        ))
+
+    def test_load_gzipped_fixture_in_small_buffers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "data.json.gz")
+            with open(FIXTURE, "rb") as src, gzip.open(path, "wb") as dst:
+                dst.write(src.read())
+
+            call_command(
+                "bulk_loaddata", path, buffer_size=5, stdout=StringIO()
+            )
+
+        self.assertTrue(get_user_model().objects.exists())
+        self.assertTrue(Ticket.objects.exists())
+
+    def test_missing_fixture(self):
+        with self.assertRaises(CommandError):
+            call_command("bulk_loaddata", "missing.json", stdout=StringIO())
+
+    def test_timestamps_are_inserted_without_update(self):
+        user = {
+            "model": "user.user",
+            "pk": 1,
+            "fields": {"email": "test@test.com", "password": "x"},
+        }
+        orders = [
+            {
+                "model": "train_station.order",
+                "pk": 1,
+                "fields": {"user": 1, "created_at": "2024-01-02T03:04:05Z"},
+            },
+            {"model": "train_station.order", "pk": 2, "fields": {"user": 1}},
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "data.json")
+            with open(path, "w") as fp:
+                json.dump([user, *orders], fp)
+
+            with CaptureQueriesContext(connection) as queries:
+                call_command("bulk_loaddata", path, stdout=StringIO())
+
+        self.assertFalse([
+            query for query in queries
+            if query["sql"].startswith('UPDATE "train_station_order"')
+        ])
+        self.assertEqual(
+            Order.objects.get(pk=1).created_at.isoformat(),
+            "2024-01-02T03:04:05+00:00",
+        )
+        self.assertIsNotNone(Order.objects.get(pk=2).created_at)
+        self.assertTrue(Order._meta.get_field("created_at").auto_now_add)
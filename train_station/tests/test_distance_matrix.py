@@ -0,0 +1,188 @@
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from jobs.models import Job
+from train_station import distance_matrix
+from train_station.models import Route, Station
+from train_station.route_graph import RouteGraph
+
+DISTANCE_URL = reverse("train_station:route-distance")
+
+
+def temporary_matrix_path(test):
+    tmp = tempfile.TemporaryDirectory()
+    test.addCleanup(tmp.cleanup)
+    path = os.path.join(tmp.name, "distances.bin")
+    override = override_settings(DISTANCE_MATRIX={"PATH": path})
+    override.enable()
+    test.addCleanup(override.disable)
+    return path
+
+
+class DistanceMatrixFileTests(SimpleTestCase):
+    def setUp(self):
+        self.path = temporary_matrix_path(self)
+        self.routes = [(10, 20, 5), (20, 30, 5), (10, 30, 20), (30, 40, 1)]
+
+    def write(self, routes):
+        graph = RouteGraph({s for r in routes for s in r[:2]}, routes)
+        distance_matrix.write_matrix(
+            self.path,
+            graph.station_ids,
+            distance_matrix.shortest_distances(graph),
+        )
+        return distance_matrix.open_matrix(self.path)
+
+    def test_lookup(self):
+        matrix = self.write(self.routes)
+
+        self.assertEqual(list(matrix.station_ids), [10, 20, 30, 40])
+        self.assertEqual(matrix.distance(10, 40), 11)
+        self.assertEqual(matrix.distance(10, 10), 0)
+        # routes are one-way
+        self.assertIsNone(matrix.distance(40, 10))
+        self.assertNotIn(50, matrix)
+        with self.assertRaises(KeyError):
+            matrix.distance(10, 50)
+
+    def test_relaxed_matches_recomputed(self):
+        matrix = self.write(self.routes)
+        new_route = (40, 20, 2)
+
+        relaxed = list(
+            distance_matrix.relaxed_distances(
+                matrix,
+                matrix.position(new_route[0]),
+                matrix.position(new_route[1]),
+                new_route[2],
+            )
+        )
+        recomputed = list(
+            distance_matrix.shortest_distances(
+                RouteGraph([10, 20, 30, 40], self.routes + [new_route])
+            )
+        )
+
+        self.assertEqual(relaxed, recomputed)
+        self.assertEqual(relaxed[3][1], 2)
+
+
+class DistanceMatrixJobTests(TestCase):
+    def setUp(self):
+        self.path = temporary_matrix_path(self)
+        self.kyiv, self.lviv, self.odesa = (
+            Station.objects.create(name=name)
+            for name in ("Kyiv", "Lviv", "Odesa")
+        )
+        self.kyiv_lviv = Route.objects.create(
+            source=self.kyiv, destination=self.lviv, distance=540
+        )
+        Route.objects.create(
+            source=self.lviv, destination=self.odesa, distance=790
+        )
+
+    def distance(self, source, target):
+        return distance_matrix.get_matrix().distance(source.id, target.id)
+
+    def test_rebuild(self):
+        distance_matrix.update_distance_matrix()
+
+        self.assertEqual(self.distance(self.kyiv, self.odesa), 1330)
+        self.assertIsNone(self.distance(self.odesa, self.kyiv))
+
+    def test_new_route_is_relaxed(self):
+        distance_matrix.update_distance_matrix()
+        route = Route.objects.create(
+            source=self.odesa, destination=self.kyiv, distance=480
+        )
+
+        distance_matrix.update_distance_matrix(
+            route.source_id, route.destination_id
+        )
+
+        self.assertEqual(self.distance(self.odesa, self.lviv), 1020)
+        self.assertEqual(self.distance(self.lviv, self.kyiv), 1270)
+
+    def test_changed_route_is_recomputed(self):
+        distance_matrix.update_distance_matrix()
+        self.kyiv_lviv.distance = 600
+        self.kyiv_lviv.save()
+
+        distance_matrix.update_distance_matrix()
+
+        self.assertEqual(self.distance(self.kyiv, self.odesa), 1390)
+
+    def test_route_changes_enqueue_updates(self):
+        task = "train_station.distance_matrix.update_distance_matrix"
+        Job.objects.all().delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            route = Route.objects.create(
+                source=self.odesa, destination=self.kyiv, distance=480
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            route.delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kyiv_lviv.delete()
+
+        self.assertEqual(
+            list(Job.objects.filter(task=task).values_list("args", flat=True)),
+            [[self.odesa.id, self.kyiv.id], []],
+        )
+
+
+class DistanceApiTests(TestCase):
+    def setUp(self):
+        temporary_matrix_path(self)
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        # the route graph is replaced when the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kyiv, self.lviv, self.odesa = (
+                Station.objects.create(name=name)
+                for name in ("Kyiv", "Lviv", "Odesa")
+            )
+            Route.objects.create(
+                source=self.kyiv, destination=self.lviv, distance=540
+            )
+            Route.objects.create(
+                source=self.lviv, destination=self.odesa, distance=790
+            )
+
+    def get(self, source, target):
+        return self.client.get(DISTANCE_URL, {"from": source, "to": target})
+
+    def test_distance(self):
+        distance_matrix.update_distance_matrix()
+
+        res = self.get(self.kyiv.id, self.odesa.id)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data,
+            {"from": self.kyiv.id, "to": self.odesa.id, "distance": 1330},
+        )
+        res = self.get(self.odesa.id, self.kyiv.id)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_falls_back_to_the_route_graph(self):
+        res = self.get(self.kyiv.id, self.odesa.id)
+        self.assertEqual(res.data["distance"], 1330)
+
+        res = self.get(self.kyiv.id, 0)
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_parameters(self):
+        res = self.client.get(DISTANCE_URL, {"from": self.kyiv.id})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,132 @@
+import os
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command, CommandError
+from django.db.utils import OperationalError
+from django.test import override_settings, TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from train_station_service import health
+
+HEALTHZ_URL = reverse("healthz")
+READYZ_URL = reverse("readyz")
+
+
+def failing_check():
+    raise health.CheckFailed("broken")
+
+
+class HealthTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_liveness(self):
+        res = self.client.get(HEALTHZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json(), {"status": "ok"})
+        self.assertIn("no-cache", res["Cache-Control"])
+
+    @override_settings(HEALTH={"CACHE_SECONDS": 0})
+    def test_ready(self):
+        res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        body = res.json()
+        self.assertEqual(body["status"], "ok")
+        self.assertEqual(
+            set(body["checks"]), {"database", "cache", "migrations", "jobs"}
+        )
+        for check in body["checks"].values():
+            self.assertEqual(check["status"], "ok")
+
+    @override_settings(HEALTH={"CACHE_SECONDS": 0})
+    def test_failed_check(self):
+        with mock.patch.dict(
+            health.CHECKS, {"database": (failing_check, True)}
+        ):
+            res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(
+            res.json()["checks"]["database"],
+            {"status": "fail", "ms": mock.ANY, "detail": "broken"},
+        )
+
+    @override_settings(HEALTH={"CACHE_SECONDS": 0})
+    def test_job_backlog_only_warns(self):
+        with mock.patch.dict(health.CHECKS, {"jobs": (failing_check, False)}):
+            res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()["checks"]["jobs"]["status"], "warn")
+
+    @override_settings(HEALTH={"CACHE_SECONDS": 0, "TIMEOUT": 0.05})
+    def test_hanging_check_fails_within_timeout(self):
+        def hanging_check():
+            time.sleep(0.5)
+            return ""
+
+        started = time.monotonic()
+        with mock.patch.dict(health.CHECKS, {"cache": (hanging_check, True)}):
+            res = self.client.get(READYZ_URL)
+
+        self.assertLess(time.monotonic() - started, 0.4)
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res.json()["checks"]["cache"]["detail"], "timed out")
+
+    @override_settings(HEALTH={"CACHE_SECONDS": 60})
+    def test_result_is_reused(self):
+        self.client.get(READYZ_URL)
+        with mock.patch.dict(
+            health.CHECKS, {"database": (failing_check, True)}
+        ):
+            res = self.client.get(READYZ_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_waits_for_warmup(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        marker = os.path.join(tmp.name, "warmup.json")
+
+        with override_settings(
+            HEALTH={"CACHE_SECONDS": 0, "REQUIRE_WARMUP": True},
+            WARMUP={"MARKER_FILE": marker},
+        ):
+            res = self.client.get(READYZ_URL)
+            self.assertEqual(
+                res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+
+            open(marker, "w").close()
+            res = self.client.get(READYZ_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+@mock.patch("time.sleep")
+@mock.patch(
+    "django.db.backends.base.base.BaseDatabaseWrapper.ensure_connection"
+)
+class WaitForDbTests(TestCase):
+    def test_backoff(self, ensure_connection, sleep):
+        ensure_connection.side_effect = [OperationalError] * 4 + [None]
+
+        call_command("wait_for_db", "--max-delay=0.5", stdout=StringIO())
+
+        self.assertEqual(
+            [call.args[0] for call in sleep.call_args_list],
+            [0.1, 0.2, 0.4, 0.5],
+        )
+
+    def test_timeout(self, ensure_connection, sleep):
+        ensure_connection.side_effect = OperationalError
+
+        with self.assertRaises(CommandError):
+            call_command("wait_for_db", "--timeout=0.01", stdout=StringIO())
@@ -0,0 +1,163 @@
+from datetime import date, datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from train_station.models import Journey, Route, Station, Train, TrainType
+
+ITINERARY_URL = reverse("train_station:itineraries")
+DAY = date(2030, 1, 7)
+
+
+class ItineraryApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.kyiv, self.lviv, self.odesa, self.dnipro = (
+            Station.objects.create(name=name)
+            for name in ("Kyiv", "Lviv", "Odesa", "Dnipro")
+        )
+        train_type = TrainType.objects.create(name="Express")
+        self.intercity, self.regional, self.night = (
+            Train.objects.create(
+                name=name,
+                cargo_num=10,
+                places_in_cargo=50,
+                train_type=train_type,
+            )
+            for name in ("Intercity", "Regional", "Night")
+        )
+
+    def journey(self, source, destination, train, departure, arrival):
+        # the timetables are replaced when the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            route, _ = Route.objects.get_or_create(
+                source=source, destination=destination, distance=300
+            )
+            return Journey.objects.create(
+                route=route,
+                train=train,
+                departure_time=self.at(departure),
+                arrival_time=self.at(arrival),
+            )
+
+    @staticmethod
+    def at(hours_minutes: str, day: date = DAY) -> datetime:
+        hours, minutes = map(int, hours_minutes.split(":"))
+        return timezone.make_aware(
+            datetime.combine(day, datetime.min.time())
+            + timedelta(hours=hours, minutes=minutes)
+        )
+
+    def search(self, **params):
+        params = {
+            "from": self.kyiv.id,
+            "to": self.odesa.id,
+            "date": DAY.isoformat(),
+            **params,
+        }
+        return self.client.get(ITINERARY_URL, params)
+
+    def leg_ids(self, itinerary):
+        return [leg["id"] for leg in itinerary["legs"]]
+
+    def test_change_of_train_with_transfer_time(self):
+        slow = self.journey(
+            self.kyiv, self.odesa, self.night, "07:00", "12:00"
+        )
+        first = self.journey(
+            self.kyiv, self.lviv, self.intercity, "08:00", "09:00"
+        )
+        self.journey(self.lviv, self.odesa, self.regional, "09:05", "10:00")
+        second = self.journey(
+            self.lviv, self.odesa, self.regional, "09:30", "10:30"
+        )
+
+        res = self.search(results=5)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        results = res.data["results"]
+        # the slow direct train leaves earlier but arrives later
+        self.assertEqual(self.leg_ids(results[0]), [first.id, second.id])
+        self.assertEqual(results[0]["transfers"], 1)
+        self.assertEqual(results[0]["duration_minutes"], 150)
+        self.assertEqual(results[0]["legs"][0]["source_name"], "Kyiv")
+        self.assertNotIn(slow.id, self.leg_ids(results[0]))
+        self.assertEqual(len(results), 1)
+
+    def test_staying_on_the_same_train(self):
+        first = self.journey(
+            self.kyiv, self.lviv, self.intercity, "08:00", "09:00"
+        )
+        second = self.journey(
+            self.lviv, self.odesa, self.intercity, "09:05", "10:00"
+        )
+
+        res = self.search()
+
+        self.assertEqual(
+            self.leg_ids(res.data["results"][0]), [first.id, second.id]
+        )
+
+    def test_later_alternatives_and_overnight(self):
+        self.journey(self.kyiv, self.odesa, self.intercity, "08:00", "12:00")
+        self.journey(self.kyiv, self.lviv, self.regional, "22:00", "23:30")
+        overnight = self.journey(
+            self.lviv,
+            self.odesa,
+            self.night,
+            "23:50",
+            "30:00",
+        )
+
+        res = self.search(results=3)
+
+        results = res.data["results"]
+        self.assertEqual(len(results), 2)
+        self.assertEqual(self.leg_ids(results[1])[-1], overnight.id)
+
+        res = self.search(time="09:00")
+        self.assertEqual(len(res.data["results"]), 1)
+
+    def test_new_journey_is_found(self):
+        self.assertEqual(self.search().data["results"], [])
+
+        journey = self.journey(
+            self.kyiv, self.odesa, self.intercity, "08:00", "12:00"
+        )
+
+        res = self.search()
+        self.assertEqual(self.leg_ids(res.data["results"][0]), [journey.id])
+
+    @override_settings(ITINERARIES={"MIN_TRANSFER_MINUTES": 0})
+    def test_transfer_time_setting(self):
+        self.journey(self.kyiv, self.lviv, self.intercity, "08:00", "09:00")
+        fast = self.journey(
+            self.lviv, self.odesa, self.regional, "09:05", "10:00"
+        )
+
+        res = self.search()
+
+        self.assertEqual(self.leg_ids(res.data["results"][0])[-1], fast.id)
+
+    def test_invalid_parameters(self):
+        for params in (
+            {"from": "x"},
+            {"to": self.kyiv.id},
+            {"date": "07.01.2030"},
+            {"results": 100},
+        ):
+            res = self.search(**params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.get(ITINERARY_URL, {"from": self.kyiv.id})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
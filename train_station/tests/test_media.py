@@ -0,0 +1,106 @@
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings, TestCase
+from django.urls import reverse
+
+from train_station_service.media import IMMUTABLE_CACHE_CONTROL
+
+CONTENT = b"0123456789" * 10
+HASHED_NAME = "uploads/trains/variants/0123456789abcdef0123-320w.webp"
+
+
+def media_url(name):
+    return reverse("media", args=[name])
+
+
+class ServeMediaTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings = override_settings(MEDIA_ROOT=self.tmp.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        for name in (HASHED_NAME, "uploads/plain.jpg", "private/report.txt"):
+            path = os.path.join(self.tmp.name, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as fp:
+                fp.write(CONTENT)
+
+    def test_file_response(self):
+        res = self.client.get(media_url(HASHED_NAME))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(b"".join(res.streaming_content), CONTENT)
+        self.assertEqual(res["Content-Type"], "image/webp")
+        self.assertEqual(res["Cache-Control"], IMMUTABLE_CACHE_CONTROL)
+
+        res = self.client.get(media_url("uploads/plain.jpg"))
+        self.assertEqual(res["Cache-Control"], "public, max-age=3600")
+
+    def test_not_modified(self):
+        etag = self.client.get(media_url(HASHED_NAME))["ETag"]
+
+        res = self.client.get(
+            media_url(HASHED_NAME), headers={"If-None-Match": etag}
+        )
+
+        self.assertEqual(res.status_code, 304)
+
+    def test_range_requests(self):
+        res = self.client.get(
+            media_url(HASHED_NAME), headers={"Range": "bytes=10-19"}
+        )
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(b"".join(res.streaming_content), CONTENT[10:20])
+        self.assertEqual(res["Content-Length"], "10")
+        self.assertEqual(res["Content-Range"], "bytes 10-19/100")
+
+        res = self.client.get(
+            media_url(HASHED_NAME), headers={"Range": "bytes=-5"}
+        )
+        self.assertEqual(b"".join(res.streaming_content), CONTENT[-5:])
+
+        res = self.client.get(
+            media_url(HASHED_NAME), headers={"Range": "bytes=200-"}
+        )
+        self.assertEqual(res.status_code, 416)
+        self.assertEqual(res["Content-Range"], "bytes */100")
+
+    def test_access_checks(self):
+        for name in ("../etc/passwd", "uploads/missing.jpg", "uploads/.env"):
+            res = self.client.get(media_url(name))
+            self.assertEqual(res.status_code, 404)
+
+        self.assertEqual(
+            self.client.get(media_url("private/report.txt")).status_code, 404
+        )
+        self.client.force_login(
+            get_user_model().objects.create_superuser(
+                "admin@myproject.com", "password"
+            )
+        )
+        self.assertEqual(
+            self.client.get(media_url("private/report.txt")).status_code, 200
+        )
+
+    @override_settings(MEDIA_SERVE={"MODE": "accel"})
+    def test_accel_redirect(self):
+        res = self.client.get(media_url(HASHED_NAME))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.content, b"")
+        self.assertEqual(
+            res["X-Accel-Redirect"], f"/protected-media/{HASHED_NAME}"
+        )
+        self.assertEqual(res["Content-Type"], "image/webp")
+
+    @override_settings(MEDIA_SERVE={"MODE": "sendfile"})
+    def test_sendfile(self):
+        res = self.client.get(media_url(HASHED_NAME))
+
+        self.assertEqual(
+            res["X-Sendfile"], os.path.join(self.tmp.name, HASHED_NAME)
+        )
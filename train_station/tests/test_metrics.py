@@ -0,0 +1,129 @@
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, override_settings, TestCase
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from train_station.models import (
+    Journey,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+
+METRICS_URL = reverse("metrics")
+STATION_URL = reverse("train_station:station-list")
+ASYNC_STATION_URL = reverse("train_station:async-station-list")
+ORDER_URL = reverse("train_station:order-list")
+
+
+def sample_value(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_request_metrics(self):
+        Station.objects.create(name="Kyiv")
+        labels = {"route": "train_station:station-list", "method": "GET"}
+        responses = sample_value(
+            "http_responses_total", status="200", **labels
+        )
+        queries = sample_value("http_request_db_queries_sum", **labels)
+
+        self.client.get(STATION_URL)
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(
+            b"http_request_duration_seconds_bucket{le=\"0.005\","
+            b"method=\"GET\",route=\"train_station:station-list\"}",
+            res.content,
+        )
+        self.assertEqual(
+            sample_value("http_responses_total", status="200", **labels),
+            responses + 1,
+        )
+        self.assertEqual(
+            sample_value("http_request_db_queries_sum", **labels),
+            queries + 2,
+        )
+
+    async def test_queries_are_counted_under_asgi(self):
+        await Station.objects.acreate(name="Kyiv")
+        token = AccessToken.for_user(self.user)
+        headers = {"authorization": f"Bearer {token}"}
+        # user, count and page of stations
+        for url, route in (
+            (STATION_URL, "train_station:station-list"),
+            (ASYNC_STATION_URL, "train_station:async-station-list"),
+        ):
+            labels = {"route": route, "method": "GET"}
+            queries = sample_value("http_request_db_queries_sum", **labels)
+
+            res = await AsyncClient().get(url, headers=headers)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                sample_value("http_request_db_queries_sum", **labels),
+                queries + 3,
+            )
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_metrics_token(self):
+        self.assertEqual(
+            self.client.get(METRICS_URL).status_code,
+            status.HTTP_401_UNAUTHORIZED,
+        )
+        res = self.client.get(
+            METRICS_URL, headers={"Authorization": "Bearer secret"}
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_booking_conflict_is_counted(self):
+        route = Route.objects.create(
+            source=Station.objects.create(name="Kyiv"),
+            destination=Station.objects.create(name="Lviv"),
+            distance=540,
+        )
+        journey = Journey.objects.create(
+            route=route,
+            train=Train.objects.create(
+                name="Sample_train",
+                cargo_num=10,
+                places_in_cargo=50,
+                train_type=TrainType.objects.create(name="Express"),
+            ),
+            departure_time=datetime(2025, 10, 23, 8, 0),
+            arrival_time=datetime(2025, 10, 23, 14, 0),
+        )
+        ticket = {"cargo": 1, "seat": 1, "journey": journey.id}
+        conflicts = sample_value(
+            "booking_conflicts_total", reason="validation"
+        )
+
+        res = self.client.post(
+            ORDER_URL, {"tickets": [ticket, ticket]}, format="json"
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("tickets", res.data)
+        self.assertFalse(Ticket.objects.exists())
+        self.assertEqual(
+            sample_value("booking_conflicts_total", reason="validation"),
+            conflicts + 1,
+        )
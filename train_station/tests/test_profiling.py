@@ -0,0 +1,117 @@
+import marshal
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, override_settings, TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from train_station.models import Station
+
+STATION_URL = reverse("train_station:station-list")
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = get_user_model().objects.create_superuser(
+            "admin@myproject.com", "password"
+        )
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        Station.objects.create(name="Kyiv")
+
+    def get_as(self, user, params):
+        return self.client.get(
+            STATION_URL,
+            params,
+            headers={"Authorization": f"Bearer {AccessToken.for_user(user)}"},
+        )
+
+    def test_cprofile_text(self):
+        res = self.get_as(self.admin, {"_profile": "cprofile"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["X-Profile"], "cprofile")
+        self.assertEqual(res["X-Profiled-Status"], "200")
+        self.assertIn(b"function calls", res.content)
+        self.assertIn(b"views.py", res.content)
+
+    async def test_cprofile_under_asgi_includes_the_view(self):
+        token = AccessToken.for_user(self.admin)
+
+        res = await AsyncClient().get(
+            STATION_URL,
+            {"_profile": "cprofile", "_profile_format": "pstats"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+        self.assertEqual(res["X-Profiled-Status"], "200")
+        names = {name for _, _, name in marshal.loads(res.content)}
+        self.assertIn("list", names)
+        self.assertIn("to_representation", names)
+
+    def test_cprofile_collapsed_and_pstats(self):
+        res = self.get_as(
+            self.admin,
+            {"_profile": "cprofile", "_profile_format": "collapsed"},
+        )
+        line = res.content.decode().splitlines()[0]
+        stack, _, micros = line.rpartition(" ")
+        self.assertTrue(stack)
+        self.assertTrue(micros.isdigit())
+
+        res = self.get_as(
+            self.admin, {"_profile": "cprofile", "_profile_format": "pstats"}
+        )
+        stats = marshal.loads(res.content)
+        self.assertTrue(any(name == "list" for _, _, name in stats))
+
+    def test_alloc(self):
+        res = self.get_as(self.admin, {"_profile": "alloc"})
+
+        self.assertEqual(res["X-Profile"], "alloc")
+        self.assertIn(b"Peak traced memory", res.content)
+
+    def test_store_for_download(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with override_settings(PROFILING={"STORAGE_DIR": tmp}):
+                res = self.get_as(
+                    self.admin, {"_profile": "cprofile", "_profile_store": "1"}
+                )
+                self.assertEqual(res.data["results"][0]["name"], "Kyiv")
+                self.assertEqual(len(os.listdir(tmp)), 1)
+
+                self.client.force_authenticate(self.admin)
+                download = self.client.get(res["X-Profile-Url"])
+                self.assertEqual(download.status_code, status.HTTP_200_OK)
+                self.assertIn(b"function calls", b"".join(download))
+
+                self.client.force_authenticate(self.user)
+                self.assertEqual(
+                    self.client.get(res["X-Profile-Url"]).status_code,
+                    status.HTTP_403_FORBIDDEN,
+                )
+
+    def test_ignored_for_non_staff(self):
+        for params in ({"_profile": "cprofile"}, {"_profile": "alloc"}):
+            res = self.get_as(self.user, params)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertNotIn("X-Profile", res)
+            self.assertEqual(res.data["results"][0]["name"], "Kyiv")
+
+        res = self.client.get(STATION_URL, {"_profile": "cprofile"})
+        self.assertNotIn("X-Profile", res)
+
+    @override_settings(PROFILING={"ENABLED": False})
+    def test_disabled(self):
+        res = self.get_as(self.admin, {"_profile": "cprofile"})
+
+        self.assertNotIn("X-Profile", res)
+        self.assertEqual(res.data["results"][0]["name"], "Kyiv")
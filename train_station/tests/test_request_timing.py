@@ -0,0 +1,78 @@
+import json
+import re
+
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, override_settings, TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from train_station.models import Station
+
+STATION_URL = reverse("train_station:station-list")
+ASYNC_STATION_URL = reverse("train_station:async-station-list")
+SERVER_TIMING_RE = re.compile(
+    r'^db;dur=[\d.]+;desc="(\d+) queries", serialize;dur=[\d.]+, '
+    r"render;dur=[\d.]+, total;dur=[\d.]+$"
+)
+
+
+@override_settings(REQUEST_TIMING={"SAMPLE_RATE": 1.0})
+class RequestTimingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        for i in range(3):
+            Station.objects.create(name=f"Station_{i}")
+
+    def test_server_timing_header_and_log(self):
+        with self.assertLogs(
+            "train_station_service.instrumentation", "INFO"
+        ) as logs:
+            res = self.client.get(STATION_URL)
+
+        match = SERVER_TIMING_RE.match(res["Server-Timing"])
+        self.assertIsNotNone(match, res["Server-Timing"])
+        # count and page of stations
+        self.assertEqual(match.group(1), "2")
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["view"], "StationViewSet.list")
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(record["db_queries"], 2)
+        self.assertGreater(record["serialize_ms"], 0)
+        self.assertGreater(record["render_ms"], 0)
+
+    async def test_queries_of_async_views_are_counted(self):
+        token = AccessToken.for_user(self.user)
+        with self.assertLogs(
+            "train_station_service.instrumentation", "INFO"
+        ) as logs:
+            await AsyncClient().get(
+                ASYNC_STATION_URL, headers={"authorization": f"Bearer {token}"}
+            )
+
+        record = json.loads(logs.records[0].getMessage())
+        # user, count and page of stations
+        self.assertEqual(record["db_queries"], 3)
+        self.assertGreater(record["db_ms"], 0)
+
+    def test_generic_view_is_tagged_with_class_name(self):
+        with self.assertLogs(
+            "train_station_service.instrumentation", "INFO"
+        ) as logs:
+            self.client.get(reverse("user:manage"))
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["view"], "ManagerUserView")
+
+    @override_settings(REQUEST_TIMING={"SAMPLE_RATE": 0.0})
+    def test_unsampled_requests_are_not_instrumented(self):
+        res = self.client.get(STATION_URL)
+
+        self.assertNotIn("Server-Timing", res)
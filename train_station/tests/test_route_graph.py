@@ -0,0 +1,129 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from train_station import route_graph
+from train_station.models import Route, Station
+
+SHORTEST_URL = reverse("train_station:route-shortest")
+
+
+def reachable_url(station_id):
+    return reverse("train_station:station-reachable", args=[station_id])
+
+
+class RouteGraphTests(SimpleTestCase):
+    def setUp(self):
+        self.graph = route_graph.RouteGraph(
+            [40, 10, 20, 30, 50],
+            [(10, 20, 5), (20, 30, 5), (10, 30, 20), (30, 40, 1)],
+        )
+
+    def test_adjacency_arrays(self):
+        self.assertEqual(list(self.graph.station_ids), [10, 20, 30, 40, 50])
+        self.assertEqual(list(self.graph.offsets), [0, 2, 3, 4, 4, 4])
+        self.assertEqual(list(self.graph.targets), [1, 2, 2, 3])
+        self.assertNotIn(60, self.graph)
+
+    def test_shortest_path(self):
+        self.assertEqual(
+            self.graph.shortest_path(10, 40), (11, [10, 20, 30, 40])
+        )
+        # routes are one-way
+        self.assertIsNone(self.graph.shortest_path(40, 10))
+        self.assertIsNone(self.graph.shortest_path(10, 50))
+
+    def test_reachable(self):
+        self.assertEqual(
+            self.graph.reachable(10), [(20, 5), (30, 10), (40, 11)]
+        )
+        self.assertEqual(self.graph.reachable(10, max_distance=10), [
+            (20, 5), (30, 10)
+        ])
+
+
+class RouteGraphApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        # the graph is replaced when the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kyiv, self.lviv, self.odesa = (
+                Station.objects.create(name=name)
+                for name in ("Kyiv", "Lviv", "Odesa")
+            )
+            Route.objects.create(
+                source=self.kyiv, destination=self.lviv, distance=540
+            )
+            Route.objects.create(
+                source=self.lviv, destination=self.odesa, distance=790
+            )
+
+    def test_shortest(self):
+        res = self.client.get(
+            SHORTEST_URL, {"from": self.kyiv.id, "to": self.odesa.id}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["distance"], 1330)
+        self.assertEqual(
+            [station["name"] for station in res.data["stations"]],
+            ["Kyiv", "Lviv", "Odesa"],
+        )
+
+    def test_graph_is_rebuilt_after_route_changes(self):
+        self.client.get(SHORTEST_URL, {"from": self.kyiv.id, "to": 1})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Route.objects.create(
+                source=self.kyiv, destination=self.odesa, distance=480
+            )
+        res = self.client.get(
+            SHORTEST_URL, {"from": self.kyiv.id, "to": self.odesa.id}
+        )
+
+        self.assertEqual(res.data["distance"], 480)
+
+    def test_no_path(self):
+        res = self.client.get(
+            SHORTEST_URL, {"from": self.odesa.id, "to": self.kyiv.id}
+        )
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.client.get(SHORTEST_URL, {"from": self.kyiv.id, "to": 0})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.client.get(SHORTEST_URL, {"from": self.kyiv.id})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_reachable(self):
+        res = self.client.get(reachable_url(self.kyiv.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["count"], 2)
+        self.assertEqual(
+            res.data["results"],
+            [
+                {"id": self.lviv.id, "name": "Lviv", "distance": 540},
+                {"id": self.odesa.id, "name": "Odesa", "distance": 1330},
+            ],
+        )
+
+        res = self.client.get(
+            reachable_url(self.kyiv.id), {"max_distance": 1000}
+        )
+        self.assertEqual(res.data["count"], 1)
+
+    def test_snapshot_is_loaded_once(self):
+        self.client.get(reachable_url(self.kyiv.id))
+
+        # station names, versions are not kept in the database
+        with self.assertNumQueries(1):
+            self.client.get(reachable_url(self.kyiv.id))
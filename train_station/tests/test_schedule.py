@@ -0,0 +1,97 @@
+from datetime import date, time, timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from train_station.models import (
+    Crew,
+    Journey,
+    Route,
+    Schedule,
+    Station,
+    Train,
+    TrainType,
+)
+from train_station.scheduling import (
+    materialize_schedule,
+    materialize_schedules,
+)
+
+
+class ScheduleMaterializationTests(TestCase):
+    def setUp(self):
+        station_1 = Station.objects.create(name="Station_1")
+        station_2 = Station.objects.create(name="Station_2")
+        self.route = Route.objects.create(
+            source=station_1, destination=station_2, distance=233
+        )
+        self.train = Train.objects.create(
+            name="Sample_train",
+            cargo_num=10,
+            places_in_cargo=50,
+            train_type=TrainType.objects.create(name="Test_train_type"),
+        )
+        self.crew = Crew.objects.create(
+            first_name="Test_name", last_name="Test_last_name"
+        )
+        self.schedule = Schedule.objects.create(
+            route=self.route,
+            train=self.train,
+            departure_time=time(22, 0),
+            arrival_time=time(6, 30),
+            weekdays=Schedule.MONDAY | Schedule.FRIDAY,
+            valid_from=date(2025, 10, 1),
+        )
+        self.schedule.crew.add(self.crew)
+
+    def test_materialize_respects_weekdays_and_overnight(self):
+        created = materialize_schedule(self.schedule, date(2025, 10, 12))
+
+        journeys = Journey.objects.filter(schedule=self.schedule).order_by(
+            "departure_time"
+        )
+        self.assertEqual(created, 3)
+        self.assertEqual(
+            [journey.departure_time.date() for journey in journeys],
+            [date(2025, 10, 3), date(2025, 10, 6), date(2025, 10, 10)],
+        )
+        for journey in journeys:
+            self.assertEqual(journey.departure_time.time(), time(22, 0))
+            self.assertEqual(
+                journey.arrival_time - journey.departure_time,
+                timedelta(hours=8, minutes=30),
+            )
+            self.assertEqual(list(journey.crew.all()), [self.crew])
+
+    def test_materialize_is_incremental(self):
+        materialize_schedules(7, today=date(2025, 10, 1))
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.materialized_until, date(2025, 10, 8))
+        count = Journey.objects.count()
+
+        created = materialize_schedules(8, today=date(2025, 10, 1))
+
+        self.schedule.refresh_from_db()
+        self.assertEqual(self.schedule.materialized_until, date(2025, 10, 9))
+        self.assertEqual(created[self.schedule.id], 0)
+        self.assertEqual(Journey.objects.count(), count)
+
+    def test_existing_journeys_are_skipped(self):
+        materialize_schedule(self.schedule, date(2025, 10, 12))
+        self.schedule.materialized_until = None
+
+        created = materialize_schedule(self.schedule, date(2025, 10, 12))
+
+        self.assertEqual(created, 0)
+        self.assertEqual(
+            Journey.objects.filter(schedule=self.schedule).count(), 3
+        )
+
+    def test_materialize_schedules_command(self):
+        out = StringIO()
+        call_command("materialize_schedules", "--days=3", stdout=out)
+
+        self.schedule.refresh_from_db()
+        self.assertIsNotNone(self.schedule.materialized_until)
+        self.assertIn("journeys", out.getvalue())
@@ -0,0 +1,229 @@
+import asyncio
+from datetime import datetime
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncClient, Client, TestCase, TransactionTestCase
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+from train_station import events
+from train_station.models import (
+    Journey,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+
+
+def stream_url(journey_id):
+    return reverse(
+        "train_station:async-journey-seats-stream", args=[journey_id]
+    )
+
+
+def sample_journey():
+    route = Route.objects.create(
+        source=Station.objects.create(name="Station_1"),
+        destination=Station.objects.create(name="Station_2"),
+        distance=233,
+    )
+    train = Train.objects.create(
+        name="Sample_train",
+        cargo_num=2,
+        places_in_cargo=3,
+        train_type=TrainType.objects.create(name="Test_train_type"),
+    )
+    return Journey.objects.create(
+        route=route,
+        train=train,
+        departure_time=datetime(2025, 10, 23, 8, 0),
+        arrival_time=datetime(2025, 10, 23, 14, 0),
+    )
+
+
+class SeatEventBackendTests(TestCase):
+    def check_backend(self, backend):
+        self.assertEqual(backend.last_event_id(1), 0)
+        self.assertEqual(backend.events_since(1, 0), ([], True))
+
+        for seat in range(1, 5):
+            backend.publish(1, events.SEAT_TAKEN, 1, seat)
+        backend.publish(2, events.SEAT_RELEASED, 1, 1)
+
+        missed, complete = backend.events_since(1, 2)
+        self.assertTrue(complete)
+        self.assertEqual(
+            missed,
+            [
+                events.SeatEvent(3, events.SEAT_TAKEN, 1, 3),
+                events.SeatEvent(4, events.SEAT_TAKEN, 1, 4),
+            ],
+        )
+        self.assertEqual(backend.last_event_id(2), 1)
+
+        # buffer keeps only 3 events, id 1 was dropped
+        self.assertFalse(backend.events_since(1, 0)[1])
+        # client is ahead of the backend (e.g. restarted process)
+        self.assertFalse(backend.events_since(1, 10)[1])
+
+    def test_in_memory_backend(self):
+        self.check_backend(events.InMemorySeatEventBackend(buffer_size=3))
+
+    def test_cache_backend(self):
+        cache.clear()
+        self.check_backend(events.CacheSeatEventBackend(buffer_size=3))
+
+
+class JourneyFeedTests(TestCase):
+    def setUp(self):
+        events.reset_backend()
+
+    def tearDown(self):
+        events.reset_backend()
+
+    async def test_one_poller_fans_out_to_every_subscriber(self):
+        backend = events.get_backend()
+        with self.settings(SEAT_EVENTS={"POLL_INTERVAL": 0.01}):
+            with mock.patch.object(
+                backend, "aevents_since", wraps=backend.aevents_since
+            ) as polls:
+                with events.subscribe(1) as first, events.subscribe(
+                    1
+                ) as second:
+                    feeds = events._feeds[asyncio.get_running_loop()]
+                    self.assertEqual(len(feeds), 1)
+                    await asyncio.sleep(0.05)
+                    events.publish(1, events.SEAT_TAKEN, 1, 2)
+
+                    received = [
+                        await asyncio.wait_for(queue.get(), 1)
+                        for queue in (first, second)
+                    ]
+                    task = feeds[1].task
+
+        self.assertEqual(
+            received, [[events.SeatEvent(1, events.SEAT_TAKEN, 1, 2)]] * 2
+        )
+        # once per interval, not once per subscriber
+        self.assertLess(polls.call_count, 10)
+        self.assertEqual(feeds, {})
+        await asyncio.sleep(0)
+        self.assertTrue(task.cancelled())
+
+    async def test_slow_subscriber_is_told_to_resync(self):
+        with self.settings(
+            SEAT_EVENTS={"POLL_INTERVAL": 0.01, "QUEUE_SIZE": 2}
+        ):
+            with events.subscribe(1) as queue:
+                await asyncio.sleep(0.03)
+                for seat in range(1, 4):
+                    events.publish(1, events.SEAT_TAKEN, 1, seat)
+                    await asyncio.sleep(0.03)
+
+                self.assertEqual(queue.get_nowait(), events.RESYNC)
+
+
+class SeatEventSignalTests(TransactionTestCase):
+    def setUp(self):
+        events.reset_backend()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.journey = sample_journey()
+
+    def tearDown(self):
+        events.reset_backend()
+
+    def test_ticket_changes_are_published(self):
+        order = Order.objects.create(user=self.user)
+        ticket = Ticket.objects.create(
+            journey=self.journey, order=order, cargo=1, seat=2
+        )
+        ticket.delete()
+
+        missed, complete = events.get_backend().events_since(
+            self.journey.id, 0
+        )
+        self.assertTrue(complete)
+        self.assertEqual(
+            [(event.type, event.cargo, event.seat) for event in missed],
+            [(events.SEAT_TAKEN, 1, 2), (events.SEAT_RELEASED, 1, 2)],
+        )
+
+
+class SeatEventStreamTests(TestCase):
+    def setUp(self):
+        events.reset_backend()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com", "testpass"
+        )
+        self.journey = sample_journey()
+        self.client = AsyncClient()
+        self.headers = {
+            "authorization": f"Bearer {AccessToken.for_user(self.user)}"
+        }
+
+    def tearDown(self):
+        events.reset_backend()
+
+    async def read_events(self, response, count):
+        chunks = []
+        async for chunk in response.streaming_content:
+            chunks.append(chunk.decode())
+            if len(chunks) == count:
+                break
+        return chunks
+
+    async def test_auth_required(self):
+        res = await self.client.get(stream_url(self.journey.id))
+
+        self.assertEqual(res.status_code, 401)
+
+    def test_refused_under_wsgi(self):
+        res = Client().get(stream_url(self.journey.id), headers=self.headers)
+
+        self.assertEqual(res.status_code, 501)
+
+    async def test_stream_starts_with_snapshot_and_sends_deltas(self):
+        order = await Order.objects.acreate(user=self.user)
+        await sync_to_async(Ticket.objects.create)(
+            journey=self.journey, order=order, cargo=1, seat=1
+        )
+
+        with self.settings(SEAT_EVENTS={"POLL_INTERVAL": 0.01}):
+            res = await self.client.get(
+                stream_url(self.journey.id), headers=self.headers
+            )
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(res["Content-Type"], "text/event-stream")
+
+            [snapshot] = await self.read_events(res, 1)
+            events.publish(self.journey.id, events.SEAT_TAKEN, 2, 3)
+            [delta] = await self.read_events(res, 1)
+
+        self.assertTrue(snapshot.startswith("id: 0\nevent: snapshot\n"))
+        self.assertIn('"tickets_available": 5', snapshot)
+        self.assertEqual(
+            delta,
+            'id: 1\nevent: seat_taken\ndata: {"cargo": 2, "seat": 3}\n\n',
+        )
+
+    async def test_reconnect_with_last_event_id_replays_missed(self):
+        for seat in range(1, 4):
+            events.publish(self.journey.id, events.SEAT_TAKEN, 1, seat)
+
+        with self.settings(SEAT_EVENTS={"POLL_INTERVAL": 0.01}):
+            res = await self.client.get(
+                stream_url(self.journey.id),
+                headers={**self.headers, "last-event-id": "1"},
+            )
+            chunks = await self.read_events(res, 2)
+
+        self.assertTrue(chunks[0].startswith("id: 2\nevent: seat_taken\n"))
+        self.assertTrue(chunks[1].startswith("id: 3\nevent: seat_taken\n"))
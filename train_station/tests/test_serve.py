@@ -0,0 +1,81 @@
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import override_settings, TestCase
+
+from train_station.management.commands import serve
+
+
+class ServeCommandTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static_root = self.tmp.name
+        self.addCleanup(self.tmp.cleanup)
+
+    def call_serve(self, *args):
+        out = StringIO()
+        with mock.patch.object(serve.ServeApplication, "run") as run:
+            call_command("serve", *args, stdout=out)
+        return out.getvalue(), run
+
+    def test_no_pending_migrations_on_test_database(self):
+        self.assertFalse(serve.has_pending_migrations())
+
+    def test_skips_migrate_and_unchanged_static(self):
+        with override_settings(STATIC_ROOT=self.static_root):
+            output, run = self.call_serve()
+            self.assertIn("skipping migrate", output)
+            self.assertIn("Static files collected", output)
+            self.assertTrue(
+                os.path.exists(
+                    os.path.join(
+                        self.static_root, serve.STATIC_FINGERPRINT_FILE
+                    )
+                )
+            )
+            run.assert_called_once()
+
+            output, run = self.call_serve()
+            self.assertIn("skipping collectstatic", output)
+
+    def test_changed_static_files_are_collected(self):
+        with override_settings(STATIC_ROOT=self.static_root):
+            serve.store_static_fingerprint("outdated")
+            output, run = self.call_serve()
+
+        self.assertIn("Static files collected", output)
+
+    def application_options(self, *args):
+        with mock.patch.object(
+            serve.ServeApplication, "__init__", return_value=None
+        ) as init, mock.patch.object(serve.ServeApplication, "run"):
+            call_command(
+                "serve",
+                "--no-migrate",
+                "--no-collectstatic",
+                *args,
+                stdout=StringIO(),
+            )
+        return init.call_args.args[0], init.call_args.kwargs
+
+    def test_asgi_by_default(self):
+        options, kwargs = self.application_options()
+
+        self.assertEqual(
+            options["worker_class"], "uvicorn.workers.UvicornWorker"
+        )
+        self.assertTrue(kwargs["asgi"])
+
+    def test_application_options(self):
+        options, _ = self.application_options(
+            "--wsgi", "--workers=3", "--threads=4", "--max-requests=500"
+        )
+
+        self.assertTrue(options["preload_app"])
+        self.assertEqual(options["workers"], 3)
+        self.assertEqual(options["worker_class"], "gthread")
+        self.assertEqual(options["max_requests"], 500)
+        self.assertEqual(options["max_requests_jitter"], 100)
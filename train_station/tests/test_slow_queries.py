@@ -0,0 +1,139 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings, TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from train_station.models import Station
+from train_station_service import slow_queries
+
+STATION_URL = reverse("train_station:station-list")
+SLOW_QUERIES_URL = reverse("slow-queries")
+
+
+class NormalizeSqlTests(TestCase):
+    def test_fingerprint_ignores_values(self):
+        self.assertEqual(
+            slow_queries.normalize_sql(
+                "SELECT * FROM t WHERE id IN (%s, %s, %s)  AND name = 'x'"
+            ),
+            "SELECT * FROM t WHERE id IN (...) AND name = ?",
+        )
+        self.assertEqual(
+            slow_queries.fingerprint("SELECT 1 FROM t WHERE id IN (%s)"),
+            slow_queries.fingerprint("SELECT 2 FROM t WHERE id IN (%s, %s)"),
+        )
+
+
+@override_settings(SLOW_QUERIES={"THRESHOLD_MS": 0})
+class SlowQueryLogTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_superuser(
+            "admin@myproject.com", "password"
+        )
+        self.client.force_authenticate(self.user)
+        Station.objects.create(name="Kyiv")
+        slow_queries.clear()
+
+    def test_records_view_source_and_plan(self):
+        self.client.get(STATION_URL)
+
+        records = slow_queries.load_records()
+        select = next(
+            entry for entry in records
+            if "ORDER BY" in entry["sql"]
+        )
+        self.assertEqual(select["view"], "StationViewSet.list")
+        self.assertIn("train_station_station", select["sql"])
+        self.assertTrue(select["explain"])
+
+    def test_staff_endpoint(self):
+        for _ in range(3):
+            self.client.get(STATION_URL)
+
+        res = self.client.get(SLOW_QUERIES_URL, {"sort": "count"})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        top = res.data["results"][0]
+        self.assertEqual(top["count"], 3)
+        self.assertIn("StationViewSet.list", top["views"])
+
+        self.client.force_authenticate(
+            get_user_model().objects.create_user("test@test.com", "pass")
+        )
+        self.assertEqual(
+            self.client.get(SLOW_QUERIES_URL).status_code,
+            status.HTTP_403_FORBIDDEN,
+        )
+
+    def test_command_reads_log_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "slow.jsonl")
+            with override_settings(
+                SLOW_QUERIES={"THRESHOLD_MS": 0, "LOG_FILE": path}
+            ):
+                self.client.get(STATION_URL)
+
+            out = StringIO()
+            call_command(
+                "slow_queries", "--file", path, "--json", stdout=out
+            )
+
+        offenders = json.loads(out.getvalue())
+        self.assertTrue(offenders)
+        self.assertIn("StationViewSet.list", offenders[0]["views"])
+
+    def test_missing_log_file_is_empty(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "slow.jsonl")
+            with override_settings(
+                SLOW_QUERIES={"THRESHOLD_MS": 10000, "LOG_FILE": path}
+            ):
+                res = self.client.get(SLOW_QUERIES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["results"], [])
+
+    def test_log_file_is_rotated(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "slow.jsonl")
+            with override_settings(
+                SLOW_QUERIES={
+                    "THRESHOLD_MS": 0,
+                    "LOG_FILE": path,
+                    "LOG_FILE_MAX_BYTES": 1,
+                }
+            ):
+                self.client.get(STATION_URL)
+
+            self.assertEqual(os.listdir(tmp), ["slow.jsonl.1"])
+
+    def test_reads_last_records_of_both_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "slow.jsonl")
+            for name, numbers in ((f"{path}.1", (1, 2)), (path, (3, 4))):
+                with open(name, "w") as fp:
+                    for number in numbers:
+                        fp.write(json.dumps({"number": number}) + "\n")
+            with override_settings(
+                SLOW_QUERIES={"LOG_FILE": path, "BUFFER_SIZE": 3}
+            ):
+                records = slow_queries.load_records()
+
+        self.assertEqual(
+            [entry["number"] for entry in records], [2, 3, 4]
+        )
+
+    @override_settings(SLOW_QUERIES={"THRESHOLD_MS": 10000})
+    def test_fast_queries_are_not_recorded(self):
+        self.client.get(STATION_URL)
+
+        self.assertEqual(slow_queries.load_records(), [])
@@ -0,0 +1,34 @@
+from django.db import transaction
+from django.test import TestCase
+
+from train_station import snapshots
+
+KEY = "test:version"
+
+
+class BumpOnCommitTests(TestCase):
+    def version(self):
+        return snapshots.versions([KEY])[KEY]
+
+    def test_bumped_once_after_commit(self):
+        before = self.version()
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            for _ in range(3):
+                snapshots.bump_on_commit(KEY)
+            self.assertEqual(self.version(), before)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertNotEqual(self.version(), before)
+
+    def test_bumped_again_after_savepoint_rollback(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            try:
+                with transaction.atomic():
+                    snapshots.bump_on_commit(KEY)
+                    raise ValueError
+            except ValueError:
+                pass
+            snapshots.bump_on_commit(KEY)
+
+        self.assertEqual(len(callbacks), 1)
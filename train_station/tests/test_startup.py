@@ -0,0 +1,54 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.urls import NoReverseMatch, reverse
+
+from train_station.management.commands.startup_report import (
+    parse_importtime,
+)
+
+
+class StartupTests(SimpleTestCase):
+    def test_parse_importtime(self):
+        modules = parse_importtime(
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |     json.scanner\n"
+            "import time:      1500 |       1620 |   json\n"
+            "unrelated line\n"
+        )
+
+        self.assertEqual(
+            modules,
+            [
+                {
+                    "module": "json.scanner",
+                    "depth": 2,
+                    "self_ms": 0.12,
+                    "cumulative_ms": 0.12,
+                },
+                {
+                    "module": "json",
+                    "depth": 1,
+                    "self_ms": 1.5,
+                    "cumulative_ms": 1.62,
+                },
+            ],
+        )
+
+    def test_schema_tools_are_not_loaded_in_production(self):
+        with self.assertRaises(NoReverseMatch):
+            reverse("schema")
+
+        out = StringIO()
+        call_command("startup_report", "--json", "--limit=5000", stdout=out)
+
+        report = json.loads(out.getvalue())
+        self.assertGreater(report["total_ms"], 0)
+        self.assertIn("train_station", report["apps_ready_ms"])
+        loaded = {module["module"] for module in report["slowest"]}
+        self.assertIn("train_station.views", loaded)
+        self.assertNotIn("drf_spectacular.views", loaded)
+        self.assertNotIn("debug_toolbar", loaded)
+        self.assertNotIn("PIL.Image", loaded)
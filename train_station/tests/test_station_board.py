@@ -0,0 +1,132 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from train_station import response_cache
+from train_station.models import (
+    Journey,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+
+
+def departures_url(station_id):
+    return reverse("train_station:station-departures", args=[station_id])
+
+
+def arrivals_url(station_id):
+    return reverse("train_station:station-arrivals", args=[station_id])
+
+
+class StationBoardApiTests(TestCase):
+    def setUp(self):
+        response_cache.get_cache().clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        self.kyiv, self.lviv, self.odesa = (
+            Station.objects.create(name=name)
+            for name in ("Kyiv", "Lviv", "Odesa")
+        )
+        self.train = Train.objects.create(
+            name="Intercity",
+            cargo_num=2,
+            places_in_cargo=10,
+            train_type=TrainType.objects.create(name="Express"),
+        )
+        self.now = timezone.now()
+
+    def journey(self, source, destination, departs_in, travel=2):
+        route, _ = Route.objects.get_or_create(
+            source=source, destination=destination, distance=300
+        )
+        return Journey.objects.create(
+            route=route,
+            train=self.train,
+            departure_time=self.now + timedelta(hours=departs_in),
+            arrival_time=self.now + timedelta(hours=departs_in + travel),
+        )
+
+    def test_departures(self):
+        later = self.journey(self.kyiv, self.odesa, 2)
+        first = self.journey(self.kyiv, self.lviv, 1)
+        self.journey(self.kyiv, self.lviv, 5)
+        self.journey(self.kyiv, self.lviv, -1)
+        self.journey(self.lviv, self.kyiv, 1)
+        Ticket.objects.create(
+            journey=first,
+            cargo=1,
+            seat=1,
+            order=self.user.orders.create(),
+        )
+
+        res = self.client.get(departures_url(self.kyiv.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [journey["id"] for journey in res.data["results"]],
+            [first.id, later.id],
+        )
+        self.assertEqual(res.data["results"][0]["destination_name"], "Lviv")
+        self.assertEqual(res.data["results"][0]["tickets_available"], 19)
+        self.assertNotIn("crew", res.data["results"][0])
+
+        res = self.client.get(departures_url(self.kyiv.id), {"hours": 6})
+        self.assertEqual(len(res.data["results"]), 3)
+
+    def test_arrivals(self):
+        arriving = self.journey(self.kyiv, self.lviv, 0.5)
+        self.journey(self.lviv, self.odesa, 0.5)
+
+        res = self.client.get(arrivals_url(self.lviv.id))
+
+        self.assertEqual(
+            [journey["id"] for journey in res.data["results"]], [arriving.id]
+        )
+
+    def test_board_is_cached_for_the_minute(self):
+        self.journey(self.kyiv, self.lviv, 1)
+        now = mock.patch(
+            "train_station.views.timezone.now", return_value=self.now
+        )
+        now.start()
+        self.addCleanup(now.stop)
+        res = self.client.get(departures_url(self.kyiv.id))
+        self.assertEqual(res["X-Cache"], "MISS")
+
+        # authentication is forced, the board needs no query
+        with self.assertNumQueries(0):
+            res = self.client.get(departures_url(self.kyiv.id))
+        self.assertEqual(res["X-Cache"], "HIT")
+        self.assertEqual(len(res.data["results"]), 1)
+
+    @override_settings(RESPONSE_CACHE={"ENABLED": False})
+    def test_board_without_cache(self):
+        self.journey(self.kyiv, self.lviv, 1)
+        self.client.get(departures_url(self.kyiv.id))
+
+        self.journey(self.kyiv, self.odesa, 1)
+        res = self.client.get(departures_url(self.kyiv.id))
+
+        self.assertEqual(len(res.data["results"]), 2)
+        self.assertNotIn("X-Cache", res)
+
+    def test_unknown_station_and_invalid_hours(self):
+        res = self.client.get(departures_url(0))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+        res = self.client.get(arrivals_url(self.kyiv.id), {"hours": 48})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,157 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from train_station import station_index
+from train_station.geo import haversine
+from train_station.models import Station
+
+NEARBY_URL = reverse("train_station:station-nearby")
+
+
+class StationIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.stations = [
+            (1, 50.45, 30.52),  # Kyiv
+            (2, 49.84, 24.03),  # Lviv
+            (3, 46.48, 30.73),  # Odesa
+            (4, 50.40, 30.60),
+            (5, 64.0, 179.9),
+            (6, 64.0, -179.9),
+            (7, 89.99, 0.0),
+        ]
+        self.index = station_index.StationIndex(self.stations)
+
+    def brute_force(self, latitude, longitude, radius, limit):
+        distances = sorted(
+            (haversine(latitude, longitude, lat, lon), station_id)
+            for station_id, lat, lon in self.stations
+        )
+        return [
+            station_id
+            for distance, station_id in distances[:limit]
+            if distance <= radius
+        ]
+
+    def ids(self, *args):
+        return [station_id for station_id, _ in self.index.nearby(*args)]
+
+    def test_closest_first(self):
+        nearby = self.index.nearby(50.45, 30.52, 50, 10)
+
+        self.assertEqual([station for station, _ in nearby], [1, 4])
+        self.assertEqual(nearby[0][1], 0)
+        self.assertAlmostEqual(
+            nearby[1][1], haversine(50.45, 30.52, 50.40, 30.60)
+        )
+
+    def test_matches_brute_force(self):
+        for latitude, longitude, radius, limit in (
+            (50.0, 30.0, 500, 10),
+            (50.0, 30.0, 500, 2),
+            (48.0, 27.0, 1000, 3),
+            (0.0, 0.0, 100, 5),
+        ):
+            self.assertEqual(
+                self.ids(latitude, longitude, radius, limit),
+                self.brute_force(latitude, longitude, radius, limit),
+            )
+
+    def test_antimeridian_and_poles(self):
+        self.assertEqual(self.ids(64.0, 179.95, 10, 5), [5, 6])
+        self.assertEqual(self.ids(89.9, 120.0, 50, 5), [7])
+
+    def visited_cells(self, *args):
+        index = station_index.StationIndex(self.stations)
+        lookups = []
+
+        class Cells(dict):
+            def get(self, cell, default=None):
+                lookups.append(cell)
+                return super().get(cell, default)
+
+        index.cells = Cells(index.cells)
+        index.nearby(*args)
+        return lookups
+
+    def test_cells_visited_near_poles_are_bounded(self):
+        # 50 km spans 3 rows there, every longitude once it covers the pole
+        cells = self.visited_cells(89.9, 120.0, 50, 5)
+        self.assertLessEqual(len(cells), 3 * self.index.columns)
+        self.assertEqual(len(cells), len(set(cells)))
+
+        # below the pole only the columns of the radius
+        cells = self.visited_cells(-80.0, 10.0, 50, 5)
+        self.assertLessEqual(len(cells), 5 * 24)
+
+        cells = self.visited_cells(0.0, 0.0, 50, 5)
+        self.assertLessEqual(len(cells), 5 * 5)
+
+
+class NearbyApiTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        # the index is replaced when the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.kyiv = Station.objects.create(
+                name="Kyiv", latitude=50.45, longitude=30.52
+            )
+            self.boryspil = Station.objects.create(
+                name="Boryspil", latitude=50.35, longitude=30.95
+            )
+            self.lviv = Station.objects.create(
+                name="Lviv", latitude=49.84, longitude=24.03
+            )
+            Station.objects.create(name="Unknown")
+
+    def test_nearby(self):
+        res = self.client.get(NEARBY_URL, {"lat": 50.45, "lon": 30.5})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [station["name"] for station in res.data["results"]],
+            ["Kyiv", "Boryspil"],
+        )
+        self.assertEqual(res.data["results"][0]["latitude"], 50.45)
+        self.assertAlmostEqual(
+            res.data["results"][1]["distance_km"],
+            haversine(50.45, 30.5, 50.35, 30.95),
+            places=3,
+        )
+
+        res = self.client.get(
+            NEARBY_URL, {"lat": 50.45, "lon": 30.5, "radius": 500, "limit": 1}
+        )
+        self.assertEqual(
+            [station["name"] for station in res.data["results"]], ["Kyiv"]
+        )
+
+    def test_index_is_rebuilt_after_station_changes(self):
+        self.client.get(NEARBY_URL, {"lat": 49.84, "lon": 24.0})
+
+        self.lviv.longitude = 35.0
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lviv.save()
+        res = self.client.get(NEARBY_URL, {"lat": 49.84, "lon": 24.0})
+
+        self.assertEqual(res.data["results"], [])
+
+    def test_invalid_parameters(self):
+        for params in (
+            {"lon": 30.5},
+            {"lat": "x", "lon": 30.5},
+            {"lat": 91, "lon": 30.5},
+            {"lat": 50, "lon": 181},
+            {"lat": 50, "lon": 30.5, "radius": 5000},
+            {"lat": 50, "lon": 30.5, "limit": 0},
+        ):
+            res = self.client.get(NEARBY_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
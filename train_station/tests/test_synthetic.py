@@ -0,0 +1,119 @@
+import random
+from datetime import date, datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command, CommandError
+from django.db.models import Count
+from django.test import TestCase
+
+from train_station.models import (
+    Journey,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+from train_station.synthetic import _create_orders, generate_dataset
+
+
+class GenerateDatasetTests(TestCase):
+    def test_generate_dataset(self):
+        counts = generate_dataset(
+            stations=20,
+            trains=5,
+            crews=4,
+            days=2,
+            users=10,
+            tickets=300,
+            batch_size=50,
+            start_date=date(2025, 10, 1),
+        )
+
+        self.assertEqual(Station.objects.count(), 20)
+        self.assertEqual(Route.objects.count(), counts["routes"])
+        self.assertEqual(Journey.objects.count(), counts["routes"] * 2)
+        self.assertEqual(Ticket.objects.count(), 300)
+        self.assertEqual(Order.objects.count(), counts["orders"])
+        self.assertFalse(
+            Station.objects.filter(latitude__isnull=True).exists()
+        )
+        self.assertFalse(
+            Ticket.objects.values("journey", "cargo", "seat")
+            .annotate(taken=Count("id"))
+            .filter(taken__gt=1)
+            .exists()
+        )
+        for ticket in Ticket.objects.select_related("journey__train")[:50]:
+            ticket.clean()
+
+    def test_every_seat_sold(self):
+        user = get_user_model().objects.create_user("a@a.com", "pass")
+        route = Route.objects.create(
+            source=Station.objects.create(name="Kyiv"),
+            destination=Station.objects.create(name="Lviv"),
+            distance=540,
+        )
+        train_type = TrainType.objects.create(name="Regional")
+        # small trains, so the journey replacing a full one is often full
+        journeys = [
+            Journey.objects.create(
+                route=route,
+                train=Train.objects.create(
+                    name=f"Train_{i}",
+                    cargo_num=2,
+                    places_in_cargo=1,
+                    train_type=train_type,
+                ),
+                departure_time=datetime(2025, 10, 1, i, 0),
+                arrival_time=datetime(2025, 10, 1, i, 30),
+            )
+            for i in range(8)
+        ]
+
+        for seed in range(10):
+            Order.objects.all().delete()
+            _, sold = _create_orders(
+                random.Random(seed),
+                journeys,
+                [user],
+                16,
+                batch_size=100,
+                log=lambda message: None,
+            )
+
+            self.assertEqual(sold, 16)
+            for ticket in Ticket.objects.select_related("journey__train"):
+                ticket.clean()
+
+    def test_same_seed_gives_same_dataset(self):
+        generate_dataset(stations=10, days=1, users=5, tickets=50, seed=7)
+        first = list(
+            Route.objects.order_by("source__name", "destination__name")
+            .values_list("source__name", "destination__name", "distance")
+        )
+
+        Station.objects.all().delete()
+        Order.objects.all().delete()
+        generate_dataset(stations=10, days=1, users=0, tickets=0, seed=7)
+
+        second = list(
+            Route.objects.order_by("source__name", "destination__name")
+            .values_list("source__name", "destination__name", "distance")
+        )
+        self.assertEqual(first, second)
+
+    def test_too_many_tickets(self):
+        with self.assertRaises(CommandError):
+            call_command(
+                "generate_dataset",
+                "--stations=2",
+                "--routes-per-station=1",
+                "--trains=1",
+                "--days=1",
+                "--users=1",
+                "--tickets=100000",
+                stdout=StringIO(),
+            )
@@ -0,0 +1,165 @@
+import json
+import os
+import tempfile
+from datetime import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings, TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from train_station.models import (
+    Journey,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+from train_station_service import tracing
+
+ORDER_URL = reverse("train_station:order-list")
+STATION_URL = reverse("train_station:station-list")
+
+
+class TracingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.file = os.path.join(tmp.name, "traces.jsonl")
+
+    def traced(self, **config):
+        return override_settings(
+            TRACING={
+                "ENABLED": True,
+                "SAMPLE_RATE": 1.0,
+                "FILE": self.file,
+                **config,
+            }
+        )
+
+    def exported_spans(self) -> dict:
+        tracing.flush()
+        with open(self.file) as fp:
+            spans = [
+                span
+                for line in fp
+                for resource in json.loads(line)["resourceSpans"]
+                for scope in resource["scopeSpans"]
+                for span in scope["spans"]
+            ]
+        return {span["spanId"]: span for span in spans}
+
+    def parent_names(self, spans: dict, span: dict) -> list[str]:
+        names = []
+        while span.get("parentSpanId") in spans:
+            span = spans[span["parentSpanId"]]
+            names.append(span["name"])
+        return names
+
+    def test_nested_serializer_spans(self):
+        route = Route.objects.create(
+            source=Station.objects.create(name="Kyiv"),
+            destination=Station.objects.create(name="Lviv"),
+            distance=540,
+        )
+        journey = Journey.objects.create(
+            route=route,
+            train=Train.objects.create(
+                name="Sample_train",
+                cargo_num=10,
+                places_in_cargo=50,
+                train_type=TrainType.objects.create(name="Express"),
+            ),
+            departure_time=datetime(2025, 10, 23, 8, 0),
+            arrival_time=datetime(2025, 10, 23, 14, 0),
+        )
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(cargo=1, seat=1, journey=journey, order=order)
+
+        with self.traced():
+            res = self.client.get(ORDER_URL)
+
+        spans = self.exported_spans()
+        by_name = {span["name"]: span for span in spans.values()}
+        root = by_name["GET train_station:order-list"]
+        self.assertNotIn("parentSpanId", root)
+        self.assertEqual(root["kind"], tracing.SERVER)
+        self.assertIn(root["traceId"], res["traceparent"])
+        journey_span = by_name["serialize JourneyListSerializer"]
+        self.assertEqual(
+            self.parent_names(spans, journey_span),
+            [
+                "serialize TicketListSerializer",
+                "serialize OrderListSerializer",
+                "view OrderViewSet.list",
+                "GET train_station:order-list",
+            ],
+        )
+        queries = [s for s in spans.values() if s["name"] == "db.query"]
+        self.assertTrue(queries)
+        self.assertIn(
+            "view OrderViewSet.list", self.parent_names(spans, queries[0])
+        )
+        self.assertEqual(
+            self.parent_names(spans, by_name["render"]),
+            ["GET train_station:order-list"],
+        )
+
+    def test_incoming_traceparent(self):
+        trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+        parent = "00f067aa0ba902b7"
+
+        with self.traced(SAMPLE_RATE=0.0):
+            self.client.get(
+                STATION_URL,
+                headers={"traceparent": f"00-{trace_id}-{parent}-00"},
+            )
+            self.assertFalse(os.path.exists(self.file))
+
+            self.client.get(
+                STATION_URL,
+                headers={"traceparent": f"00-{trace_id}-{parent}-01"},
+            )
+
+        root = next(
+            span for span in self.exported_spans().values()
+            if span["kind"] == tracing.SERVER
+        )
+        self.assertEqual(root["traceId"], trace_id)
+        self.assertEqual(root["parentSpanId"], parent)
+
+    def test_not_sampled(self):
+        with self.traced(SAMPLE_RATE=0.0):
+            res = self.client.get(STATION_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("traceparent", res)
+        tracing.flush()
+        self.assertFalse(os.path.exists(self.file))
+
+    def test_collector_prints_trees(self):
+        with self.traced():
+            self.client.get(STATION_URL)
+        tracing.flush()
+
+        out = StringIO()
+        call_command("trace_collector", "--read", self.file, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith("trace "))
+        self.assertTrue(
+            lines[1].startswith("  GET train_station:station-list ")
+        )
+        self.assertIn("    view StationViewSet.list", "\n".join(lines))
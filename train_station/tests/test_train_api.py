@@ -3,14 +3,17 @@ import os
 
 from PIL import Image
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from django.test import TestCase
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from jobs.models import Job
 from train_station.models import TrainType, Station, Route, Journey, Crew, Train
 from train_station.serializers import TrainListSerializer, TrainDetailSerializer
+from train_station.tasks import generate_train_image_variants
 
 TRAIN_URL = reverse("train_station:train-list")
 JOURNEY_URL = reverse("train_station:journey-list")
@@ -237,3 +240,49 @@ class TrainImageUploadTests(TestCase):
         res = self.client.get(TRAIN_URL)
 
         self.assertIn("image", res.data["results"][0].keys())
+
+    def test_upload_image_enqueues_variants_job(self):
+        url = image_upload_url(self.train.id)
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as ntf:
+            img = Image.new("RGB", (10, 10))
+            img.save(ntf, format="JPEG")
+            ntf.seek(0)
+            self.client.post(url, {"image": ntf}, format="multipart")
+
+        job = Job.objects.get()
+        self.assertEqual(
+            job.task, "train_station.tasks.generate_train_image_variants"
+        )
+        self.assertEqual(job.args, [self.train.id])
+
+    def test_image_variants_are_exposed_as_srcset(self):
+        url = image_upload_url(self.train.id)
+        with tempfile.NamedTemporaryFile(suffix=".png") as ntf:
+            img = Image.new("RGBA", (700, 350))
+            img.save(ntf, format="PNG")
+            ntf.seek(0)
+            self.client.post(url, {"image": ntf}, format="multipart")
+
+        generate_train_image_variants(self.train.id)
+        self.train.refresh_from_db()
+        variants = self.train.image_variants
+        self.addCleanup(
+            lambda: [
+                default_storage.delete(name)
+                for names in variants.values()
+                for name in names.values()
+            ]
+        )
+
+        self.assertEqual(set(variants), {"webp", "jpeg"})
+        self.assertEqual(set(variants["webp"]), {"320", "640"})
+        with default_storage.open(variants["jpeg"]["320"]) as fp:
+            self.assertEqual(Image.open(fp).size, (320, 160))
+
+        res = self.client.get(detail_url(self.train.id))
+        srcset = res.data["image_srcset"]["webp"]
+        self.assertRegex(
+            srcset,
+            r"^http://testserver/media/uploads/trains/variants/\w+-320w\.webp "
+            r"320w, \S+-640w\.webp 640w$",
+        )
@@ -0,0 +1,158 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from train_station import response_cache
+from train_station.models import (
+    Journey,
+    Order,
+    Route,
+    Station,
+    Ticket,
+    Train,
+    TrainType,
+)
+
+JOURNEY_URL = reverse("train_station:journey-list")
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        response_cache.get_cache().clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            "test@test.com",
+            "testpass",
+        )
+        self.client.force_authenticate(self.user)
+        # cached pages are invalidated when the transaction commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.route = Route.objects.create(
+                source=Station.objects.create(name="Kyiv"),
+                destination=Station.objects.create(name="Lviv"),
+                distance=540,
+            )
+            self.train = Train.objects.create(
+                name="Sample_train",
+                cargo_num=10,
+                places_in_cargo=50,
+                train_type=TrainType.objects.create(name="Express"),
+            )
+            departure = timezone.now() + timedelta(days=1)
+            self.journey = Journey.objects.create(
+                route=self.route,
+                train=self.train,
+                departure_time=departure,
+                arrival_time=departure + timedelta(hours=6),
+            )
+
+    def test_second_request_is_served_from_cache(self):
+        first = self.client.get(JOURNEY_URL, {"route": self.route.id})
+        second = self.client.get(JOURNEY_URL, {"route": self.route.id})
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.data, second.data)
+
+    def test_booking_invalidates_cached_lists(self):
+        self.client.get(JOURNEY_URL)
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(user=self.user)
+            Ticket.objects.create(
+                cargo=1, seat=1, journey=self.journey, order=order
+            )
+
+        res = self.client.get(JOURNEY_URL)
+
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["results"][0]["tickets_available"], 499)
+
+    def test_booking_bumps_the_version_once(self):
+        tickets = [
+            {"journey": self.journey.id, "cargo": 1, "seat": seat}
+            for seat in range(1, 11)
+        ]
+
+        with mock.patch("train_station.snapshots.bump") as bump:
+            with self.captureOnCommitCallbacks(execute=True):
+                res = self.client.post(
+                    reverse("train_station:order-list"),
+                    {"tickets": tickets},
+                    format="json",
+                )
+                bump.assert_not_called()
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        bump.assert_called_once_with(response_cache.VERSION_KEY)
+
+    def test_disabled(self):
+        with override_settings(RESPONSE_CACHE={"ENABLED": False}):
+            self.client.get(JOURNEY_URL)
+            res = self.client.get(JOURNEY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn("X-Cache", res)
+
+    def warmup(self, *args):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        marker = os.path.join(tmp.name, "warmup.json")
+        out = StringIO()
+        call_command(
+            "warmup",
+            "--concurrency=1",
+            "--base-url=http://testserver",
+            f"--marker={marker}",
+            *args,
+            stdout=out,
+            stderr=StringIO(),
+        )
+        with open(marker) as fp:
+            return json.load(fp), out.getvalue()
+
+    def test_warmup_from_access_log(self):
+        query = f"{JOURNEY_URL}?route={self.route.id}"
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        log = os.path.join(tmp.name, "access.log")
+        with open(log, "w") as fp:
+            for _ in range(3):
+                fp.write(
+                    f'127.0.0.1 - - [01/Oct/2030:08:00:00 +0000] '
+                    f'"GET {query} HTTP/1.1" 200 512 "-" "curl"\n'
+                )
+            fp.write(f"{JOURNEY_URL}?train={self.train.id}\n")
+            fp.write("/no/such/url/\n")
+
+        summary, output = self.warmup(f"--queries={log}")
+
+        self.assertEqual(summary["queries"], 3)
+        self.assertEqual(summary["warmed"], 2)
+        self.assertEqual(summary["failed"], 1)
+        self.assertIn("Warmed 2 of 3 queries", output)
+        res = self.client.get(JOURNEY_URL, {"route": self.route.id})
+        self.assertEqual(res["X-Cache"], "HIT")
+
+    def test_warmup_derives_popular_searches(self):
+        summary, _ = self.warmup()
+
+        day = timezone.localtime(self.journey.departure_time).date()
+        res = self.client.get(
+            JOURNEY_URL,
+            {"departure_time": day.isoformat(), "route": self.route.id},
+        )
+        self.assertEqual(summary["warmed"], 3)
+        self.assertEqual(res["X-Cache"], "HIT")
+        self.assertEqual(res.data["count"], 1)
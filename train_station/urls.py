@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework import routers
 
+from train_station import async_views
 from train_station.views import (
     TrainTypeViewSet,
     TrainViewSet,
@@ -8,7 +9,8 @@ from train_station.views import (
     StationViewSet,
     RouteViewSet,
     JourneyViewSet,
-    OrderViewSet
+    OrderViewSet,
+    ItineraryView,
 )
 
 router = routers.DefaultRouter()
@@ -21,6 +23,34 @@ router.register("journeys", JourneyViewSet)
 router.register("orders", OrderViewSet)
 
 
-urlpatterns = [path("", include(router.urls))]
+urlpatterns = [
+    path("", include(router.urls)),
+    path("itineraries/", ItineraryView.as_view(), name="itineraries"),
+    path(
+        "async/journeys/",
+        async_views.journey_list,
+        name="async-journey-list"
+    ),
+    path(
+        "async/journeys/<int:pk>/",
+        async_views.journey_detail,
+        name="async-journey-detail"
+    ),
+    path(
+        "async/journeys/<int:pk>/seats/",
+        async_views.journey_seats,
+        name="async-journey-seats"
+    ),
+    path(
+        "async/journeys/<int:pk>/seats/stream/",
+        async_views.journey_seats_stream,
+        name="async-journey-seats-stream"
+    ),
+    path(
+        "async/stations/",
+        async_views.station_list,
+        name="async-station-list"
+    ),
+]
 
 app_name = "train_station"
@@ -1,14 +1,29 @@
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
 
 from django.db.models import F, Count
+from django.utils import timezone
 from drf_spectacular.types import OpenApiTypes
-from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import mixins, status, viewsets
+from drf_spectacular.utils import (
+    extend_schema,
+    inline_serializer,
+    OpenApiParameter,
+)
+from rest_framework import mixins, serializers, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import GenericViewSet
 
+from jobs.queue import enqueue
+from train_station import (
+    distance_matrix,
+    itineraries,
+    response_cache,
+    route_graph,
+    station_index,
+)
 from train_station.models import (
     TrainType,
     Crew,
@@ -16,7 +31,8 @@ from train_station.models import (
     Train,
     Route,
     Station,
-    Order
+    Order,
+    ArchivedOrder,
 )
 from train_station.serializers import (
     TrainTypeSerializer,
@@ -31,10 +47,108 @@ from train_station.serializers import (
     RouteSerializer,
     JourneyListSerializer,
     JourneyDetailSerializer,
+    JourneyBoardSerializer,
     JourneySerializer,
     OrderListSerializer,
     OrderSerializer,
 )
+from train_station.response_cache import CachedListMixin
+from train_station.tasks import generate_train_image_variants
+from train_station_service.metrics import record_cache_lookup
+
+
+class BatchRetrieveMixin:
+    """Allows list endpoint to fetch several objects by id (?ids=1,2,3)
+
+    All ids are resolved with a single query over the viewset queryset.
+    Results keep the requested order, missing ids get a not found entry.
+    """
+
+    max_batch_size = 50
+
+    def _batch_ids(self, ids_str: str) -> list[int]:
+        try:
+            ids = [int(str_id) for str_id in ids_str.split(",") if str_id]
+        except ValueError:
+            raise ValidationError(
+                {"ids": "Ids must be comma separated integers"}
+            )
+
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            raise ValidationError({"ids": "At least one id is required"})
+        if len(ids) > self.max_batch_size:
+            raise ValidationError(
+                {"ids": f"No more than {self.max_batch_size} ids are allowed"}
+            )
+
+        return ids
+
+    def list(self, request, *args, **kwargs):
+        ids_str = request.query_params.get("ids")
+        if ids_str is None:
+            return super().list(request, *args, **kwargs)
+
+        ids = self._batch_ids(ids_str)
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = queryset.filter(pk__in=ids)
+        serialized = {
+            item["id"]: item
+            for item in self.get_serializer(queryset, many=True).data
+        }
+        not_found = [pk for pk in ids if pk not in serialized]
+
+        return Response({
+            "count": len(serialized),
+            "results": [
+                serialized.get(pk, {"id": pk, "detail": "Not found."})
+                for pk in ids
+            ],
+            "not_found": not_found,
+        })
+
+
+def query_param(query_params, name: str, parse, required: bool = False):
+    """Query parameter converted with `parse`, 400 if it can't be"""
+    value = query_params.get(name)
+    if value is None:
+        if required:
+            raise ValidationError({name: "This parameter is required."})
+        return None
+    try:
+        return parse(value)
+    except ValueError:
+        raise ValidationError({name: f"Invalid value: {value!r}"})
+
+
+BATCH_IDS_PARAMETER = OpenApiParameter(
+    "ids",
+    type=OpenApiTypes.INT,
+    many=True,
+    explode=False,
+    description=(
+        "Fetch several objects by id in one request, results keep the "
+        "order of ids (ex. ?ids=2,5,3)"
+    ),
+)
+
+# stations listed by /stations/<id>/reachable/
+MAX_REACHABLE = 1000
+# stations listed by /stations/nearby/ and their distance in km
+MAX_NEARBY = 100
+MAX_NEARBY_RADIUS = 500
+# hours shown by /stations/<id>/departures/ and /arrivals/
+BOARD_HOURS = 3
+MAX_BOARD_HOURS = 24
+STATION_BOARD_RESPONSE = inline_serializer(
+    "StationBoard",
+    fields={
+        "station": serializers.IntegerField(),
+        "from": serializers.DateTimeField(),
+        "to": serializers.DateTimeField(),
+        "results": JourneyBoardSerializer(many=True),
+    },
+)
 
 
 class TrainTypeViewSet(
@@ -56,6 +170,7 @@ class CrewViewSet(
 
 
 class StationViewSet(
+    BatchRetrieveMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     GenericViewSet
@@ -63,8 +178,243 @@ class StationViewSet(
     queryset = Station.objects.all()
     serializer_class = StationSerializer
 
+    @extend_schema(parameters=[BATCH_IDS_PARAMETER])
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "max_distance",
+                type=OpenApiTypes.INT,
+                description="Only stations this close (ex. 500)",
+            ),
+            OpenApiParameter(
+                "limit",
+                type=OpenApiTypes.INT,
+                description=(
+                    f"Stations returned, 50 by default, {MAX_REACHABLE} at "
+                    "most"
+                ),
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(methods=["GET"], detail=True, url_path="reachable")
+    def reachable(self, request, pk=None):
+        """Stations reachable by routes, closest first"""
+        try:
+            station_id = int(pk)
+        except ValueError:
+            raise NotFound()
+        max_distance = query_param(
+            request.query_params, "max_distance", int
+        )
+        limit = query_param(request.query_params, "limit", int)
+        if limit is None:
+            limit = 50
+        if not 1 <= limit <= MAX_REACHABLE:
+            raise ValidationError(
+                {"limit": f"Must be between 1 and {MAX_REACHABLE}."}
+            )
+        graph = route_graph.get_graph()
+        if station_id not in graph:
+            raise NotFound()
+
+        reachable = graph.reachable(station_id, max_distance)
+        names = Station.objects.only("name").in_bulk(
+            [station for station, _ in reachable[:limit]]
+        )
+        return Response({
+            "count": len(reachable),
+            "results": [
+                {
+                    "id": station,
+                    "name": names[station].name,
+                    "distance": distance,
+                }
+                for station, distance in reachable[:limit]
+                if station in names
+            ],
+        })
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "lat",
+                type=OpenApiTypes.FLOAT,
+                required=True,
+                description="Latitude in degrees (ex. 50.45)",
+            ),
+            OpenApiParameter(
+                "lon",
+                type=OpenApiTypes.FLOAT,
+                required=True,
+                description="Longitude in degrees (ex. 30.52)",
+            ),
+            OpenApiParameter(
+                "radius",
+                type=OpenApiTypes.FLOAT,
+                description=(
+                    "Search radius in km, 50 by default, "
+                    f"{MAX_NEARBY_RADIUS} at most"
+                ),
+            ),
+            OpenApiParameter(
+                "limit",
+                type=OpenApiTypes.INT,
+                description=(
+                    f"Stations returned, 10 by default, {MAX_NEARBY} at most"
+                ),
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(methods=["GET"], detail=False, url_path="nearby")
+    def nearby(self, request):
+        """Stations closest to a point, by great-circle distance"""
+        params = request.query_params
+        latitude = query_param(params, "lat", float, required=True)
+        longitude = query_param(params, "lon", float, required=True)
+        radius = query_param(params, "radius", float)
+        if radius is None:
+            radius = 50
+        limit = query_param(params, "limit", int)
+        if limit is None:
+            limit = 10
+        if not -90 <= latitude <= 90:
+            raise ValidationError({"lat": "Must be between -90 and 90."})
+        if not -180 <= longitude <= 180:
+            raise ValidationError({"lon": "Must be between -180 and 180."})
+        if not 0 <= radius <= MAX_NEARBY_RADIUS:
+            raise ValidationError(
+                {"radius": f"Must be between 0 and {MAX_NEARBY_RADIUS}."}
+            )
+        if not 1 <= limit <= MAX_NEARBY:
+            raise ValidationError(
+                {"limit": f"Must be between 1 and {MAX_NEARBY}."}
+            )
+
+        nearby = station_index.get_index().nearby(
+            latitude, longitude, radius, limit
+        )
+        stations = Station.objects.in_bulk(
+            [station for station, _ in nearby]
+        )
+        return Response({
+            "results": [
+                {
+                    **self.get_serializer(stations[station]).data,
+                    "distance_km": round(distance, 3),
+                }
+                for station, distance in nearby
+                if station in stations
+            ],
+        })
+
+    def _board(self, request, pk, end: str, time_field: str) -> Response:
+        """Journeys leaving/reaching a station in the next hours.
+
+        Boards are cached for the current minute, every display polling
+        a station in the same minute gets the same response. The cache is
+        the response cache, per process unless CACHE_BACKEND is shared.
+        """
+        try:
+            station_id = int(pk)
+        except ValueError:
+            raise NotFound()
+        hours = query_param(request.query_params, "hours", int)
+        if hours is None:
+            hours = BOARD_HOURS
+        if not 1 <= hours <= MAX_BOARD_HOURS:
+            raise ValidationError(
+                {"hours": f"Must be between 1 and {MAX_BOARD_HOURS}."}
+            )
+
+        start = timezone.now().replace(second=0, microsecond=0)
+        key = (
+            f"station_board:{time_field}:{station_id}:{hours}:"
+            f"{start.isoformat()}"
+        )
+        cache_enabled = response_cache.get_config()["ENABLED"]
+        if cache_enabled:
+            data = response_cache.get_cache().get(key)
+            if data is not None:
+                record_cache_lookup("station_board", hits=1)
+                return Response(data, headers={"X-Cache": "HIT"})
+            record_cache_lookup("station_board", misses=1)
+
+        journeys = (
+            Journey.objects.filter(
+                **{
+                    f"route__{end}_id": station_id,
+                    f"{time_field}__gte": start,
+                    f"{time_field}__lt": start + timedelta(hours=hours),
+                }
+            )
+            .select_related("route__source", "route__destination", "train")
+            .annotate(
+                tickets_available=(
+                    F("train__cargo_num") * F("train__places_in_cargo")
+                    - Count("tickets")
+                )
+            )
+            .order_by(time_field, "id")
+        )
+        results = JourneyBoardSerializer(journeys, many=True).data
+        if not results and not Station.objects.filter(id=station_id).exists():
+            raise NotFound()
+
+        data = {
+            "station": station_id,
+            "from": start,
+            "to": start + timedelta(hours=hours),
+            "results": results,
+        }
+        if not cache_enabled:
+            return Response(data)
+        response_cache.get_cache().set(key, data, timeout=60)
+        return Response(data, headers={"X-Cache": "MISS"})
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "hours",
+                type=OpenApiTypes.INT,
+                description=(
+                    f"Journeys departing in the next hours, {BOARD_HOURS} "
+                    f"by default, {MAX_BOARD_HOURS} at most"
+                ),
+            ),
+        ],
+        responses=STATION_BOARD_RESPONSE,
+    )
+    @action(methods=["GET"], detail=True, url_path="departures")
+    def departures(self, request, pk=None):
+        """Departure board of a station, seats remaining included"""
+        return self._board(request, pk, "source", "departure_time")
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "hours",
+                type=OpenApiTypes.INT,
+                description=(
+                    f"Journeys arriving in the next hours, {BOARD_HOURS} "
+                    f"by default, {MAX_BOARD_HOURS} at most"
+                ),
+            ),
+        ],
+        responses=STATION_BOARD_RESPONSE,
+    )
+    @action(methods=["GET"], detail=True, url_path="arrivals")
+    def arrivals(self, request, pk=None):
+        """Arrival board of a station, seats remaining included"""
+        return self._board(request, pk, "destination", "arrival_time")
+
 
 class TrainViewSet(
+    BatchRetrieveMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.ListModelMixin,
@@ -110,7 +460,9 @@ class TrainViewSet(
         serializer = self.get_serializer(train, data=request.data)
 
         if serializer.is_valid():
-            serializer.save()
+            # variants of the previous image are replaced in the background
+            serializer.save(image_variants={})
+            enqueue(generate_train_image_variants, [train.id])
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -127,6 +479,7 @@ class TrainViewSet(
                 type=OpenApiTypes.STR,
                 description="Filter by name of Train (ex. ?name=Express)"
             ),
+            BATCH_IDS_PARAMETER,
         ]
     )
     def list(self, request, *args, **kwargs):
@@ -134,6 +487,7 @@ class TrainViewSet(
 
 
 class RouteViewSet(
+    BatchRetrieveMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
     mixins.ListModelMixin,
@@ -176,15 +530,97 @@ class RouteViewSet(
                 type=OpenApiTypes.INT,
                 description="Filter by destination id (ex. ?destination=2)",
             ),
+            BATCH_IDS_PARAMETER,
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "from",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Source station id",
+            ),
+            OpenApiParameter(
+                "to",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Destination station id",
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(methods=["GET"], detail=False, url_path="shortest")
+    def shortest(self, request):
+        """Shortest sequence of routes between two stations"""
+        origin = query_param(request.query_params, "from", int, True)
+        target = query_param(request.query_params, "to", int, True)
+        graph = route_graph.get_graph()
+        if origin not in graph or target not in graph:
+            raise NotFound("Unknown station.")
+        found = graph.shortest_path(origin, target)
+        if found is None:
+            raise NotFound("No routes between these stations.")
+
+        distance, stations = found
+        names = Station.objects.only("name").in_bulk(stations)
+        return Response({
+            "distance": distance,
+            "stations": [
+                {"id": station, "name": names[station].name}
+                for station in stations
+                if station in names
+            ],
+        })
 
-class JourneyViewSet(viewsets.ModelViewSet):
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "from",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Source station id",
+            ),
+            OpenApiParameter(
+                "to",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Destination station id",
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    @action(methods=["GET"], detail=False, url_path="distance")
+    def distance(self, request):
+        """Shortest route distance between two stations"""
+        origin = query_param(request.query_params, "from", int, True)
+        target = query_param(request.query_params, "to", int, True)
+        matrix = distance_matrix.get_matrix()
+        if matrix is not None and origin in matrix and target in matrix:
+            distance = matrix.distance(origin, target)
+        else:
+            # not computed yet or the stations are new, search the graph
+            graph = route_graph.get_graph()
+            if origin not in graph or target not in graph:
+                raise NotFound("Unknown station.")
+            found = graph.shortest_path(origin, target)
+            distance = None if found is None else found[0]
+        if distance is None:
+            raise NotFound("No routes between these stations.")
+
+        return Response({"from": origin, "to": target, "distance": distance})
+
+
+class JourneyViewSet(
+    CachedListMixin, BatchRetrieveMixin, viewsets.ModelViewSet
+):
     queryset = (
-        Journey.objects.select_related("route", "train")
+        Journey.objects.select_related(
+            "route__source", "route__destination", "train"
+        )
         .prefetch_related("crew")
         .annotate(
             tickets_available=(
@@ -200,16 +636,19 @@ class JourneyViewSet(viewsets.ModelViewSet):
         return [int(str_id) for str_id in qs.split(",")]
 
     def get_queryset(self):
-        train_id_str = self.request.query_params.get("train")
-        route_id_str = self.request.query_params.get("route")
-        crew = self.request.query_params.get("crew")
-        departure_time = self.request.query_params.get("departure_time")
-        arrival_time = self.request.query_params.get("arrival_time")
+        return self.filter_by_params(self.queryset, self.request.query_params)
 
-        queryset = self.queryset
+    @classmethod
+    def filter_by_params(cls, queryset, query_params):
+        """Applies list filters from query params, shared with async views"""
+        train_id_str = query_params.get("train")
+        route_id_str = query_params.get("route")
+        crew = query_params.get("crew")
+        departure_time = query_params.get("departure_time")
+        arrival_time = query_params.get("arrival_time")
 
         if crew:
-            crew_ids = self._params_to_ints(crew)
+            crew_ids = cls._params_to_ints(crew)
             queryset = queryset.filter(crew__id__in=crew_ids)
 
         if train_id_str:
@@ -244,7 +683,9 @@ class JourneyViewSet(viewsets.ModelViewSet):
         parameters=[
             OpenApiParameter(
                 "crew",
-                type={"type": "list", "items": {"type": "number"}},
+                type=OpenApiTypes.INT,
+                many=True,
+                explode=False,
                 description="Filter by crew id (ex. ?crew=2,5)",
             ),
             OpenApiParameter(
@@ -273,6 +714,7 @@ class JourneyViewSet(viewsets.ModelViewSet):
                     "(ex. ?arrival_time=2025-09-23)"
                 ),
             ),
+            BATCH_IDS_PARAMETER,
         ]
     )
     def list(self, request, *args, **kwargs):
@@ -302,3 +744,92 @@ class OrderViewSet(
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+    @extend_schema(responses=OrderListSerializer(many=True))
+    @action(methods=["GET"], detail=False, url_path="archived")
+    def archived(self, request):
+        """Orders moved to the archive by `archive_journeys`"""
+        page = self.paginate_queryset(
+            ArchivedOrder.objects.filter(user=request.user).only(
+                "id", "created_at", "payload"
+            )
+        )
+        return self.get_paginated_response(
+            [archived_order.data for archived_order in page]
+        )
+
+
+class ItineraryView(APIView):
+    """Journeys with changes of train between two stations"""
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "from",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Source station id",
+            ),
+            OpenApiParameter(
+                "to",
+                type=OpenApiTypes.INT,
+                required=True,
+                description="Destination station id",
+            ),
+            OpenApiParameter(
+                "date",
+                type=OpenApiTypes.DATE,
+                description="Travel date, today by default (ex. 2030-01-07)",
+            ),
+            OpenApiParameter(
+                "time",
+                type=OpenApiTypes.STR,
+                description="Earliest departure (ex. ?time=08:30)",
+            ),
+            OpenApiParameter(
+                "results",
+                type=OpenApiTypes.INT,
+                description="Number of alternatives, later departures",
+            ),
+        ],
+        responses=OpenApiTypes.OBJECT,
+    )
+    def get(self, request):
+        params = request.query_params
+        origin = query_param(params, "from", int, required=True)
+        target = query_param(params, "to", int, required=True)
+        if origin == target:
+            raise ValidationError({"to": "Must differ from `from`."})
+        day = (
+            query_param(params, "date", date.fromisoformat)
+            or timezone.localdate()
+        )
+        after = query_param(params, "time", time.fromisoformat)
+        max_results = itineraries.get_config()["MAX_RESULTS"]
+        results = query_param(params, "results", int)
+        if results is not None and not 1 <= results <= max_results:
+            raise ValidationError(
+                {"results": f"Must be between 1 and {max_results}."}
+            )
+
+        found = itineraries.search(origin, target, day, after, results)
+        journeys = JourneyViewSet.queryset.in_bulk(
+            {journey_id for legs in found for journey_id in legs}
+        )
+        data = []
+        for legs in found:
+            if any(journey_id not in journeys for journey_id in legs):
+                # deleted since the timetable was built
+                continue
+            legs = [journeys[journey_id] for journey_id in legs]
+            data.append({
+                "departure_time": legs[0].departure_time,
+                "arrival_time": legs[-1].arrival_time,
+                "duration_minutes": int(
+                    (legs[-1].arrival_time - legs[0].departure_time)
+                    .total_seconds() // 60
+                ),
+                "transfers": len(legs) - 1,
+                "legs": JourneyListSerializer(legs, many=True).data,
+            })
+        return Response({"results": data})
@@ -0,0 +1,180 @@
+"""Liveness (/healthz) and readiness (/readyz) probes.
+
+/healthz does no I/O, it only shows that a worker answers. /readyz checks
+the database, the caches, pending migrations, the job queue backlog and,
+optionally, that `warmup` has finished. Checks run in background threads
+with a total time budget (HEALTH["TIMEOUT"]) shorter than the probe timeout
+of the load balancer, so a hanging dependency makes the instance fail the
+probe instead of timing it out. The result is reused for
+HEALTH["CACHE_SECONDS"], frequent probes don't load the database.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import connections
+from django.dispatch import receiver
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+
+OK = "ok"
+WARN = "warn"
+FAIL = "fail"
+
+_lock = threading.Lock()
+_executor = None
+_result = None
+_result_at = None
+
+
+def get_config() -> dict:
+    return {
+        "CACHE_SECONDS": 2.0,
+        "TIMEOUT": 1.0,
+        # oldest due job in seconds, more only gives a warning
+        "MAX_JOB_LAG": 300,
+        "REQUIRE_WARMUP": False,
+        **getattr(settings, "HEALTH", {}),
+    }
+
+
+class CheckFailed(Exception):
+    pass
+
+
+def check_database() -> str:
+    for alias in connections:
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+    return ""
+
+
+def check_caches() -> str:
+    for alias in settings.CACHES:
+        cache = caches[alias]
+        cache.set("health:probe", 1, timeout=10)
+        if cache.get("health:probe") != 1:
+            raise CheckFailed(f"cache {alias!r} lost a value")
+    return ""
+
+
+def check_migrations() -> str:
+    from train_station.management.commands.serve import (
+        has_pending_migrations,
+    )
+
+    if has_pending_migrations():
+        raise CheckFailed("unapplied migrations")
+    return ""
+
+
+def check_jobs() -> str:
+    from jobs.queue import queue_stats
+
+    lag = max(
+        (queue.get("lag_s", 0) for queue in queue_stats().values()),
+        default=0,
+    )
+    if lag > get_config()["MAX_JOB_LAG"]:
+        raise CheckFailed(f"oldest due job waits {lag} s")
+    return f"lag {lag} s"
+
+
+def check_warmup() -> str:
+    from train_station.management.commands.warmup import (
+        get_config as warmup_config,
+    )
+
+    if not os.path.exists(warmup_config()["MARKER_FILE"]):
+        raise CheckFailed("warmup has not finished")
+    return ""
+
+
+# name: (check, whether a failure makes the instance not ready)
+CHECKS = {
+    "database": (check_database, True),
+    "cache": (check_caches, True),
+    "migrations": (check_migrations, True),
+    "jobs": (check_jobs, False),
+    "warmup": (check_warmup, True),
+}
+
+
+def _run(check) -> tuple[str, str, float]:
+    started = time.perf_counter()
+    try:
+        status, detail = OK, check()
+    except Exception as error:
+        status, detail = FAIL, str(error) or type(error).__name__
+    finally:
+        # probe threads must not keep database connections around
+        connections.close_all()
+    return status, detail, round((time.perf_counter() - started) * 1000, 2)
+
+
+def run_checks() -> dict:
+    global _executor
+    config = get_config()
+    checks = dict(CHECKS)
+    if not config["REQUIRE_WARMUP"]:
+        del checks["warmup"]
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            len(CHECKS), thread_name_prefix="readyz"
+        )
+
+    futures = {
+        name: _executor.submit(_run, check)
+        for name, (check, _) in checks.items()
+    }
+    wait(futures.values(), timeout=config["TIMEOUT"])
+
+    results = {}
+    ready = True
+    for name, future in futures.items():
+        if future.done():
+            status, detail, ms = future.result()
+        else:
+            status, detail, ms = FAIL, "timed out", None
+        if status == FAIL and not checks[name][1]:
+            status = WARN
+        ready = ready and status != FAIL
+        results[name] = {"status": status, "ms": ms}
+        if detail:
+            results[name]["detail"] = detail
+    return {"status": OK if ready else FAIL, "checks": results}
+
+
+def readiness() -> dict:
+    """Result of the readiness checks, reused for a short time"""
+    global _result, _result_at
+    with _lock:
+        if (
+            _result_at is None
+            or time.monotonic() - _result_at > get_config()["CACHE_SECONDS"]
+        ):
+            _result = run_checks()
+            _result_at = time.monotonic()
+        return _result
+
+
+@receiver(setting_changed)
+def _reset_result(setting, **kwargs):
+    global _result_at
+    if setting in ("HEALTH", "CACHES", "WARMUP"):
+        _result_at = None
+
+
+@never_cache
+def healthz(request):
+    return JsonResponse({"status": OK})
+
+
+@never_cache
+def readyz(request):
+    result = readiness()
+    return JsonResponse(result, status=200 if result["status"] == OK else 503)
@@ -0,0 +1,205 @@
+"""Lightweight per-request timing, usable in production.
+
+RequestTimingMiddleware measures a sample of requests (settings
+REQUEST_TIMING["SAMPLE_RATE"]): number of SQL queries and time spent in the
+database, in serializers and in rendering. Results are sent to the client in
+a Server-Timing header and logged as one JSON line per request, tagged with
+the view that handled it (e.g. "JourneyViewSet.list").
+"""
+import json
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from train_station_service import tracing
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("request_timings", default=None)
+
+
+def get_config() -> dict:
+    return {
+        "ENABLED": True,
+        "SAMPLE_RATE": 1.0,
+        "HEADER": True,
+        **getattr(settings, "REQUEST_TIMING", {}),
+    }
+
+
+class RequestTimings:
+    __slots__ = (
+        "started",
+        "view",
+        "queries",
+        "db_time",
+        "serialize_time",
+        "serialize_depth",
+        "render_started",
+        "render_time",
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.serialize_depth = 0
+        self.render_started = None
+        self.render_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Database execute wrapper, see connection.execute_wrapper()"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - started
+            self.queries += 1
+
+    def server_timing(self, total: float) -> str:
+        return ", ".join((
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries"',
+            f"serialize;dur={self.serialize_time * 1000:.2f}",
+            f"render;dur={self.render_time * 1000:.2f}",
+            f"total;dur={total * 1000:.2f}",
+        ))
+
+
+def current_timings() -> RequestTimings | None:
+    """Timings of the request being handled, None if it is not sampled"""
+    return _current.get()
+
+
+def time_query(execute, sql, params, many, context):
+    """Database execute wrapper adding to the current request timings"""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install(sender, connection, **kwargs):
+    # a permanent wrapper also sees queries of async views, run by
+    # sync_to_async in another thread, the timings follow the context there
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+class TimedSerializerMixin:
+    """Adds the time spent in to_representation to the request timings.
+
+    Only the outermost serializer is timed, nested serializers and list
+    items are part of it. Traced requests get a span for every serializer.
+    """
+
+    def to_representation(self, instance):
+        with tracing.span(f"serialize {type(self).__name__}"):
+            timings = _current.get()
+            if timings is None or timings.serialize_depth:
+                return super().to_representation(instance)
+
+            timings.serialize_depth += 1
+            started = time.perf_counter()
+            try:
+                return super().to_representation(instance)
+            finally:
+                timings.serialize_time += time.perf_counter() - started
+                timings.serialize_depth -= 1
+
+
+def view_name(view_func, method: str) -> str:
+    """ViewSet.action for DRF viewsets, the view name otherwise"""
+    cls = getattr(view_func, "cls", None)
+    if cls is None:
+        return getattr(view_func, "__qualname__", repr(view_func))
+    action = (getattr(view_func, "actions", None) or {}).get(method.lower())
+    return f"{cls.__name__}.{action}" if action else cls.__name__
+
+
+class RequestTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = get_config()
+        self.enabled = config["ENABLED"]
+        self.sample_rate = config["SAMPLE_RATE"]
+        self.header = config["HEADER"]
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._sampled():
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings)
+
+    async def __acall__(self, request):
+        if not self._sampled():
+            return await self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings)
+
+    def _sampled(self) -> bool:
+        return self.enabled and random.random() < self.sample_rate
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = _current.get()
+        if timings is not None:
+            timings.view = view_name(view_func, request.method)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook
+        timings = _current.get()
+        if timings is not None:
+            timings.render_started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: self._rendered(timings)
+            )
+        return response
+
+    @staticmethod
+    def _rendered(timings: RequestTimings) -> None:
+        timings.render_time = time.perf_counter() - timings.render_started
+
+    def _finish(self, request, response, timings: RequestTimings):
+        total = time.perf_counter() - timings.started
+        if self.header:
+            response["Server-Timing"] = timings.server_timing(total)
+        logger.info(json.dumps({
+            "event": "request",
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "view": timings.view,
+            "duration_ms": round(total * 1000, 2),
+            "db_queries": timings.queries,
+            "db_ms": round(timings.db_time * 1000, 2),
+            "serialize_ms": round(timings.serialize_time * 1000, 2),
+            "render_ms": round(timings.render_time * 1000, 2),
+        }))
+        return response
@@ -0,0 +1,177 @@
+"""Serving of user uploaded files (MEDIA_ROOT).
+
+Python only decides whether a file may be served. Depending on
+settings.MEDIA_SERVE["MODE"] the bytes are then sent by the front proxy
+(`accel`: nginx X-Accel-Redirect, `sendfile`: Apache/lighttpd X-Sendfile)
+or by a FileResponse (`django`), which the WSGI server sends with
+sendfile() and which supports single byte ranges.
+"""
+import io
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+# Content hashes (image variants) and uuids (uploads) never change content
+HASHED_NAME_RE = re.compile(
+    r"(?:^|[-_.])(?:[0-9a-f]{16,}"
+    r"|[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})"
+    r"(?:[-_.]|$)"
+)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def get_config() -> dict:
+    return {
+        "MODE": "django",
+        "ACCEL_PREFIX": "/protected-media/",
+        "PUBLIC_PREFIXES": ("uploads/",),
+        "MAX_AGE": 3600,
+        **getattr(settings, "MEDIA_SERVE", {}),
+    }
+
+
+def check_access(request, name: str) -> None:
+    """Raise Http404 unless the user may download media file `name`"""
+    if any(part.startswith(".") for part in name.split("/")):
+        raise Http404
+    if not name.startswith(tuple(get_config()["PUBLIC_PREFIXES"])):
+        if not (request.user.is_authenticated and request.user.is_staff):
+            raise Http404
+
+
+def cache_control(name: str) -> str:
+    if HASHED_NAME_RE.search(posixpath.basename(name)):
+        return IMMUTABLE_CACHE_CONTROL
+    return f"public, max-age={get_config()['MAX_AGE']}"
+
+
+class RangeFile:
+    """Exposes `length` bytes of `file` from `start` as a file object.
+
+    Keeps fileno(), so WSGI servers can still sendfile() the range: they
+    start at the current offset and send Content-Length bytes.
+    """
+
+    def __init__(self, file, start: int, length: int):
+        file.seek(start)
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self.file.seek(offset, whence)
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Return (start, end) of a single byte range, end inclusive.
+
+    Raises ValueError for unsatisfiable ranges. Multiple ranges are not
+    supported, they get None like a missing header (full response).
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start:
+        if not end or not int(end):
+            raise ValueError("Unsatisfiable range")
+        return max(size - int(end), 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start > end:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+
+def file_response(request, path: str, etag: str) -> HttpResponse:
+    size = os.path.getsize(path)
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if range_header and request.headers.get("If-Range", etag) == etag:
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    file = open(path, "rb")
+    if byte_range is None:
+        return FileResponse(file)
+
+    start, end = byte_range
+    response = FileResponse(RangeFile(file, start, end - start + 1))
+    response.status_code = 206
+    response["Content-Length"] = end - start + 1
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return response
+
+
+@require_safe
+def serve_media(request, path: str):
+    name = posixpath.normpath(path).lstrip("/")
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404
+    check_access(request, name)
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    etag = quote_etag(f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+    last_modified = http_date(stat.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is None:
+        mode = get_config()["MODE"]
+        content_type = (
+            mimetypes.guess_type(name)[0] or "application/octet-stream"
+        )
+        if mode == "accel":
+            response = HttpResponse(content_type=content_type)
+            response["X-Accel-Redirect"] = (
+                get_config()["ACCEL_PREFIX"] + quote(name)
+            )
+        elif mode == "sendfile":
+            response = HttpResponse(content_type=content_type)
+            response["X-Sendfile"] = full_path
+        else:
+            response = file_response(request, full_path, etag)
+
+    response["ETag"] = etag
+    response["Last-Modified"] = last_modified
+    response["Cache-Control"] = cache_control(name)
+    response["Accept-Ranges"] = "bytes"
+    return response
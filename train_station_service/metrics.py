@@ -0,0 +1,165 @@
+"""Prometheus metrics, exposed at /metrics.
+
+With several worker processes set the PROMETHEUS_MULTIPROC_DIR environment
+variable to an empty writable directory before the server starts (`serve`
+clears it on startup); every process then writes its samples there and
+/metrics aggregates all of them.
+"""
+import os
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CollectorRegistry,
+    CONTENT_TYPE_LATEST,
+    Counter,
+    generate_latest,
+    Histogram,
+    REGISTRY,
+)
+from prometheus_client import multiprocess
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Time spent handling a request",
+    ["route", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+RESPONSES = Counter(
+    "http_responses_total",
+    "Responses by status code",
+    ["route", "method", "status"],
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL queries executed per request",
+    ["route", "method"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+THROTTLED = Counter(
+    "http_throttled_requests_total",
+    "Requests rejected by throttling",
+    ["route"],
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups_total",
+    "Cache lookups by result (hit or miss)",
+    ["cache", "result"],
+)
+BOOKING_CONFLICTS = Counter(
+    "booking_conflicts_total",
+    "Orders rejected because a seat was taken concurrently",
+    ["reason"],
+)
+
+
+def record_cache_lookup(cache: str, hits: int = 0, misses: int = 0) -> None:
+    if hits:
+        CACHE_LOOKUPS.labels(cache, "hit").inc(hits)
+    if misses:
+        CACHE_LOOKUPS.labels(cache, "miss").inc(misses)
+
+
+def route_name(request) -> str:
+    """Named URL pattern of the request, bounded label cardinality"""
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or match.route
+
+
+class QueryCounter:
+    __slots__ = ("count",)
+
+    def __init__(self):
+        self.count = 0
+
+
+_queries = ContextVar("metrics_query_counter", default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    """Database execute wrapper counting the queries of the request"""
+    queries = _queries.get()
+    if queries is not None:
+        queries.count += 1
+    return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def install(sender, connection, **kwargs):
+    # a permanent wrapper also sees queries run by sync_to_async in other
+    # threads under ASGI, the counter follows the context there
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+class PrometheusMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        started = time.perf_counter()
+        queries = QueryCounter()
+        token = _queries.set(queries)
+        try:
+            response = self.get_response(request)
+        finally:
+            _queries.reset(token)
+        self.observe(request, response, started, queries.count)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        queries = QueryCounter()
+        token = _queries.set(queries)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _queries.reset(token)
+        self.observe(request, response, started, queries.count)
+        return response
+
+    @staticmethod
+    def observe(request, response, started: float, queries: int) -> None:
+        route = route_name(request)
+        method = request.method
+        REQUEST_LATENCY.labels(route, method).observe(
+            time.perf_counter() - started
+        )
+        RESPONSES.labels(route, method, str(response.status_code)).inc()
+        REQUEST_QUERIES.labels(route, method).observe(queries)
+        if response.status_code == 429:
+            THROTTLED.labels(route).inc()
+
+
+def metrics_view(request):
+    """Metrics in the Prometheus text format"""
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and not constant_time_compare(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return HttpResponse(status=401)
+
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,326 @@
+"""On-demand profiling of single requests by staff users.
+
+A staff user adds `?_profile=cprofile` (deterministic cProfile) or
+`?_profile=alloc` (tracemalloc allocations) to any URL. The response body is
+replaced with the profile unless `_profile_store=1` is given: then the
+normal response is returned and the profile is saved for download from
+/api/profiles/<name>/ (URL in the X-Profile-Url header).
+
+`_profile_format` selects the output: "text" (pstats report or top
+allocations, default), "collapsed" (collapsed stacks for flamegraph.pl or
+speedscope) or "pstats" (marshalled stats for pstats/snakeviz, cprofile only).
+
+Requests of everyone else, or with profiling disabled, are handled exactly
+as without this middleware, the parameters are ignored.
+"""
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import re
+import tempfile
+import threading
+import tracemalloc
+import uuid
+from collections import Counter, defaultdict
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.urls import reverse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+MODES = ("cprofile", "alloc")
+# output format -> file extension
+FORMATS = {"text": "txt", "collapsed": "collapsed", "pstats": "prof"}
+CONTENT_TYPES = {
+    "txt": "text/plain; charset=utf-8",
+    "collapsed": "text/plain; charset=utf-8",
+    "prof": "application/octet-stream",
+}
+NAME_RE = re.compile(r"[0-9a-f]{32}\.(?:txt|collapsed|prof)")
+
+# cProfile and tracemalloc hooks are global, profile one request at a time
+_lock = threading.Lock()
+
+
+def get_config() -> dict:
+    return {
+        "ENABLED": True,
+        "STORAGE_DIR": os.path.join(tempfile.gettempdir(), "profiles"),
+        "MAX_STORED": 100,
+        "TOP": 60,
+        "ALLOC_FRAMES": 32,
+        **getattr(settings, "PROFILING", {}),
+    }
+
+
+def _label(func: tuple) -> str:
+    filename, lineno, name = func
+    if filename == "~":
+        return name.replace(";", ",")
+    path = "/".join(filename.split(os.sep)[-2:])
+    return f"{name} ({path}:{lineno})".replace(";", ",")
+
+
+def collapsed_cprofile(stats: dict) -> str:
+    """Collapsed stacks ("a;b;c <microseconds>") from cProfile stats.
+
+    cProfile only keeps caller -> callee edges, so the time of a function
+    called from several places is split in proportion to each edge.
+    """
+    callees = defaultdict(list)
+    roots = []
+    for func, (_, _, _, _, callers) in stats.items():
+        if not callers:
+            roots.append(func)
+        for caller, edge in callers.items():
+            callees[caller].append((func, edge[3]))
+
+    total = sum(stats[func][3] for func in roots)
+    threshold = max(total * 0.0005, 1e-5)
+    lines = Counter()
+
+    def walk(func, stack, path, share):
+        stack = f"{stack};{_label(func)}" if stack else _label(func)
+        lines[stack] += stats[func][2] * share
+        for callee, edge_ct in callees[func]:
+            callee_ct = stats[callee][3]
+            if callee in path or callee_ct <= 0:
+                continue
+            callee_share = share * min(edge_ct / callee_ct, 1.0)
+            if callee_share * callee_ct >= threshold:
+                walk(callee, stack, path | {callee}, callee_share)
+
+    for root in roots:
+        walk(root, "", {root}, 1.0)
+    return "".join(
+        f"{stack} {round(seconds * 1e6)}\n"
+        for stack, seconds in lines.items()
+        if round(seconds * 1e6) > 0
+    )
+
+
+def collapsed_alloc(snapshot: tracemalloc.Snapshot) -> str:
+    """Collapsed stacks of the memory still allocated, in bytes"""
+    lines = []
+    for stat in snapshot.statistics("traceback"):
+        stack = ";".join(
+            f"{'/'.join(frame.filename.split(os.sep)[-2:])}:{frame.lineno}"
+            for frame in stat.traceback
+        )
+        lines.append(f"{stack.replace(' ', '_')} {stat.size}\n")
+    return "".join(lines)
+
+
+class Profiler:
+    """Context manager profiling the code it wraps, see `output`"""
+
+    def __init__(self, mode: str, fmt: str, config: dict):
+        self.mode = mode
+        self.fmt = fmt
+        self.top = config["TOP"]
+        self.frames = config["ALLOC_FRAMES"]
+        self.profilers = []
+        self.output = b""
+
+    def __enter__(self):
+        if self.mode == "cprofile":
+            self.profilers.append(cProfile.Profile())
+            self.profilers[-1].enable()
+        else:
+            tracemalloc.start(self.frames)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.mode == "cprofile":
+            self.profilers[0].disable()
+            self.output = cprofile_output(self.profilers, self.fmt, self.top)
+            return
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.output = alloc_output(snapshot, peak, self.fmt, self.top)
+
+    async def __aenter__(self):
+        # cProfile only hooks the thread that enables it. Under ASGI the
+        # views, ORM and rendering run with sync_to_async in the request's
+        # thread-sensitive thread, so that thread is profiled as well.
+        if self.mode == "cprofile":
+            thread_profiler = cProfile.Profile()
+            await sync_to_async(thread_profiler.enable)()
+        self.__enter__()
+        if self.mode == "cprofile":
+            self.profilers.append(thread_profiler)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self.mode == "cprofile":
+            await sync_to_async(self.profilers[1].disable)()
+        self.__exit__(*exc_info)
+
+
+def cprofile_output(profilers: list, fmt: str, top: int) -> bytes:
+    stats = pstats.Stats(*profilers)
+    if fmt == "pstats":
+        return marshal.dumps(stats.stats)
+    if fmt == "collapsed":
+        return collapsed_cprofile(stats.stats).encode()
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats("cumulative").print_stats(top)
+    return stream.getvalue().encode()
+
+
+def alloc_output(snapshot, peak: int, fmt: str, top: int) -> bytes:
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    if fmt == "collapsed":
+        return collapsed_alloc(snapshot).encode()
+
+    stats = snapshot.statistics("lineno")
+    lines = [
+        f"Peak traced memory: {peak / 1024:.1f} KiB",
+        f"Still allocated: {sum(s.size for s in stats) / 1024:.1f} KiB "
+        f"in {sum(s.count for s in stats)} blocks",
+        "",
+    ]
+    lines.extend(str(stat) for stat in stats[:top])
+    return ("\n".join(lines) + "\n").encode()
+
+
+def store_profile(output: bytes, fmt: str, config: dict) -> str:
+    """Save a profile, drop the oldest beyond MAX_STORED, return its name"""
+    directory = config["STORAGE_DIR"]
+    os.makedirs(directory, exist_ok=True)
+    name = f"{uuid.uuid4().hex}.{FORMATS[fmt]}"
+    with open(os.path.join(directory, name), "wb") as fp:
+        fp.write(output)
+
+    stored = sorted(
+        (entry for entry in os.scandir(directory)
+         if NAME_RE.fullmatch(entry.name)),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in stored[:-config["MAX_STORED"]]:
+        os.unlink(entry.path)
+    return name
+
+
+def is_staff(request) -> bool:
+    """Staff check for session or JWT users, before DRF authentication"""
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        try:
+            authenticated = JWTAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        user = authenticated[0] if authenticated else None
+    return bool(user and user.is_active and user.is_staff)
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if request.GET.get("_profile") not in MODES:
+            return self.get_response(request)
+
+        config = get_config()
+        if not config["ENABLED"] or not is_staff(request):
+            return self.get_response(request)
+        if not _lock.acquire(blocking=False):
+            return self._busy(self.get_response(request))
+        try:
+            with self._profiler(request, config) as profiler:
+                response = self.get_response(request)
+        finally:
+            _lock.release()
+        return self._finish(request, response, profiler, config)
+
+    async def __acall__(self, request):
+        if request.GET.get("_profile") not in MODES:
+            return await self.get_response(request)
+
+        config = get_config()
+        if not config["ENABLED"] or not await sync_to_async(is_staff)(
+            request
+        ):
+            return await self.get_response(request)
+        if not _lock.acquire(blocking=False):
+            return self._busy(await self.get_response(request))
+        try:
+            async with self._profiler(request, config) as profiler:
+                response = await self.get_response(request)
+        finally:
+            _lock.release()
+        return self._finish(request, response, profiler, config)
+
+    @staticmethod
+    def _profiler(request, config: dict) -> Profiler:
+        mode = request.GET["_profile"]
+        fmt = request.GET.get("_profile_format", "text")
+        if fmt not in FORMATS or (fmt == "pstats" and mode != "cprofile"):
+            fmt = "text"
+        return Profiler(mode, fmt, config)
+
+    @staticmethod
+    def _busy(response):
+        response["X-Profile"] = "busy"
+        return response
+
+    @staticmethod
+    def _finish(request, response, profiler: Profiler, config: dict):
+        if request.GET.get("_profile_store") == "1":
+            name = store_profile(profiler.output, profiler.fmt, config)
+            response["X-Profile"] = profiler.mode
+            response["X-Profile-Url"] = reverse("profile", args=[name])
+            return response
+
+        extension = FORMATS[profiler.fmt]
+        profile = HttpResponse(
+            profiler.output, content_type=CONTENT_TYPES[extension]
+        )
+        profile["X-Profile"] = profiler.mode
+        profile["X-Profiled-Status"] = str(response.status_code)
+        profile["Content-Disposition"] = (
+            f'inline; filename="{profiler.mode}.{extension}"'
+        )
+        return profile
+
+
+class ProfileDownloadView(APIView):
+    """Download a profile stored with ?_profile_store=1"""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, name):
+        if not NAME_RE.fullmatch(name):
+            raise Http404
+        path = os.path.join(get_config()["STORAGE_DIR"], name)
+        if not os.path.exists(path):
+            raise Http404
+        return FileResponse(
+            open(path, "rb"),
+            as_attachment=True,
+            filename=name,
+            content_type=CONTENT_TYPES[name.rsplit(".", 1)[1]],
+        )
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+import sys
+import tempfile
 from datetime import timedelta
 from pathlib import Path
 from dotenv import load_dotenv
@@ -28,6 +30,12 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-default-secret_key")
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.getenv("DEBUG", "False") == "True"
 
+# OpenAPI schema, Swagger UI and Redoc at /api/schema/, on with DEBUG
+SERVE_SCHEMA = os.getenv("SERVE_SCHEMA", str(DEBUG)) == "True"
+
+# manage.py test, tests enable what they check with override_settings
+TESTING = sys.argv[1:2] == ["test"]
+
 ALLOWED_HOSTS = []
 
 INTERNAL_IPS = [
@@ -45,23 +53,35 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "rest_framework",
-    "drf_spectacular",
-    "debug_toolbar",
     "train_station",
     "user",
+    "jobs",
 ]
 
 MIDDLEWARE = [
+    "train_station_service.tracing.TracingMiddleware",
+    "train_station_service.instrumentation.RequestTimingMiddleware",
+    "train_station_service.metrics.PrometheusMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "train_station_service.profiling.ProfilingMiddleware",
 ]
 
+# debug_toolbar is too heavy for production, RequestTimingMiddleware
+# covers query counts and timings there
+if DEBUG:
+    INSTALLED_APPS.append("debug_toolbar")
+    MIDDLEWARE.insert(4, "debug_toolbar.middleware.DebugToolbarMiddleware")
+
+# drf_spectacular is only imported when the schema is served
+if SERVE_SCHEMA:
+    INSTALLED_APPS.append("drf_spectacular")
+
 ROOT_URLCONF = "train_station_service.urls"
 
 TEMPLATES = [
@@ -139,13 +159,22 @@ STATIC_ROOT = "/files/static"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = "/files/media"
 
+MEDIA_SERVE = {
+    # "accel" (nginx X-Accel-Redirect), "sendfile" (X-Sendfile) or "django"
+    "MODE": os.getenv("MEDIA_SERVE_MODE", "django"),
+    # internal nginx location that aliases MEDIA_ROOT
+    "ACCEL_PREFIX": "/protected-media/",
+    # other paths are only served to staff users
+    "PUBLIC_PREFIXES": ("uploads/",),
+    "MAX_AGE": 3600,
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
-    "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_PAGINATION_CLASS":
         "train_station.pagination.TrainStationPagination",
     "DEFAULT_THROTTLE_CLASSES": [
@@ -164,6 +193,11 @@ REST_FRAMEWORK = {
     ],
 }
 
+if SERVE_SCHEMA:
+    REST_FRAMEWORK["DEFAULT_SCHEMA_CLASS"] = (
+        "drf_spectacular.openapi.AutoSchema"
+    )
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Train Station Service API",
     "DESCRIPTION": "Order train station tickets",
@@ -177,6 +211,174 @@ SPECTACULAR_SETTINGS = {
     },
 }
 
+# Per-process memory by default, use a shared backend (e.g.
+# CACHE_BACKEND=django.core.cache.backends.redis.RedisCache) so all
+# instances see the same cached responses. "versions" holds the versions
+# of cached data: it must be shared by all processes and stay out of
+# database transactions, so files by default and Redis across hosts. The
+# files need no durability, they go to memory (/dev/shm) when possible,
+# a version that is lost is only replaced by a new one.
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    },
+    "versions": {
+        "BACKEND": os.getenv(
+            "VERSIONS_CACHE_BACKEND",
+            "django.core.cache.backends.filebased.FileBasedCache",
+        ),
+        "LOCATION": os.getenv(
+            "VERSIONS_CACHE_LOCATION",
+            os.path.join(
+                "/dev/shm"
+                if os.path.isdir("/dev/shm")
+                else tempfile.gettempdir(),
+                "train-station-versions",
+            ),
+        ),
+    },
+}
+
+# Journey list responses, invalidated whenever what they show changes
+RESPONSE_CACHE = {
+    "ENABLED": os.getenv("RESPONSE_CACHE_ENABLED", "True") == "True",
+    "ALIAS": "default",
+    "TIMEOUT": 300,
+}
+
+# Popular searches replayed by `manage.py warmup` after a deploy
+WARMUP = {
+    # request paths or access log lines, derived from bookings when empty
+    "QUERIES_FILE": os.getenv("WARMUP_QUERIES_FILE", ""),
+    "TOP": 100,
+    "CONCURRENCY": 4,
+    "BASE_URL": os.getenv("WARMUP_BASE_URL", "http://localhost"),
+    # written when done, checked by readiness probes
+    "MARKER_FILE": os.getenv(
+        "WARMUP_MARKER_FILE", os.path.join(BASE_DIR, ".warmup-done")
+    ),
+}
+
+# /itineraries/ search
+ITINERARIES = {
+    # minimum time to change trains at a station
+    "MIN_TRANSFER_MINUTES": 10,
+    "DEFAULT_RESULTS": 3,
+    "MAX_RESULTS": 10,
+}
+
+# Shortest route distance between all stations, written by a background
+# job and memory-mapped by /routes/distance/
+DISTANCE_MATRIX = {
+    "PATH": os.getenv(
+        "DISTANCE_MATRIX_PATH", os.path.join(BASE_DIR, "distance-matrix.bin")
+    ),
+}
+
+# Seat availability Server-Sent Events, served over ASGI only. The
+# in-memory backend only sees tickets booked in the same process; with
+# several workers or a separate job worker use
+# "train_station.events.CacheSeatEventBackend" over a shared cache.
+SEAT_EVENTS = {
+    "BACKEND": os.getenv(
+        "SEAT_EVENTS_BACKEND", "train_station.events.InMemorySeatEventBackend"
+    ),
+    "OPTIONS": {"buffer_size": 1000},
+    # each process polls the backend once per journey and interval and
+    # fans the events out to its clients
+    "POLL_INTERVAL": 0.5,
+    # events waiting per client before it has to resync
+    "QUEUE_SIZE": 100,
+    "HEARTBEAT_INTERVAL": 15,
+}
+
+# Off under test, sampled requests would log random lines to the output
+REQUEST_TIMING = {
+    "ENABLED": (
+        os.getenv("REQUEST_TIMING_ENABLED", "True") == "True" and not TESTING
+    ),
+    # fraction of requests that are measured and logged
+    "SAMPLE_RATE": float(os.getenv("REQUEST_TIMING_SAMPLE_RATE", "0.1")),
+    "HEADER": True,
+}
+
+SLOW_QUERIES = {
+    "ENABLED": os.getenv("SLOW_QUERIES_ENABLED", "True") == "True",
+    "THRESHOLD_MS": int(os.getenv("SLOW_QUERIES_THRESHOLD_MS", "200")),
+    # records kept in memory (and read back from LOG_FILE)
+    "BUFFER_SIZE": 500,
+    "EXPLAIN": True,
+    # JSON lines file shared by all worker processes, optional
+    "LOG_FILE": os.getenv("SLOW_QUERIES_LOG_FILE", ""),
+    # rotated to LOG_FILE.1 past this size
+    "LOG_FILE_MAX_BYTES": 5 * 1024 * 1024,
+}
+
+# Spans of sampled requests exported as OTLP/JSON
+TRACING = {
+    "ENABLED": os.getenv("TRACING_ENABLED", "False") == "True",
+    # head-based, an incoming traceparent header decides on its own
+    "SAMPLE_RATE": float(os.getenv("TRACING_SAMPLE_RATE", "0.01")),
+    "SERVICE_NAME": "train-station",
+    # "file" (JSON lines) or "otlp_http" (POST to ENDPOINT)
+    "EXPORTER": os.getenv("TRACING_EXPORTER", "file"),
+    "FILE": os.getenv("TRACING_FILE", os.path.join(BASE_DIR, "traces.jsonl")),
+    "ENDPOINT": os.getenv(
+        "TRACING_ENDPOINT", "http://localhost:4318/v1/traces"
+    ),
+}
+
+# ?_profile=cprofile|alloc for staff users
+PROFILING = {
+    "ENABLED": os.getenv("PROFILING_ENABLED", "True") == "True",
+    # profiles saved with ?_profile_store=1
+    "STORAGE_DIR": os.getenv(
+        "PROFILING_STORAGE_DIR", os.path.join(BASE_DIR, "profiles")
+    ),
+    "MAX_STORED": 100,
+}
+
+# /readyz probe
+HEALTH = {
+    # seconds a result is reused
+    "CACHE_SECONDS": 2.0,
+    # total time budget of the checks, keep it below the probe timeout
+    "TIMEOUT": float(os.getenv("HEALTH_TIMEOUT", "1.0")),
+    # oldest due job in seconds, only reported as a warning
+    "MAX_JOB_LAG": 300,
+    "REQUIRE_WARMUP": os.getenv("HEALTH_REQUIRE_WARMUP", "False") == "True",
+}
+
+# Bearer token required to scrape /metrics, open when empty
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "train_station_service.instrumentation": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
+
+JOBS = {
+    "MAX_ATTEMPTS": 5,
+    # retry after 10s, 20s, 40s, ... at most an hour
+    "BACKOFF_BASE": 10,
+    "BACKOFF_MAX": 3600,
+    # running jobs locked longer than this are considered abandoned
+    "LOCK_TIMEOUT": 600,
+}
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
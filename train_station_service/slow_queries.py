@@ -0,0 +1,264 @@
+"""Slow query log.
+
+Every database connection gets an execute wrapper that records statements
+slower than settings.SLOW_QUERIES["THRESHOLD_MS"]: the SQL, a normalized
+fingerprint grouping statements that only differ in values, the EXPLAIN
+plan and the view and code that issued the query. Records are kept in a
+bounded in-process ring buffer and, when LOG_FILE is set, appended to a
+JSON lines file shared by all processes. The file is renamed to
+LOG_FILE.1 (replacing the previous one) once it grows past
+LOG_FILE_MAX_BYTES, so at most two files are kept and read back.
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import DatabaseError, transaction
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+# Code of these packages is reported as the origin of a query
+LOCAL_PACKAGES = ("train_station", "user", "jobs")
+
+_config = None
+_buffer = None
+_lock = threading.Lock()
+# set while EXPLAIN runs so it isn't recorded itself
+_explaining = ContextVar("slow_query_explaining", default=False)
+
+
+def get_config() -> dict:
+    global _config, _buffer
+    if _config is None:
+        _config = {
+            "ENABLED": True,
+            "THRESHOLD_MS": 200,
+            "BUFFER_SIZE": 500,
+            "EXPLAIN": True,
+            "LOG_FILE": "",
+            "LOG_FILE_MAX_BYTES": 5 * 1024 * 1024,
+            **getattr(settings, "SLOW_QUERIES", {}),
+        }
+        _buffer = deque(maxlen=_config["BUFFER_SIZE"])
+    return _config
+
+
+@receiver(setting_changed)
+def _reset_config(setting, **kwargs):
+    global _config
+    if setting == "SLOW_QUERIES":
+        _config = None
+
+
+_NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(...)"),
+    (re.compile(r"\s+"), " "),
+)
+
+
+def normalize_sql(sql: str) -> str:
+    """SQL with literals and placeholders replaced, IN lists collapsed"""
+    for pattern, replacement in _NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(sql: str) -> str:
+    return hashlib.sha1(normalize_sql(sql).encode()).hexdigest()[:16]
+
+
+def find_origin(frame) -> tuple[str | None, str | None]:
+    """Return the view (ViewSet.action) and the innermost project code
+    (module.function:line) on the stack of a query"""
+    from django.views import View
+
+    view = source = None
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if source is None and module.split(".")[0] in LOCAL_PACKAGES:
+            source = f"{module}.{frame.f_code.co_qualname}:{frame.f_lineno}"
+        instance = frame.f_locals.get("self")
+        if isinstance(instance, View):
+            view = type(instance).__name__
+            action = getattr(instance, "action", None)
+            if action:
+                view = f"{view}.{action}"
+        frame = frame.f_back
+    return view, source
+
+
+def explain(connection, sql: str, params) -> str | None:
+    if not sql.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    token = _explaining.set(True)
+    try:
+        # a failing EXPLAIN must not abort the surrounding transaction
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"{connection.ops.explain_query_prefix()} {sql}", params
+                )
+                rows = cursor.fetchall()
+    except DatabaseError:
+        return None
+    finally:
+        _explaining.reset(token)
+    return "\n".join(" ".join(str(value) for value in row) for row in rows)
+
+
+def record(connection, sql: str, params, many: bool, duration: float) -> dict:
+    config = get_config()
+    view, source = find_origin(sys._getframe(2))
+    entry = {
+        "time": timezone.now().isoformat(),
+        "database": connection.alias,
+        "duration_ms": round(duration * 1000, 2),
+        "fingerprint": fingerprint(sql),
+        "sql": sql,
+        "view": view,
+        "source": source,
+        "explain": (
+            explain(connection, sql, params)
+            if config["EXPLAIN"] and not many else None
+        ),
+    }
+    with _lock:
+        _buffer.append(entry)
+        if config["LOG_FILE"]:
+            with open(config["LOG_FILE"], "a") as fp:
+                fp.write(json.dumps(entry) + "\n")
+                size = fp.tell()
+            if size > config["LOG_FILE_MAX_BYTES"]:
+                rotate(config["LOG_FILE"])
+    return entry
+
+
+def rotate(path: str) -> None:
+    try:
+        os.replace(path, f"{path}.1")
+    except FileNotFoundError:
+        # another process rotated it first
+        pass
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = time.perf_counter() - started
+
+    config = _config or get_config()
+    if (
+        config["ENABLED"]
+        and duration * 1000 >= config["THRESHOLD_MS"]
+        and not _explaining.get()
+    ):
+        record(context["connection"], sql, params, many, duration)
+    return result
+
+
+@receiver(connection_created)
+def install(sender, connection, **kwargs):
+    if slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_wrapper)
+
+
+def load_records(path: str | None = None) -> list[dict]:
+    """Records from the log file, or this process' buffer without one"""
+    config = get_config()
+    path = path or config["LOG_FILE"]
+    if not path:
+        with _lock:
+            return list(_buffer)
+
+    records = deque(maxlen=config["BUFFER_SIZE"])
+    # the rotated file holds the older records, nothing is logged yet
+    # when neither exists
+    for name in (f"{path}.1", path):
+        try:
+            with open(name) as fp:
+                for line in fp:
+                    if line.strip():
+                        records.append(json.loads(line))
+        except FileNotFoundError:
+            continue
+    return list(records)
+
+
+def clear() -> None:
+    get_config()
+    with _lock:
+        _buffer.clear()
+
+
+def top_offenders(
+    records: list[dict], limit: int = 10, sort: str = "total_ms"
+) -> list[dict]:
+    """Group records by fingerprint, the worst first"""
+    groups = {}
+    for entry in records:
+        group = groups.get(entry["fingerprint"])
+        if group is None:
+            group = groups[entry["fingerprint"]] = {
+                "fingerprint": entry["fingerprint"],
+                "sql": normalize_sql(entry["sql"]),
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "views": set(),
+                "sources": set(),
+                "explain": None,
+            }
+        group["count"] += 1
+        group["total_ms"] += entry["duration_ms"]
+        if entry["duration_ms"] >= group["max_ms"]:
+            group["max_ms"] = entry["duration_ms"]
+            group["explain"] = entry["explain"]
+        if entry["view"]:
+            group["views"].add(entry["view"])
+        if entry["source"]:
+            group["sources"].add(entry["source"])
+
+    result = sorted(groups.values(), key=lambda g: g[sort], reverse=True)
+    for group in result:
+        group["total_ms"] = round(group["total_ms"], 2)
+        group["mean_ms"] = round(group["total_ms"] / group["count"], 2)
+        group["views"] = sorted(group["views"])
+        group["sources"] = sorted(group["sources"])
+    return result[:limit]
+
+
+class SlowQueriesView(APIView):
+    """Slowest statements grouped by fingerprint (?limit=10&sort=total_ms)"""
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        sort = request.query_params.get("sort", "total_ms")
+        if sort not in ("total_ms", "count", "max_ms"):
+            sort = "total_ms"
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            limit = 10
+
+        return Response(
+            {
+                "threshold_ms": get_config()["THRESHOLD_MS"],
+                "results": top_offenders(load_records(), limit, sort),
+            }
+        )
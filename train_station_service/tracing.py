@@ -0,0 +1,434 @@
+"""Request tracing with OTLP-compatible JSON export.
+
+TracingMiddleware decides once per request whether it is traced (head-based
+sampling, settings TRACING["SAMPLE_RATE"], or the sampled flag of an
+incoming W3C `traceparent` header). A traced request records nested spans
+for the request, the view, every serializer's to_representation, every SQL
+query and rendering. Finished traces are exported from a background thread
+as OTLP/JSON ExportTraceServiceRequest documents, either appended to a JSON
+lines file or POSTed to an OTLP/HTTP collector (see `trace_collector` for a
+local stand-in).
+
+Untraced requests only pay for one context variable lookup per span.
+"""
+import json
+import logging
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from train_station_service import instrumentation
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds and status codes
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+STATUS_OK, STATUS_ERROR = 1, 2
+MAX_STATEMENT_LENGTH = 2000
+
+_trace = ContextVar("trace", default=None)
+_current_span = ContextVar("trace_span", default=None)
+_config = None
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def get_config() -> dict:
+    global _config
+    if _config is None:
+        _config = {
+            "ENABLED": False,
+            "SAMPLE_RATE": 0.01,
+            "SERVICE_NAME": "train-station",
+            # "file" or "otlp_http"
+            "EXPORTER": "file",
+            "FILE": "traces.jsonl",
+            "ENDPOINT": "http://localhost:4318/v1/traces",
+            "MAX_SPANS": 1000,
+            "QUEUE_SIZE": 1000,
+            **getattr(settings, "TRACING", {}),
+        }
+    return _config
+
+
+@receiver(setting_changed)
+def _reset_config(setting, **kwargs):
+    global _config
+    if setting == "TRACING":
+        flush()
+        _config = None
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Span:
+    __slots__ = (
+        "trace_id",
+        "span_id",
+        "parent_id",
+        "name",
+        "kind",
+        "start_ns",
+        "end_ns",
+        "attributes",
+        "status",
+    )
+
+    def __init__(self, trace_id, parent_id, name, kind, attributes):
+        self.trace_id = trace_id
+        self.span_id = _new_id(64)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.status = None
+
+    def end(self, error: bool = False) -> None:
+        self.end_ns = time.time_ns()
+        if error:
+            self.status = STATUS_ERROR
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in self.attributes.items()
+                if value is not None
+            ],
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.status:
+            span["status"] = {"code": self.status}
+        return span
+
+
+def _otlp_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Trace:
+    """Spans of one traced request"""
+
+    def __init__(self, trace_id: str | None = None, max_spans: int = 1000):
+        self.trace_id = trace_id or _new_id(128)
+        self.max_spans = max_spans
+        self.spans = []
+        self.dropped = 0
+
+    def start_span(self, name, kind=INTERNAL, parent_id=None, **attributes):
+        span = Span(self.trace_id, parent_id, name, kind, attributes)
+        if len(self.spans) < self.max_spans:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+        return span
+
+
+def current_trace() -> Trace | None:
+    return _trace.get()
+
+
+@contextmanager
+def _open_span(name, kind, attributes, trace):
+    parent = _current_span.get()
+    current = trace.start_span(
+        name, kind, parent.span_id if parent else None, **attributes
+    )
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException:
+        current.end(error=True)
+        raise
+    else:
+        current.end()
+    finally:
+        _current_span.reset(token)
+
+
+def span(name: str, kind: int = INTERNAL, **attributes):
+    """Context manager recording a child of the current span, a no-op when
+    the request isn't traced"""
+    trace = _trace.get()
+    if trace is None:
+        return nullcontext()
+    return _open_span(name, kind, attributes, trace)
+
+
+def trace_query(execute, sql, params, many, context):
+    """Database execute wrapper recording a span per query"""
+    trace = _trace.get()
+    if trace is None:
+        return execute(sql, params, many, context)
+    attributes = {
+        "db.system": context["connection"].vendor,
+        "db.statement": sql[:MAX_STATEMENT_LENGTH],
+    }
+    with _open_span("db.query", CLIENT, attributes, trace):
+        return execute(sql, params, many, context)
+
+
+@receiver(connection_created)
+def install(sender, connection, **kwargs):
+    # a permanent wrapper also sees queries of views run in other threads
+    # (sync_to_async under ASGI), the trace follows the context there
+    if trace_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(trace_query)
+
+
+def otlp_document(traces: list[Trace], config: dict) -> dict:
+    """OTLP/JSON ExportTraceServiceRequest"""
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {
+                            "key": "service.name",
+                            "value": {"stringValue": config["SERVICE_NAME"]},
+                        }
+                    ]
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": __name__},
+                        "spans": [
+                            item.to_otlp()
+                            for trace in traces
+                            for item in trace.spans
+                        ],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class Exporter(threading.Thread):
+    """Background thread exporting finished traces in batches"""
+
+    def __init__(self, config: dict):
+        super().__init__(name="trace-exporter", daemon=True)
+        self.config = config
+        self.queue = queue.Queue(maxsize=config["QUEUE_SIZE"])
+
+    def submit(self, trace: Trace) -> None:
+        try:
+            self.queue.put_nowait(trace)
+        except queue.Full:
+            logger.warning("Trace export queue is full, dropping a trace")
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < 100:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self.export(otlp_document(batch, self.config))
+            except Exception:
+                logger.exception("Trace export failed")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def export(self, document: dict) -> None:
+        body = json.dumps(document, separators=(",", ":"))
+        if self.config["EXPORTER"] == "otlp_http":
+            request = urllib.request.Request(
+                self.config["ENDPOINT"],
+                data=body.encode(),
+                headers={"Content-Type": "application/json"},
+                method="POST",
+            )
+            with urllib.request.urlopen(request, timeout=5):
+                pass
+        else:
+            with open(self.config["FILE"], "a") as fp:
+                fp.write(body + "\n")
+
+
+def get_exporter() -> Exporter:
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None or _exporter.config is not get_config():
+            _exporter = Exporter(get_config())
+            _exporter.start()
+        return _exporter
+
+
+def flush() -> None:
+    """Wait until every submitted trace is exported"""
+    if _exporter is not None:
+        _exporter.queue.join()
+
+
+def parse_traceparent(header: str) -> tuple[str, str, bool] | None:
+    """trace id, parent span id and sampled flag of a W3C traceparent"""
+    parts = header.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        flags = int(parts[3][:2], 16)
+        int(parts[1], 16)
+        int(parts[2], 16)
+    except ValueError:
+        return None
+    if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+class TracingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        trace, parent_id = self._start(request)
+        if trace is None:
+            return self.get_response(request)
+
+        token = _trace.set(trace)
+        try:
+            with _open_span(
+                f"{request.method} {request.path}",
+                SERVER,
+                self._attributes(request),
+                trace,
+            ) as root:
+                root.parent_id = parent_id
+                response = self.get_response(request)
+                self._end_view(request)
+        finally:
+            _trace.reset(token)
+        return self._finish(request, response, trace, root)
+
+    async def __acall__(self, request):
+        trace, parent_id = self._start(request)
+        if trace is None:
+            return await self.get_response(request)
+
+        token = _trace.set(trace)
+        try:
+            with _open_span(
+                f"{request.method} {request.path}",
+                SERVER,
+                self._attributes(request),
+                trace,
+            ) as root:
+                root.parent_id = parent_id
+                response = await self.get_response(request)
+                self._end_view(request)
+        finally:
+            _trace.reset(token)
+        return self._finish(request, response, trace, root)
+
+    @staticmethod
+    def _start(request) -> tuple[Trace | None, str | None]:
+        config = get_config()
+        if not config["ENABLED"]:
+            return None, None
+        incoming = parse_traceparent(request.headers.get("traceparent", ""))
+        if incoming:
+            trace_id, parent_id, sampled = incoming
+        else:
+            trace_id = parent_id = None
+            sampled = random.random() < config["SAMPLE_RATE"]
+        if not sampled:
+            return None, None
+        return Trace(trace_id, config["MAX_SPANS"]), parent_id
+
+    @staticmethod
+    def _attributes(request) -> dict:
+        return {
+            "http.request.method": request.method,
+            "url.path": request.path,
+            "url.query": request.META.get("QUERY_STRING") or None,
+        }
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        trace = _trace.get()
+        if trace is None:
+            return
+        name = instrumentation.view_name(view_func, request.method)
+        parent = _current_span.get()
+        request._trace_parent_span = parent
+        request._trace_view_span = trace.start_span(
+            f"view {name}", parent_id=parent.span_id, view=name
+        )
+        # spans started by the view are its children
+        _current_span.set(request._trace_view_span)
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook
+        trace = _trace.get()
+        if trace is None:
+            return response
+        self._end_view(request)
+        renderer = getattr(response, "accepted_renderer", None)
+        render = trace.start_span(
+            "render",
+            parent_id=_current_span.get().span_id,
+            renderer=type(renderer).__name__ if renderer else None,
+        )
+        response.add_post_render_callback(lambda rendered: render.end())
+        return response
+
+    @staticmethod
+    def _end_view(request) -> None:
+        view = getattr(request, "_trace_view_span", None)
+        if view is None or view.end_ns is not None:
+            return
+        view.end()
+        _current_span.set(request._trace_parent_span)
+
+    @staticmethod
+    def _finish(request, response, trace: Trace, root: Span):
+        match = getattr(request, "resolver_match", None)
+        if match is not None:
+            root.name = f"{request.method} {match.view_name}"
+            root.attributes["http.route"] = match.route
+        root.attributes["http.response.status_code"] = response.status_code
+        if response.status_code >= 500:
+            root.status = STATUS_ERROR
+        if trace.dropped:
+            root.attributes["spans.dropped"] = trace.dropped
+        response["traceparent"] = f"00-{trace.trace_id}-{root.span_id}-01"
+        get_exporter().submit(trace)
+        return response